@@ -2,7 +2,9 @@
 # For license information, please see license.txt
 
 import frappe
-from prakash_steel.utils.lead_time import calculate_decoupled_lead_time
+from frappe.utils import flt
+
+from prakash_steel.utils.decoupled_lead_time import get_stored_decoupled_lead_time
 
 
 @frappe.whitelist()
@@ -11,31 +13,28 @@ def get_decoupled_lead_time(item_code):
 	API method to get decoupled lead time for an item.
 	This is called from the Item form to display the decoupled lead time.
 
+	Serves the stored custom_decoupled_lead_time while it is fresh for the current BOMs
+	and lead times, and recomputes it only when its stamp is stale.
+
 	Args:
 		item_code (str): Item code
 
 	Returns:
-		float: Decoupled lead time value
+		dict: decoupled_lead_time, lead_time_version (freshness stamp) and recomputed
 	"""
 	if not item_code:
-		return 0
-
-	# Check if item exists in database (not a new item being created)
-	if not frappe.db.exists("Item", item_code):
-		# Item doesn't exist yet (new item), return 0 or lead_time_days if available
-		# This prevents errors when creating new items
-		return 0
+		return {"decoupled_lead_time": 0}
 
 	try:
-		decoupled_lead_time = calculate_decoupled_lead_time(item_code)
-		return decoupled_lead_time
-	except frappe.DoesNotExistError:
-		# Item was deleted or doesn't exist, return 0 silently
-		return 0
+		result = get_stored_decoupled_lead_time(item_code)
+		# Item doesn't exist yet (new item) or was deleted
+		return result or {"decoupled_lead_time": 0}
 	except Exception as e:
-		# Log error but don't show to user (silent failure)
+		# Log error but don't show to user (silent failure): keep the value already on the item
 		frappe.log_error(
-			f"Error calculating decoupled lead time for item {item_code}: {str(e)}",
+			f"Error getting decoupled lead time for item {item_code}: {str(e)}",
 			"Get Decoupled Lead Time Error",
 		)
-		return 0
+		return {
+			"decoupled_lead_time": flt(frappe.db.get_value("Item", item_code, "custom_decoupled_lead_time"))
+		}
@@ -0,0 +1,229 @@
+# Copyright (c) 2025, beetashoke chakraborty and contributors
+# For license information, please see license.txt
+
+"""
+Benchmarks of the planning engines on synthetic catalogues.
+
+Run on a local test site (site config ``allow_tests`` must be set, as the catalogue is
+inserted into and deleted from the site's tables):
+
+	bench --site test_site execute prakash_steel.benchmarks.planning.run_benchmarks
+	bench --site test_site execute prakash_steel.benchmarks.planning.run_benchmarks \
+		--kwargs '{"scales": {"custom": {"item_count": 5000, "bom_depth": 6}}, "repeat": 5}'
+
+The JSON report (latency, query count, SQL time and peak Python memory per engine and
+scale) is written to the site's private files and returned.
+"""
+
+import contextlib
+import io
+import json
+import os
+import statistics
+import time
+import tracemalloc
+
+import frappe
+from frappe import _
+from frappe.utils import cint, flt, now, now_datetime
+
+from prakash_steel.benchmarks.synthetic_data import (
+	clear_synthetic_data,
+	get_config,
+	insert_synthetic_data,
+)
+from prakash_steel.utils.lead_time import clear_default_bom_memo
+from prakash_steel.utils.profiling import PhaseProfiler
+
+DEFAULT_SCALES = {
+	"small": {
+		"item_count": 300,
+		"bom_depth": 3,
+		"fan_out": 3,
+		"shared_ratio": 0.2,
+		"sales_orders": 100,
+		"purchase_orders": 50,
+		"material_requests": 50,
+		"work_orders": 20,
+	},
+	"medium": {
+		"item_count": 3000,
+		"bom_depth": 4,
+		"fan_out": 4,
+		"shared_ratio": 0.3,
+		"sales_orders": 1000,
+		"purchase_orders": 500,
+		"material_requests": 500,
+		"work_orders": 200,
+	},
+	"large": {
+		"item_count": 15000,
+		"bom_depth": 5,
+		"fan_out": 5,
+		"shared_ratio": 0.3,
+		"sales_orders": 5000,
+		"purchase_orders": 2500,
+		"material_requests": 2500,
+		"work_orders": 1000,
+	},
+}
+
+# Report views measured for the PO Recommendation engine
+PO_RECOMMENDATION_VIEWS = {
+	"purchase_buffer": {"purchase": 1, "buffer_flag": 1},
+	"purchase_non_buffer": {"purchase": 1, "buffer_flag": 0},
+	"sell_buffer": {"sell": 1, "buffer_flag": 1},
+	"sell_non_buffer": {"sell": 1, "buffer_flag": 0},
+}
+
+
+def run_benchmarks(scales=None, repeat=3, output_path=None, keep_data=False):
+	"""
+	Generate each scale's catalogue, run every engine on it and return the JSON report.
+
+	Args:
+		scales: scale name -> synthetic_data config overrides (default DEFAULT_SCALES)
+		repeat: timed runs per engine; latency is reported as min / median / max
+		output_path: where to write the report (default: the site's private files)
+		keep_data: leave the last catalogue in place for manual inspection
+	"""
+	check_benchmark_site()
+
+	if isinstance(scales, str):
+		scales = json.loads(scales)
+	scales = scales or DEFAULT_SCALES
+	repeat = max(1, cint(repeat))
+
+	report = {
+		"site": frappe.local.site,
+		"started_at": now(),
+		"repeat": repeat,
+		"results": [],
+	}
+
+	try:
+		for scale_name, scale_config in scales.items():
+			config = get_config(scale_config)
+
+			clear_synthetic_data()
+			started = time.perf_counter()
+			row_counts = insert_synthetic_data(config)
+			frappe.db.commit()
+			generation_ms = flt((time.perf_counter() - started) * 1000, 3)
+
+			for engine, run in get_engines().items():
+				result = measure(run, repeat)
+				result.update(
+					{
+						"scale": scale_name,
+						"engine": engine,
+						"config": config,
+						"row_counts": row_counts,
+						"generation_ms": generation_ms,
+					}
+				)
+				report["results"].append(result)
+				print(
+					f"[Planning Benchmark] {scale_name} / {engine}: "
+					f"median {result['latency_ms']['median']:.1f} ms, "
+					f"{result['query_count']} queries, peak {result['peak_memory_mb']:.1f} MB"
+				)
+	finally:
+		if not cint(keep_data):
+			clear_synthetic_data()
+			frappe.db.commit()
+
+	report["finished_at"] = now()
+
+	output_path = output_path or frappe.get_site_path(
+		"private", "files", f"planning_benchmark_{now_datetime().strftime('%Y%m%d_%H%M%S')}.json"
+	)
+	os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+	with open(output_path, "w") as f:
+		json.dump(report, f, indent=1, default=str)
+	report["output_path"] = output_path
+
+	return report
+
+
+def check_benchmark_site():
+	if not cint(frappe.conf.get("allow_tests")):
+		frappe.throw(
+			_(
+				"Planning benchmarks insert and delete synthetic data. "
+				"Run them only on a test site with allow_tests enabled."
+			),
+			title=_("Not a Test Site"),
+		)
+
+
+def get_engines():
+	"""Engine name -> callable returning the number of result rows"""
+	from prakash_steel.prakash_steel.doctype.mrp_genaration import mrp_genaration
+	from prakash_steel.prakash_steel.report.po_recomendation_for_psp import po_recomendation_for_psp
+	from prakash_steel.utils import decoupled_lead_time
+
+	engines = {}
+	for view, filters in PO_RECOMMENDATION_VIEWS.items():
+		engines[f"po_recommendation:{view}"] = lambda filters=filters: len(
+			po_recomendation_for_psp.get_data(dict(filters))
+		)
+
+	def run_mrp():
+		result = mrp_genaration._generate_mrp_order_recommendations_worker()
+		return result.get("item_count") or 0
+
+	engines["mrp_generation"] = run_mrp
+	engines["decoupled_lead_time"] = decoupled_lead_time.update_all_decoupled_lead_times
+	return engines
+
+
+def measure(run, repeat):
+	"""
+	Time `repeat` runs of an engine, then make one more run under tracemalloc.
+
+	Latency and query counts come from the untraced runs, since tracemalloc slows
+	allocation-heavy code down considerably. Anything the engine writes (logs, cache
+	entries in the database) is rolled back after every run.
+	"""
+	latencies = []
+	query_count = sql_time_ms = rows = 0
+
+	for _run in range(repeat):
+		profiler = PhaseProfiler(enabled=True)
+		rows = _run_once(run, profiler)
+		phase = profiler.phases[0]
+		latencies.append(phase["wall_time_ms"])
+		query_count = phase["query_count"]
+		sql_time_ms = phase["sql_time_ms"]
+
+	tracemalloc.start()
+	try:
+		_run_once(run, PhaseProfiler())
+		peak_memory = tracemalloc.get_traced_memory()[1]
+	finally:
+		tracemalloc.stop()
+
+	return {
+		"rows": rows,
+		"latency_ms": {
+			"min": min(latencies),
+			"median": statistics.median(latencies),
+			"max": max(latencies),
+			"runs": latencies,
+		},
+		"query_count": query_count,
+		"sql_time_ms": sql_time_ms,
+		"peak_memory_mb": flt(peak_memory / (1024 * 1024), 3),
+	}
+
+
+def _run_once(run, profiler):
+	# Every run starts cold: no memoized default BOMs from the previous run
+	clear_default_bom_memo()
+	try:
+		with contextlib.redirect_stdout(io.StringIO()), profiler.phase("run"):
+			return run()
+	finally:
+		profiler.stop()
+		frappe.db.rollback()
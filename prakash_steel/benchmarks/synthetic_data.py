@@ -0,0 +1,348 @@
+# Copyright (c) 2025, beetashoke chakraborty and contributors
+# For license information, please see license.txt
+
+import random
+
+import frappe
+from frappe.utils import add_days, cint, flt, getdate, now, nowdate
+
+# Every synthetic document (and child row) is named with this prefix so it can be removed again
+NAME_PREFIX = "BENCH-"
+
+DEFAULT_CONFIG = {
+	"item_count": 1000,
+	"bom_depth": 4,  # BOM levels below the finished goods
+	"fan_out": 4,  # BOM lines per BOM
+	"shared_ratio": 0.3,  # share of BOM lines pointing at a common sub-assembly
+	"sales_orders": 200,
+	"purchase_orders": 100,
+	"material_requests": 100,
+	"work_orders": 50,
+	"lines_per_order": 5,
+	"buffer_ratio": 0.3,
+	"seed": 42,
+	"company": "_Test Company",
+	"warehouse": "Stores - _TC",
+	"customer": "_Test Customer",
+	"supplier": "_Test Supplier",
+}
+
+# Insert order; child tables follow their parents
+SYNTHETIC_DOCTYPES = (
+	"Item",
+	"BOM",
+	"BOM Item",
+	"Bin",
+	"Sales Order",
+	"Sales Order Item",
+	"Purchase Order",
+	"Purchase Order Item",
+	"Material Request",
+	"Material Request Item",
+	"Work Order",
+)
+
+
+def get_config(config=None):
+	"""DEFAULT_CONFIG overridden by the given values"""
+	return frappe._dict({**DEFAULT_CONFIG, **(config or {})})
+
+
+def build_synthetic_data(config=None):
+	"""
+	Build a reproducible synthetic planning catalogue as doctype -> list of row dicts.
+
+	Items are spread over bom_depth + 1 levels: finished goods at level 0, raw materials
+	at the last level and sub-assemblies in between. Every non-raw item gets one default
+	BOM whose lines point at the next level only, so the BOM graph is always acyclic.
+	With probability shared_ratio a line points at a small pool of common sub-assemblies
+	instead of the next dedicated item, which produces the shared sub-trees that make
+	explosion expensive. Nothing touches the database; the same config and seed always
+	give the same rows.
+	"""
+	config = get_config(config)
+	rng = random.Random(cint(config.seed))
+	today = getdate(nowdate())
+	data = {doctype: [] for doctype in SYNTHETIC_DOCTYPES}
+
+	level_count = cint(config.bom_depth) + 1
+	levels = [[] for _ in range(level_count)]
+	for n in range(cint(config.item_count)):
+		levels[n % level_count].append(f"{NAME_PREFIX}ITEM-{n:06d}")
+
+	raw_level = level_count - 1
+	for level, item_codes in enumerate(levels):
+		if level == raw_level:
+			item_type, item_group = "RAW", "Raw Material"
+		elif level == 0:
+			item_type, item_group = "FG", "Products"
+		else:
+			item_type, item_group = "INT", "Sub Assemblies"
+
+		for item_code in item_codes:
+			tog = rng.randint(0, 500)
+			# MOQ and batch size are mutually exclusive on Item
+			moq, batch_size = 0, 0
+			if rng.random() < 0.3:
+				moq = rng.randint(10, 200)
+			elif rng.random() < 0.3:
+				batch_size = rng.randint(5, 100)
+
+			data["Item"].append(
+				{
+					"name": item_code,
+					"item_code": item_code,
+					"item_name": item_code,
+					"item_group": item_group,
+					"stock_uom": "Nos",
+					"is_stock_item": 1,
+					"disabled": 0,
+					"custom_item_type": item_type,
+					"custom_buffer_flag": "Buffer"
+					if rng.random() < flt(config.buffer_ratio)
+					else "Non-Buffer",
+					"safety_stock": tog,
+					"custom_top_of_yellow": flt(tog * 2 / 3, 2),
+					"custom_top_of_red": flt(tog / 3, 2),
+					"min_order_qty": moq,
+					"custom_batch_size": batch_size,
+				}
+			)
+
+	# One default submitted BOM per non-raw item, children from the next level
+	boms_by_item = {}
+	for level in range(raw_level):
+		next_level = levels[level + 1]
+		if not next_level:
+			continue
+		shared_pool = next_level[: max(1, len(next_level) // 10)]
+		cursor = 0
+
+		for item_code in levels[level]:
+			bom_name = f"{NAME_PREFIX}BOM-{item_code[len(NAME_PREFIX) :]}-001"
+			boms_by_item[item_code] = bom_name
+			data["BOM"].append(
+				{
+					"name": bom_name,
+					"item": item_code,
+					"company": config.company,
+					"uom": "Nos",
+					"quantity": rng.choice((1, 1, 1, 10)),
+					"is_active": 1,
+					"is_default": 1,
+					"docstatus": 1,
+				}
+			)
+
+			children = []
+			for _line in range(cint(config.fan_out)):
+				if rng.random() < flt(config.shared_ratio):
+					child_item_code = rng.choice(shared_pool)
+				else:
+					child_item_code = next_level[cursor % len(next_level)]
+					cursor += 1
+				if child_item_code not in children:
+					children.append(child_item_code)
+
+			for idx, child_item_code in enumerate(children, start=1):
+				qty = flt(rng.uniform(0.5, 5), 3)
+				data["BOM Item"].append(
+					_child_row(
+						bom_name,
+						"BOM",
+						idx,
+						item_code=child_item_code,
+						qty=qty,
+						stock_qty=qty,
+						uom="Nos",
+						stock_uom="Nos",
+						conversion_factor=1,
+						docstatus=1,
+					)
+				)
+
+	for n, item in enumerate(data["Item"]):
+		actual_qty = rng.randint(0, 1000) if rng.random() < 0.7 else 0
+		data["Bin"].append(
+			{
+				"name": f"{NAME_PREFIX}BIN-{n:06d}",
+				"item_code": item["name"],
+				"warehouse": config.warehouse,
+				"stock_uom": "Nos",
+				"actual_qty": actual_qty,
+				"projected_qty": actual_qty,
+			}
+		)
+
+	sellable_items = [item_code for level in levels[:raw_level] for item_code in level]
+	raw_items = levels[raw_level]
+
+	for n in range(cint(config.sales_orders) if sellable_items else 0):
+		name = f"{NAME_PREFIX}SO-{n:06d}"
+		data["Sales Order"].append(
+			{
+				"name": name,
+				"customer": config.customer,
+				"company": config.company,
+				"transaction_date": today,
+				"delivery_date": add_days(today, 30),
+				"status": "To Deliver and Bill",
+				"docstatus": 1,
+			}
+		)
+		for idx, item_code in enumerate(_pick_lines(rng, sellable_items, config), start=1):
+			qty = rng.randint(1, 200)
+			data["Sales Order Item"].append(
+				_child_row(
+					name,
+					"Sales Order",
+					idx,
+					item_code=item_code,
+					qty=qty,
+					stock_qty=qty,
+					delivered_qty=rng.choice((0, 0, 0, qty // 2)),
+					delivery_date=add_days(today, rng.randint(-15, 30)),
+					warehouse=config.warehouse,
+					uom="Nos",
+					stock_uom="Nos",
+					conversion_factor=1,
+					docstatus=1,
+				)
+			)
+
+	for n in range(cint(config.purchase_orders) if raw_items else 0):
+		name = f"{NAME_PREFIX}PO-{n:06d}"
+		data["Purchase Order"].append(
+			{
+				"name": name,
+				"supplier": config.supplier,
+				"company": config.company,
+				"transaction_date": today,
+				"schedule_date": add_days(today, 15),
+				"status": "To Receive and Bill",
+				"docstatus": 1,
+			}
+		)
+		for idx, item_code in enumerate(_pick_lines(rng, raw_items, config), start=1):
+			qty = rng.randint(10, 1000)
+			data["Purchase Order Item"].append(
+				_child_row(
+					name,
+					"Purchase Order",
+					idx,
+					item_code=item_code,
+					qty=qty,
+					stock_qty=qty,
+					received_qty=rng.choice((0, 0, qty // 3)),
+					schedule_date=add_days(today, rng.randint(1, 30)),
+					warehouse=config.warehouse,
+					uom="Nos",
+					stock_uom="Nos",
+					conversion_factor=1,
+					docstatus=1,
+				)
+			)
+
+	for n in range(cint(config.material_requests) if raw_items else 0):
+		name = f"{NAME_PREFIX}MR-{n:06d}"
+		data["Material Request"].append(
+			{
+				"name": name,
+				"company": config.company,
+				"material_request_type": "Purchase",
+				"transaction_date": today,
+				"schedule_date": add_days(today, 7),
+				"status": "Pending",
+				"docstatus": 1,
+			}
+		)
+		for idx, item_code in enumerate(_pick_lines(rng, raw_items, config), start=1):
+			qty = rng.randint(10, 500)
+			data["Material Request Item"].append(
+				_child_row(
+					name,
+					"Material Request",
+					idx,
+					item_code=item_code,
+					qty=qty,
+					stock_qty=qty,
+					ordered_qty=0,
+					schedule_date=add_days(today, 7),
+					warehouse=config.warehouse,
+					uom="Nos",
+					stock_uom="Nos",
+					conversion_factor=1,
+					docstatus=1,
+				)
+			)
+
+	manufactured_items = [item_code for item_code in sellable_items if item_code in boms_by_item]
+	for n in range(cint(config.work_orders) if manufactured_items else 0):
+		item_code = rng.choice(manufactured_items)
+		qty = rng.randint(10, 500)
+		data["Work Order"].append(
+			{
+				"name": f"{NAME_PREFIX}WO-{n:06d}",
+				"production_item": item_code,
+				"bom_no": boms_by_item[item_code],
+				"company": config.company,
+				"qty": qty,
+				"produced_qty": rng.choice((0, qty // 4, qty // 2)),
+				"status": "In Process",
+				"docstatus": 1,
+			}
+		)
+
+	return data
+
+
+def insert_synthetic_data(config=None):
+	"""
+	Bulk insert a synthetic catalogue (see build_synthetic_data) and return row counts.
+
+	Rows go in through frappe.db.bulk_insert without controllers or validation, which is
+	what makes catalogues of tens of thousands of items practical to generate.
+	"""
+	data = build_synthetic_data(config)
+	timestamp = now()
+	standard_values = {
+		"creation": timestamp,
+		"modified": timestamp,
+		"owner": "Administrator",
+		"modified_by": "Administrator",
+	}
+
+	counts = {}
+	for doctype in SYNTHETIC_DOCTYPES:
+		rows = data[doctype]
+		counts[doctype] = len(rows)
+		if not rows:
+			continue
+
+		fields = list({**rows[0], **standard_values})
+		values = [tuple({**row, **standard_values}[fieldname] for fieldname in fields) for row in rows]
+		frappe.db.bulk_insert(doctype, fields, values)
+
+	return counts
+
+
+def clear_synthetic_data():
+	"""Delete every synthetic document and child row"""
+	for doctype in reversed(SYNTHETIC_DOCTYPES):
+		frappe.db.sql(f"DELETE FROM `tab{doctype}` WHERE name LIKE %s", (f"{NAME_PREFIX}%",))
+
+
+def _child_row(parent, parenttype, idx, **values):
+	return {
+		"name": f"{parent}-{idx:03d}",
+		"parent": parent,
+		"parenttype": parenttype,
+		"parentfield": "items",
+		"idx": idx,
+		**values,
+	}
+
+
+def _pick_lines(rng, item_codes, config):
+	line_count = min(len(item_codes), rng.randint(1, max(1, cint(config.lines_per_order))))
+	return rng.sample(item_codes, line_count)
@@ -142,10 +142,16 @@ doc_events = {
 	"Item": {
 		"validate": "prakash_steel.utils.item.validate_min_order_qty_and_batch_size",
 		"on_update": "prakash_steel.utils.item.update_decoupled_lead_time_on_item_save",
+		"on_trash": "prakash_steel.utils.item.update_decoupled_lead_time_on_item_trash",
+		"after_rename": "prakash_steel.utils.item.update_decoupled_lead_time_on_item_rename",
 	},
 	"BOM": {
+		# Active draft BOMs count as default BOMs too, so draft saves and deletes matter
+		"on_update": "prakash_steel.utils.item.update_decoupled_lead_time_on_bom_save",
 		"on_submit": "prakash_steel.utils.item.update_decoupled_lead_time_on_bom_save",
 		"on_update_after_submit": "prakash_steel.utils.item.update_decoupled_lead_time_on_bom_save",
+		"on_cancel": "prakash_steel.utils.item.update_decoupled_lead_time_on_bom_save",
+		"on_trash": "prakash_steel.utils.item.update_decoupled_lead_time_on_bom_save",
 	},
 	"Purchase Receipt": {
 		"on_submit": "prakash_steel.utils.purchase_receipt.validate_purchase_receipt_quantity",
@@ -289,6 +295,13 @@ scheduler_events = {
 			"prakash_steel.prakash_steel.report.po_recomendation_for_psp.po_recomendation_for_psp.save_daily_on_hand_colour"
 		]
 	},
+	# Safety nets: net-change MRP queues a full regeneration once the last full run is
+	# older than the interval in Production planning settings, and every decoupled lead
+	# time is refreshed in one pass, catching anything a deferred recompute missed.
+	"daily": [
+		"prakash_steel.utils.mrp_plan.run_periodic_full_regeneration",
+		"prakash_steel.utils.decoupled_lead_time.update_all_decoupled_lead_times",
+	],
 	# Generic 'all' scheduler hook that runs frequently; wrapper
 	# function ensures we only snapshot once per day after 14:31.
 	# "all": [
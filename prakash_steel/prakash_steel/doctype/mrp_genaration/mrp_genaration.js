@@ -46,7 +46,7 @@
 // 								message: __(
 // 									"Order recommendations calculated successfully!<br><br>" +
 // 									"Items with net order recommendations > 0: {0}<br><br>" +
-// 									"Check server logs and console for detailed breakdown.",
+// 									"Click an item in the results for its detailed breakdown.",
 // 									[items_with_rec]
 // 								),
 // 								indicator: "green",
@@ -215,9 +215,203 @@ frappe.ui.form.on("MRP Genaration", {
                 generate_mrp_order_recommendations(frm);
             });
         }
+
+        render_mrp_results(frm);
     },
 });
 
+// Latest MRP results, one page at a time. The view state (page, sort, filters)
+// lives on the form so paging and sorting keep the other settings.
+const MRP_RESULT_COLUMNS = [
+    { fieldname: "item_code", label: __("Item"), fieldtype: "Link", options: "Item" },
+    { fieldname: "sku_type", label: __("SKU Type"), fieldtype: "Data" },
+    { fieldname: "stock", label: __("Stock"), fieldtype: "Float" },
+    { fieldname: "wip", label: __("WIP"), fieldtype: "Float" },
+    { fieldname: "open_so", label: __("Open SO"), fieldtype: "Float" },
+    { fieldname: "open_po", label: __("Open PO"), fieldtype: "Float" },
+    { fieldname: "mrq", label: __("MRQ"), fieldtype: "Float" },
+    { fieldname: "parent_demand", label: __("Parent Demand"), fieldtype: "Float" },
+    { fieldname: "final_order_rec", label: __("Order Rec"), fieldtype: "Float" },
+    { fieldname: "net_order_rec", label: __("Net Order Rec"), fieldtype: "Float" },
+];
+
+function get_mrp_results_view(frm) {
+    if (!frm.mrp_results_view) {
+        frm.mrp_results_view = {
+            start: 0,
+            page_length: 50,
+            sort_by: "net_order_rec",
+            sort_order: "desc",
+            filters: { item_code: "", with_recommendation: 1 },
+        };
+    }
+    return frm.mrp_results_view;
+}
+
+function render_mrp_results(frm) {
+    const field = frm.fields_dict.mrp_results;
+    if (!field) {
+        return;
+    }
+
+    const view = get_mrp_results_view(frm);
+    frappe.call({
+        method: "prakash_steel.prakash_steel.doctype.mrp_genaration.mrp_genaration.get_mrp_results",
+        args: {
+            start: view.start,
+            page_length: view.page_length,
+            sort_by: view.sort_by,
+            sort_order: view.sort_order,
+            filters: view.filters,
+        },
+        callback: function (r) {
+            if (!r.message || r.message.error) {
+                field.$wrapper.html(
+                    `<div class="text-muted">${frappe.utils.escape_html((r.message && r.message.error) || __("No MRP results"))}</div>`
+                );
+                return;
+            }
+            draw_mrp_results(frm, r.message);
+        },
+    });
+}
+
+function draw_mrp_results(frm, results) {
+    const view = get_mrp_results_view(frm);
+    const $wrapper = frm.fields_dict.mrp_results.$wrapper;
+    const first = results.total_count ? results.start + 1 : 0;
+    const last = results.start + results.rows.length;
+
+    const header = MRP_RESULT_COLUMNS.map((column) => {
+        const arrow = column.fieldname === view.sort_by ? (view.sort_order === "asc" ? " ↑" : " ↓") : "";
+        const align = column.fieldtype === "Float" ? "text-right" : "";
+        return `<th class="${align}" data-sort="${column.fieldname}" style="cursor: pointer">${column.label}${arrow}</th>`;
+    }).join("");
+
+    const body = results.rows.map((row) => {
+        const cells = MRP_RESULT_COLUMNS.map((column) => {
+            const align = column.fieldtype === "Float" ? "text-right" : "";
+            return `<td class="${align}">${frappe.format(row[column.fieldname], column, { only_value: true }, row)}</td>`;
+        }).join("");
+        return `<tr data-item-code="${frappe.utils.escape_html(row.item_code)}" style="cursor: pointer">${cells}</tr>`;
+    }).join("");
+
+    $wrapper.html(`
+        <div class="mrp-results">
+            <div class="flex" style="gap: 8px; margin-bottom: 8px; align-items: center">
+                <input type="text" class="form-control input-xs mrp-results-item" style="max-width: 220px"
+                    placeholder="${__("Item Code")}" value="${frappe.utils.escape_html(view.filters.item_code || "")}">
+                <label class="small" style="margin: 0">
+                    <input type="checkbox" class="mrp-results-with-rec" ${view.filters.with_recommendation ? "checked" : ""}>
+                    ${__("Only items to order")}
+                </label>
+                <span class="text-muted small" style="margin-left: auto">
+                    ${__("{0}-{1} of {2}", [first, last, results.total_count])}
+                    ${results.mrp_run ? " · " + frappe.utils.escape_html(results.mrp_run) : ""}
+                </span>
+                <button class="btn btn-xs btn-default mrp-results-prev" ${results.start > 0 ? "" : "disabled"}>${__("Previous")}</button>
+                <button class="btn btn-xs btn-default mrp-results-next" ${last < results.total_count ? "" : "disabled"}>${__("Next")}</button>
+            </div>
+            <div class="text-muted small" style="margin-bottom: 4px">${__("Click an item for its calculation breakdown")}</div>
+            <div class="table-responsive">
+                <table class="table table-bordered table-condensed">
+                    <thead><tr>${header}</tr></thead>
+                    <tbody>${body || `<tr><td colspan="${MRP_RESULT_COLUMNS.length}" class="text-muted text-center">${__("No items")}</td></tr>`}</tbody>
+                </table>
+            </div>
+        </div>
+    `);
+
+    $wrapper.find("th[data-sort]").on("click", function () {
+        const sort_by = $(this).attr("data-sort");
+        view.sort_order = view.sort_by === sort_by && view.sort_order === "desc" ? "asc" : "desc";
+        view.sort_by = sort_by;
+        view.start = 0;
+        render_mrp_results(frm);
+    });
+    $wrapper.find(".mrp-results-item").on("change", function () {
+        view.filters.item_code = $(this).val();
+        view.start = 0;
+        render_mrp_results(frm);
+    });
+    $wrapper.find(".mrp-results-with-rec").on("change", function () {
+        view.filters.with_recommendation = $(this).is(":checked") ? 1 : 0;
+        view.start = 0;
+        render_mrp_results(frm);
+    });
+    $wrapper.find(".mrp-results-prev").on("click", function () {
+        view.start = Math.max(0, view.start - view.page_length);
+        render_mrp_results(frm);
+    });
+    $wrapper.find(".mrp-results-next").on("click", function () {
+        view.start += view.page_length;
+        render_mrp_results(frm);
+    });
+    $wrapper.find("tr[data-item-code]").on("click", function (e) {
+        // The item link itself still opens the Item
+        if ($(e.target).closest("a").length) {
+            return;
+        }
+        show_mrp_item_breakdown($(this).attr("data-item-code"));
+    });
+}
+
+// The breakdown is rendered on the server only when a planner opens an item
+function show_mrp_item_breakdown(item_code) {
+    frappe.call({
+        method: "prakash_steel.prakash_steel.doctype.mrp_genaration.mrp_genaration.get_mrp_item_breakdown",
+        args: { item_code: item_code },
+        freeze: true,
+        callback: function (r) {
+            if (!r.message || r.message.error) {
+                frappe.msgprint({
+                    title: __("MRP Breakdown"),
+                    message: frappe.utils.escape_html((r.message && r.message.error) || __("No breakdown available")),
+                    indicator: "red",
+                });
+                return;
+            }
+
+            const dialog = new frappe.ui.Dialog({
+                title: __("MRP Breakdown: {0}", [item_code]),
+                size: "large",
+                fields: [{ fieldname: "breakdown", fieldtype: "HTML" }],
+            });
+            dialog.fields_dict.breakdown.$wrapper.html(
+                `<pre style="white-space: pre-wrap">${frappe.utils.escape_html(r.message.calculation_breakdown)}</pre>
+                ${get_time_phased_plan_html(r.message.time_phased_plan)}
+                <div class="text-muted small">${__("From MRP run {0}", [frappe.utils.escape_html(r.message.mrp_run || "")])}</div>`
+            );
+            dialog.show();
+        },
+    });
+}
+
+// One column per bucket: gross requirements, planned receipts and planned releases
+function get_time_phased_plan_html(plan) {
+    if (!plan) {
+        return "";
+    }
+
+    const rows = [
+        [__("Gross Requirements"), plan.gross_requirements],
+        [__("Planned Receipts"), plan.planned_receipts],
+        [__("Planned Releases"), plan.planned_releases],
+    ];
+    const header = plan.bucket_end_dates
+        .map((date, idx) => `<th class="text-right">${idx === 0 ? __("Due Now") : frappe.datetime.str_to_user(date)}</th>`)
+        .join("");
+    const body = rows
+        .map(([label, values]) => `<tr><td>${label}</td>${values.map((value) => `<td class="text-right">${format_number(value)}</td>`).join("")}</tr>`)
+        .join("");
+
+    return `<h5>${__("Time-Phased Plan (by {0})", [__(plan.bucket_size)])}</h5>
+        <div style="overflow-x: auto"><table class="table table-bordered table-condensed small">
+            <thead><tr><th></th>${header}</tr></thead>
+            <tbody>${body}</tbody>
+        </table></div>`;
+}
+
 // Helper functions to enable/disable the MR Generation button
 function disable_mr_generation_button(frm) {
     if (frm.fields_dict.mr_genaration) {
@@ -255,6 +449,9 @@ function generate_mrp_order_recommendations(frm) {
             // Call the API to enqueue the calculation job
             frappe.call({
                 method: "prakash_steel.prakash_steel.doctype.mrp_genaration.mrp_genaration.generate_mrp_order_recommendations",
+                args: {
+                    run_type: frm.doc.run_type || "Net Change",
+                },
                 callback: function (r) {
                     if (r.message) {
                         if (r.message.error) {
@@ -266,8 +463,13 @@ function generate_mrp_order_recommendations(frm) {
                                 message: __("Error: {0}", [r.message.error]),
                                 indicator: "red",
                             });
+                        } else if (r.message.status === "completed" && r.message.result) {
+                            // Nothing changed since the last run: its results are shared
+                            frappe.hide_progress();
+                            frappe.show_alert({ message: r.message.message, indicator: "blue" }, 5);
+                            show_mrp_result(r.message.result, frm);
                         } else if (r.message.job_id) {
-                            // Job queued successfully, start polling
+                            // Job queued successfully (or joined a run over the same data), follow its progress
                             const jobId = r.message.job_id;
                             frappe.show_progress(
                                 __("Generating MRP Order Recommendations"),
@@ -277,11 +479,13 @@ function generate_mrp_order_recommendations(frm) {
 
                             // Show initial notification
                             frappe.show_alert({
-                                message: __("MRP calculation job has been queued. Processing in background..."),
+                                message: r.message.attached
+                                    ? r.message.message
+                                    : __("MRP calculation job has been queued. Processing in background..."),
                                 indicator: "blue",
                             }, 5);
 
-                            poll_mrp_job_status(jobId, frm);
+                            follow_mrp_job(jobId, frm);
                         } else {
                             frappe.hide_progress();
                             // Re-enable button on error
@@ -309,72 +513,79 @@ function generate_mrp_order_recommendations(frm) {
     );
 }
 
-function poll_mrp_job_status(jobId, frm) {
-    // Poll for job status every 2 seconds
-    const pollInterval = setInterval(function () {
-        frappe.call({
-            method: "prakash_steel.prakash_steel.doctype.mrp_genaration.mrp_genaration.get_mrp_job_status",
-            args: {
-                job_id: jobId,
-            },
-            callback: function (r) {
-                if (r.message) {
-                    const status = r.message.status;
-
-                    if (status === "completed") {
-                        clearInterval(pollInterval);
-                        frappe.hide_progress();
-
-                        // Get the result
-                        get_mrp_job_result(jobId, frm);
-                    } else if (status === "failed") {
-                        clearInterval(pollInterval);
-                        frappe.hide_progress();
-                        frappe.msgprint({
-                            title: __("Job Failed"),
-                            message: __("Error: {0}", [r.message.error || "Unknown error"]),
-                            indicator: "red",
-                        });
-                    } else if (status === "running") {
-                        // Update progress message with job ID
-                        const progressMsg = __("Processing... (Job ID: {0})", [jobId]);
-                        frappe.show_progress(__("Generating MRP Order Recommendations"), 0, progressMsg);
-                    } else if (status === "queued") {
-                        // Update progress message with job ID
-                        const progressMsg = __("Queued. Waiting to start... (Job ID: {0})", [jobId]);
-                        frappe.show_progress(__("Generating MRP Order Recommendations"), 0, progressMsg);
-                    } else {
-                        // Unknown status
-                        frappe.show_progress(__("Generating MRP Order Recommendations"), 0, __("Status: {0}", [status]));
-                    }
+// Job progress is pushed over realtime to the users following the job. One status
+// call after subscribing covers a job that finished before the subscription existed.
+function follow_job(event, jobId, timeout_ms, handlers) {
+    let timer = null;
+    const stop = function () {
+        frappe.realtime.off(event, listener);
+        clearTimeout(timer);
+    };
+    const listener = function (data) {
+        if (!data || data.job_id !== jobId) {
+            return;
+        }
+        if (data.status === "completed" || data.status === "failed") {
+            stop();
+        }
+        handlers.on_update(data);
+    };
+
+    frappe.realtime.on(event, listener);
+    timer = setTimeout(function () {
+        stop();
+        handlers.on_timeout();
+    }, timeout_ms);
+
+    frappe.call({
+        method: "prakash_steel.prakash_steel.doctype.mrp_genaration.mrp_genaration.get_mrp_job_status",
+        args: { job_id: jobId },
+        callback: function (r) {
+            if (r.message && (r.message.status === "completed" || r.message.status === "failed")) {
+                stop();
+                handlers.on_update({ job_id: jobId, ...r.message });
+            }
+        },
+    });
+}
+
+function follow_mrp_job(jobId, frm) {
+    follow_job("prakash_steel_mrp_progress", jobId, 3600000, {
+        on_update: function (data) {
+            if (data.status === "completed") {
+                frappe.hide_progress();
+                if (data.result) {
+                    show_mrp_result(data.result, frm);
+                } else {
+                    get_mrp_job_result(jobId, frm);
                 }
-            },
-            error: function (r) {
-                clearInterval(pollInterval);
+            } else if (data.status === "failed") {
                 frappe.hide_progress();
-                // Re-enable button on error
                 enable_mr_generation_button(frm);
                 frappe.msgprint({
-                    title: __("Error"),
-                    message: __("An error occurred while checking job status."),
+                    title: __("Job Failed"),
+                    message: __("Error: {0}", [data.error || "Unknown error"]),
                     indicator: "red",
                 });
-            },
-        });
-    }, 2000); // Poll every 2 seconds
-
-    // Set a maximum timeout (e.g., 1 hour)
-    setTimeout(function () {
-        clearInterval(pollInterval);
-        frappe.hide_progress();
-        // Re-enable button on timeout
-        enable_mr_generation_button(frm);
-        frappe.msgprint({
-            title: __("Timeout"),
-            message: __("Job is taking longer than expected. Please check the job status manually."),
-            indicator: "orange",
-        });
-    }, 3600000); // 1 hour timeout
+            } else {
+                frappe.show_progress(
+                    __("Generating MRP Order Recommendations"),
+                    Math.max(1, data.percent || 0),
+                    __("{0}... (Job ID: {1})", [data.message || __("Processing"), jobId])
+                );
+            }
+        },
+        on_timeout: function () {
+            frappe.hide_progress();
+            // Re-enable button on timeout
+            enable_mr_generation_button(frm);
+            frappe.msgprint({
+                title: __("Timeout"),
+                message: __("Job is taking longer than expected. Please check the job status manually."),
+                indicator: "orange",
+            });
+        },
+    });
 }
 
 function get_mrp_job_result(jobId, frm) {
@@ -385,131 +596,7 @@ function get_mrp_job_result(jobId, frm) {
         },
         callback: function (r) {
             if (r.message) {
-                if (r.message.error) {
-                    // Re-enable button on error
-                    enable_mr_generation_button(frm);
-                    frappe.msgprint({
-                        title: __("Error"),
-                        message: __("Error: {0}", [r.message.error]),
-                        indicator: "red",
-                    });
-                } else {
-                    // Show success message for calculation
-                    const net_order_recs = r.message.net_order_recommendations || {};
-                    const items_with_rec = Object.keys(net_order_recs).filter(
-                        item => net_order_recs[item] > 0
-                    ).length;
-
-                    // Log to browser console as well - show net order recommendations
-                    console.log("MRP Net Order Recommendations:", r.message.net_order_recommendations);
-                    console.log("MRP Base Order Recommendations:", r.message.order_recommendations);
-
-                    // Log detailed breakdown for each item
-                    if (r.message.detailed_info) {
-                        console.log("\n" + "=".repeat(100));
-                        console.log("MRP DETAILED BREAKDOWN FOR ALL ITEMS");
-                        console.log("=".repeat(100));
-
-                        // Sort items by net_order_rec (descending)
-                        const detailedInfo = r.message.detailed_info;
-                        const sortedItems = Object.keys(detailedInfo).sort((a, b) => {
-                            const netRecA = detailedInfo[a].net_order_rec || 0;
-                            const netRecB = detailedInfo[b].net_order_rec || 0;
-                            if (netRecB !== netRecA) {
-                                return netRecB - netRecA;
-                            }
-                            return a.localeCompare(b);
-                        });
-
-                        // Show summary first
-                        console.log("\n" + "-".repeat(100));
-                        console.log("SUMMARY (Items with Net Order Recommendation > 0)");
-                        console.log("-".repeat(100));
-                        const itemsWithRec = sortedItems.filter(item => {
-                            const netRec = detailedInfo[item].net_order_rec || 0;
-                            return netRec > 0;
-                        });
-
-                        itemsWithRec.forEach(itemCode => {
-                            const info = detailedInfo[itemCode];
-                            const netRec = info.net_order_rec || 0;
-                            const finalRec = info.final_order_rec || 0;
-                            const bufferFlag = info.buffer_flag || "Unknown";
-                            console.log(`  ${itemCode} (${bufferFlag}): Net Order Rec = ${netRec} (Base: ${finalRec})`);
-                        });
-
-                        // Show detailed breakdown for all items
-                        console.log("\n" + "=".repeat(100));
-                        console.log("DETAILED BREAKDOWN FOR ALL ITEMS");
-                        console.log("=".repeat(100));
-
-                        sortedItems.forEach(itemCode => {
-                            const info = detailedInfo[itemCode];
-                            const breakdown = info.calculation_breakdown || "";
-
-                            if (breakdown && breakdown.trim()) {
-                                console.log(breakdown);
-                            } else {
-                                // Create a basic breakdown if not available
-                                const netRec = info.net_order_rec || 0;
-                                const finalRec = info.final_order_rec || 0;
-                                const bufferFlag = info.buffer_flag || "Unknown";
-                                const moq = info.moq || 0;
-                                const batchSize = info.batch_size || 0;
-
-                                console.log(`\n  Item: ${itemCode}`);
-                                console.log(`  Type: ${bufferFlag}`);
-                                console.log(`  Base Order Recommendation: ${finalRec}`);
-                                console.log(`  Net Order Recommendation: ${netRec}`);
-                                if (moq > 0) {
-                                    console.log(`  MOQ: ${moq}`);
-                                }
-                                if (batchSize > 0) {
-                                    console.log(`  Batch Size: ${batchSize}`);
-                                }
-                                console.log(`  Note: Detailed breakdown not available`);
-                            }
-                            console.log("-".repeat(100));
-                        });
-
-                        console.log("\n" + "=".repeat(100));
-                        console.log(`Total Items: ${sortedItems.length}`);
-                        console.log(`Items with Net Order Rec > 0: ${itemsWithRec.length}`);
-                        console.log("=".repeat(100));
-                    }
-
-                    // Check if there are any items with net order recommendations > 0
-                    if (items_with_rec === 0) {
-                        // No items need Material Requests
-                        // Re-enable button
-                        enable_mr_generation_button(frm);
-                        frappe.msgprint({
-                            title: __("No Material Requests Needed"),
-                            message: __(
-                                "MRP calculation completed successfully!<br><br>" +
-                                "<b>No items require Material Requests at this time.</b><br><br>" +
-                                "All items have sufficient stock, WIP, Open PO, or Material Requests to cover their requirements.<br><br>" +
-                                "Check server logs and console for detailed breakdown."
-                            ),
-                            indicator: "blue",
-                        });
-                    } else {
-                        // Show success message and proceed with Material Request creation
-                        frappe.msgprint({
-                            title: __("Order Recommendations Calculated"),
-                            message: __(
-                                "Order recommendations calculated successfully!<br><br>" +
-                                "Items with net order recommendations > 0: <b>{0}</b><br><br>" +
-                                "Creating Material Requests now...",
-                                [items_with_rec]
-                            ),
-                            indicator: "green",
-                        });
-
-                        // Now automatically create Material Requests
-                        create_material_requests_automatically(frm, r.message.net_order_recommendations);
-                    }
-                }
+                show_mrp_result(r.message, frm);
             }
         },
         error: function (r) {
@@ -524,27 +611,63 @@ function get_mrp_job_result(jobId, frm) {
     });
 }
 
-function create_material_requests_automatically(frm, net_order_recommendations) {
-	if (!net_order_recommendations) {
-		// Re-enable button if no recommendations
-		enable_mr_generation_button(frm);
-		frappe.msgprint({
-			title: __("Error"),
-			message: __("No order recommendations available to create Material Requests."),
-			indicator: "red",
-		});
-		return;
-	}
+function show_mrp_result(result, frm) {
+    if (result.error) {
+        // Re-enable button on error
+        enable_mr_generation_button(frm);
+        frappe.msgprint({
+            title: __("Error"),
+            message: __("Error: {0}", [result.error]),
+            indicator: "red",
+        });
+    } else {
+        // Show success message for calculation
+        const items_with_rec = result.recommendation_count || 0;
+
+        // The per-item results are read page by page from the server
+        render_mrp_results(frm);
+
+        // Check if there are any items with net order recommendations > 0
+        if (items_with_rec === 0) {
+            // No items need Material Requests
+            // Re-enable button
+            enable_mr_generation_button(frm);
+            frappe.msgprint({
+                title: __("No Material Requests Needed"),
+                message: __(
+                    "MRP calculation completed successfully!<br><br>" +
+                    "<b>No items require Material Requests at this time.</b><br><br>" +
+                    "All items have sufficient stock, WIP, Open PO, or Material Requests to cover their requirements.<br><br>" +
+                    "Click an item in the results for its detailed breakdown."
+                ),
+                indicator: "blue",
+            });
+        } else {
+            // Show success message and proceed with Material Request creation
+            frappe.msgprint({
+                title: __("Order Recommendations Calculated"),
+                message: __(
+                    "Order recommendations calculated successfully!<br><br>" +
+                    "Items with net order recommendations > 0: <b>{0}</b><br><br>" +
+                    "Creating Material Requests now...",
+                    [items_with_rec]
+                ),
+                indicator: "green",
+            });
+
+            // Now automatically create Material Requests from the stored MRP results
+            create_material_requests_automatically(frm);
+        }
+    }
+}
 
+function create_material_requests_automatically(frm) {
 	// Show progress
 	frappe.show_progress(__("Creating Material Requests"), 0, __("Queuing job..."));
 
 	// Call the API to enqueue Material Request creation as background job
 	frappe.call({
 		method: "prakash_steel.prakash_steel.doctype.mrp_genaration.mrp_genaration.create_material_requests_automatically",
-		args: {
-			net_order_recommendations: net_order_recommendations,
-		},
 		callback: function (r) {
 			if (r.message) {
 				if (r.message.error) {
@@ -556,8 +679,17 @@ function create_material_requests_automatically(frm, net_order_recommendations)
 						message: __("Error: {0}", [r.message.error]),
 						indicator: "red",
 					});
+				} else if (r.message.already_created) {
+					// The latest MRP run has been ordered already
+					frappe.hide_progress();
+					enable_mr_generation_button(frm);
+					frappe.msgprint({
+						title: __("Material Requests"),
+						message: r.message.message,
+						indicator: "blue",
+					});
 				} else if (r.message.job_id) {
-					// Job queued successfully, start polling
+					// Job queued successfully, follow its progress
 					const jobId = r.message.job_id;
 					frappe.show_progress(
 						__("Creating Material Requests"), 
@@ -571,7 +703,7 @@ function create_material_requests_automatically(frm, net_order_recommendations)
 						indicator: "blue",
 					}, 5);
 
-					poll_mr_creation_job_status(jobId, frm);
+					follow_mr_creation_job(jobId, frm);
 				} else {
 					// Direct result (if not using background job)
 					frappe.hide_progress();
@@ -614,144 +746,44 @@ function create_material_requests_automatically(frm, net_order_recommendations)
 	});
 }
 
-function poll_mr_creation_job_status(jobId, frm) {
-    let pollCount = 0;
-
-    // Poll for job status every 2 seconds
-    const pollInterval = setInterval(function () {
-        pollCount++;
-
-        frappe.call({
-            method: "prakash_steel.prakash_steel.doctype.mrp_genaration.mrp_genaration.get_mrp_job_status",
-            args: {
-                job_id: jobId,
-            },
-            callback: function (r) {
-                if (r.message) {
-                    const status = r.message.status;
-
-                    if (status === "completed") {
-                        clearInterval(pollInterval);
-                        frappe.hide_progress();
-
-                        // Get the result - try from status response first, then fetch separately
-                        let result = r.message.result;
-
-                        // If result not in status response, fetch it separately
-                        if (!result) {
-                            frappe.call({
-                                method: "prakash_steel.prakash_steel.doctype.mrp_genaration.mrp_genaration.get_mrp_job_result",
-                                args: {
-                                    job_id: jobId,
-                                },
-                                callback: function (r2) {
-                                    if (r2.message && !r2.message.error) {
-                                        result = r2.message;
-                                        show_mr_creation_result(result, frm);
-                                    } else {
-                                        // Result not found, show generic success
-                                        // Re-enable button
-                                        enable_mr_generation_button(frm);
-                                        frappe.msgprint({
-                                            title: __("Success"),
-                                            message: __("Material Request creation job completed successfully. Check 'RQ Job' list for details."),
-                                            indicator: "green",
-                                        });
-                                    }
-                                },
-                            });
-                        } else {
-                            show_mr_creation_result(result, frm);
-                        }
-                    } else if (status === "failed") {
-                        clearInterval(pollInterval);
-                        frappe.hide_progress();
-                        frappe.msgprint({
-                            title: __("Job Failed"),
-                            message: __("Error: {0}", [r.message.error || "Unknown error"]),
-                            indicator: "red",
-                        });
-                    } else if (status === "running") {
-                        // Show progress bar immediately
-                        frappe.show_progress(__("Creating Material Requests"), 0, __("Processing..."));
-
-                        // Fetch progress details
-                        frappe.call({
-                            method: "prakash_steel.prakash_steel.doctype.mrp_genaration.mrp_genaration.get_mr_creation_progress",
-                            args: {
-                                job_id: jobId,
-                            },
-                            callback: function (progressR) {
-                                if (progressR.message && progressR.message.total > 0) {
-                                    const progress = progressR.message;
-                                    const percent = Math.max(0, Math.min(100, progress.percent || 0)); // Ensure 0-100
-                                    const current = progress.current || 0;
-                                    const total = progress.total || 0;
-                                    const currentItem = progress.current_item || "";
-                                    const successCount = progress.success_count || 0;
-                                    const errorCount = progress.error_count || 0;
-
-                                    // Show progress bar with item name (similar to deletion dialog)
-                                    let progressMsg = "";
-                                    if (currentItem) {
-                                        progressMsg = __("Creating Material Request for {0}", [currentItem]);
-                                    } else {
-                                        progressMsg = __("Processing...");
-                                    }
-
-                                    // Show progress with percentage - ensure percent is between 0 and 100
-                                    // Use at least 1% to ensure progress bar is visible (Frappe shows bar at 1%+)
-                                    const displayPercent = Math.max(1, percent);
-                                    frappe.show_progress(
-                                        __("Creating Material Requests"),
-                                        displayPercent,
-                                        progressMsg + ` (${current}/${total}) - Success: ${successCount}, Failed: ${errorCount}`
-                                    );
-                                } else {
-                                    // Fallback if progress not available yet
-                                    frappe.show_progress(__("Creating Material Requests"), 0, __("Processing... (Job ID: {0})", [jobId]));
-                                }
-                            },
-                        });
-                    } else if (status === "queued") {
-                        // Update progress message
-                        const progressMsg = __("Queued. Waiting to start... (Job ID: {0})", [jobId]);
-                        frappe.show_progress(__("Creating Material Requests"), 0, progressMsg);
-                    } else {
-                        // Unknown status, keep showing progress
-                        frappe.show_progress(__("Creating Material Requests"), 0, __("Status: {0}", [status]));
-                    }
-                } else {
-                    // No message, keep polling
-                    frappe.show_progress(__("Creating Material Requests"), 0, __("Checking status... ({0})", [pollCount]));
-                }
-            },
-            error: function (r) {
-                clearInterval(pollInterval);
+function follow_mr_creation_job(jobId, frm) {
+    follow_job("prakash_steel_mr_creation_progress", jobId, 1800000, {
+        on_update: function (data) {
+            if (data.status === "completed") {
+                frappe.hide_progress();
+                show_mr_creation_result(data.result, frm);
+            } else if (data.status === "failed") {
                 frappe.hide_progress();
-                // Re-enable button on error
                 enable_mr_generation_button(frm);
                 frappe.msgprint({
-                    title: __("Error"),
-                    message: __("An error occurred while checking job status: {0}", [r.message || "Unknown error"]),
+                    title: __("Job Failed"),
+                    message: __("Error: {0}", [data.error || "Unknown error"]),
                     indicator: "red",
                 });
-            },
-        });
-    }, 2000); // Poll every 2 seconds
-
-    // Set a maximum timeout (e.g., 30 minutes)
-    setTimeout(function () {
-        clearInterval(pollInterval);
-        frappe.hide_progress();
-        // Re-enable button on timeout
-        enable_mr_generation_button(frm);
-        frappe.msgprint({
-            title: __("Timeout"),
-            message: __("Job is taking longer than expected. Please check the 'RQ Job' list (Job ID: {0}) to see the current status.", [jobId]),
-            indicator: "orange",
-        });
-    }, 1800000); // 30 minutes timeout
+            } else {
+                const progressMsg = data.current_item
+                    ? __("Creating Material Request for {0}", [data.current_item])
+                    : __("Processing...");
+                // Frappe only draws the bar from 1%
+                frappe.show_progress(
+                    __("Creating Material Requests"),
+                    Math.max(1, Math.min(100, data.percent || 0)),
+                    progressMsg +
+                        ` (${data.current || 0}/${data.total || 0}) - Success: ${data.success_count || 0}, Failed: ${data.error_count || 0}`
+                );
+            }
+        },
+        on_timeout: function () {
+            frappe.hide_progress();
+            // Re-enable button on timeout
+            enable_mr_generation_button(frm);
+            frappe.msgprint({
+                title: __("Timeout"),
+                message: __("Job is taking longer than expected. Please check the 'RQ Job' list (Job ID: {0}) to see the current status.", [jobId]),
+                indicator: "orange",
+            });
+        },
+    });
 }
 
 function show_mr_creation_result(result, frm) {
@@ -2,66 +2,99 @@
 # For license information, please see license.txt
 
 import frappe
+import json
 import math
 from frappe.model.document import Document
-from frappe.utils import flt
-from prakash_steel.utils.lead_time import get_default_bom
+from frappe.utils import cint, flt, now_datetime
+from prakash_steel.utils import job_progress, mrp_plan, planning_kernel, time_phased
+from prakash_steel.utils.material_request import ONE_LINE_PER_BATCH, create_material_requests_in_bulk
 
 
-class MRPGenaration(Document):
-	pass
-
-
-def calculate_sku_type(buffer_flag, item_type):
-	"""Calculate SKU type based on buffer flag and item type
-	Same mapping logic as calculate_sku_type in item.js
-	buffer_flag: 'Buffer' or 'Non-Buffer'
-	item_type: 'FG', 'INT', 'RM'
-	"""
-	if not item_type:
-		return None
+# Where MRP raises its Material Requests
+MRP_MATERIAL_REQUEST_COMPANY = "RAMLAL DUGAR"
+MRP_MATERIAL_REQUEST_WAREHOUSE = "Finished Goods - RD"
+DEFAULT_MATERIAL_REQUEST_COMMIT_SIZE = 20
 
-	is_buffer = buffer_flag == "Buffer"
+# Phases reported as MRP progress
+MRP_PROGRESS_PHASES = (
+	"Loading planning inputs",
+	"Planning",
+	"Saving the plan",
+)
 
-	if item_type == "FG":
-		return "FGMTA" if is_buffer else "FGMTO"
-	elif item_type == "INT":
-		return "SFGMTA" if is_buffer else "SFGMTO"
-	elif item_type == "RAW":
-		return "PTA" if is_buffer else "PTO"
 
-	return None
+class MRPGenaration(Document):
+	pass
 
 
 @frappe.whitelist()
-def generate_mrp_order_recommendations():
+def generate_mrp_order_recommendations(run_type=None, debug=0):
 	"""
 	Enqueue MRP order recommendations calculation as a background job.
 	Returns job_id for status polling.
 
+	run_type is "Net Change" (default: re-plan only what changed since the stored plan)
+	or "Full"; net change falls back to a full run when one is due. A net-change request
+	without debug over data that has not changed since the last run returns that run, and
+	a request over the same data, run type and debug flag as a queued or running job
+	follows that job. debug writes the
+	breakdown of every item to the error log (as the site config flag
+	prakash_steel_mrp_debug does); otherwise a breakdown is rendered per item on demand
+	by get_mrp_item_breakdown.
+
 	The job will be visible in:
 	- RQ Job list (search "RQ Job" in Frappe)
 	- System Health Report
 	- Worker logs
 	"""
-	# Enqueue the worker function as a background job
-	job = frappe.enqueue(
-		"prakash_steel.prakash_steel.doctype.mrp_genaration.mrp_genaration._generate_mrp_order_recommendations_worker",
-		queue="long",
-		timeout=3600,  # 1 hour timeout
+	run_type = run_type or mrp_plan.RUN_TYPE_NET_CHANGE
+	if run_type not in mrp_plan.RUN_TYPES:
+		return {"error": f"Invalid run type '{run_type}'. Use one of: {', '.join(mrp_plan.RUN_TYPES)}"}
+
+	data_fingerprint = mrp_plan.get_data_fingerprint()
+
+	# Planners share runs: while the data is unchanged the stored plan is the answer, and
+	# a run already queued or running over the same data is joined instead of repeated.
+	# An explicit full run, or a debug run that has to write its log, is always planned.
+	if run_type == mrp_plan.RUN_TYPE_NET_CHANGE and not cint(debug):
+		shared_run = mrp_plan.get_shared_run(data_fingerprint)
+		if shared_run:
+			return {
+				"status": "completed",
+				"mrp_run": shared_run.name,
+				"result": {
+					"mrp_run": shared_run.name,
+					"run_type": shared_run.run_type,
+					"item_count": shared_run.item_count,
+					"recommendation_count": shared_run.recommendation_count,
+					"status": "completed",
+				},
+				"message": f"Nothing changed since MRP run {shared_run.name} ({shared_run.completed_on}); showing its results.",
+			}
+
+	job_id, attached = mrp_plan.enqueue_mrp_run(
+		run_type,
+		data_fingerprint,
 		job_name=f"MRP Generation - {frappe.session.user}",
-		is_async=True,
-		now=False,  # Ensure it's queued, not executed immediately
+		debug=cint(debug),
 	)
 
-	job_id = job.id if hasattr(job, "id") else str(job)
-
 	# Store job_id in cache for later retrieval
 	frappe.cache().set_value(f"mrp_job_id_{frappe.session.user}", job_id, expires_in_sec=3600)
+	job_progress.add_job_follower(job_id)
+
+	if attached:
+		return {
+			"job_id": job_id,
+			"status": "queued",
+			"attached": True,
+			"message": f"An MRP run over the same data is already in progress (Job ID: {job_id}); following it.",
+		}
 
 	# Log job creation
-	print(f"[MRP] Job queued with ID: {job_id}, Name: MRP Generation - {frappe.session.user}")
-	frappe.log_error(f"MRP Generation job queued: {job_id}", "MRP Generation Job")
+	frappe.logger("prakash_steel").info(
+		f"[MRP] Job queued with ID: {job_id}, Name: MRP Generation - {frappe.session.user}"
+	)
 
 	return {
 		"job_id": job_id,
@@ -70,7 +103,30 @@ def generate_mrp_order_recommendations():
 	}
 
 
-def _generate_mrp_order_recommendations_worker():
+def _generate_mrp_order_recommendations_worker(run_type=mrp_plan.RUN_TYPE_FULL, debug=0):
+	"""
+	Background job: run MRP and record the run as an MRP Run.
+
+	A failed run rolls back whatever it had written and is recorded with its traceback.
+	Progress and the outcome are pushed to the users following the job.
+	"""
+	started_on = now_datetime()
+	job = frappe.get_job()
+	progress = job_progress.JobProgress(job_progress.MRP_PROGRESS_EVENT, job.id if job else None)
+	try:
+		result = _calculate_mrp_order_recommendations(run_type, started_on, debug, progress)
+	except Exception as e:
+		frappe.db.rollback()
+		mrp_plan.save_mrp_run(run_type, "Failed", started_on, error=frappe.get_traceback())
+		frappe.db.commit()
+		progress.finish(error=str(e))
+		raise
+
+	progress.finish(result)
+	return result
+
+
+def _calculate_mrp_order_recommendations(run_type, started_on, debug=0, progress=None):
 	"""
 	Worker function that performs the actual MRP calculation.
 	This runs as a background job to prevent UI blocking.
@@ -82,6 +138,9 @@ def _generate_mrp_order_recommendations_worker():
 	- When traversing BOM:
 	  - For buffer child items: Don't add parent demand, only use TOG-based calculation
 	  - For non-buffer child items: Add parent demand to requirement
+
+	A "Net Change" run re-plans only the items whose inputs or BOM changed since the
+	stored plan (see prakash_steel.utils.mrp_plan) and reuses the rest.
 	"""
 	# Log job start
 	job_id = None
@@ -95,371 +154,123 @@ def _generate_mrp_order_recommendations_worker():
 	if not job_id:
 		job_id = frappe.cache().get_value(f"mrp_job_id_{frappe.session.user}")
 
-	start_msg = f"[MRP Job {job_id or 'Unknown'}] Starting MRP calculation..."
-	print(start_msg)
-	frappe.log_error(start_msg, "MRP Generation Job")
-
-	# Get all items (buffer and non-buffer)
-	all_items = frappe.db.sql(
-		"""
-		SELECT 
-			name as item_code,
-			custom_buffer_flag,
-			custom_item_type,
-			safety_stock as tog,
-			min_order_qty as moq,
-			custom_batch_size as batch_size
-		FROM `tabItem`
-		WHERE disabled = 0
-		""",
-		as_dict=True,
-	)
-
-	# Create maps for quick lookup
-	item_buffer_map = {}  # item_code -> 'Buffer' or 'Non-Buffer'
-	item_tog_map = {}  # item_code -> TOG value
-	item_type_map = {}  # item_code -> item_type
-	item_sku_type_map = {}  # item_code -> SKU type
-	item_moq_map = {}  # item_code -> MOQ value
-	item_batch_size_map = {}  # item_code -> Batch Size value
-
-	for item in all_items:
-		item_code = item.item_code
-		buffer_flag = item.custom_buffer_flag or "Non-Buffer"
-		item_type = item.custom_item_type
-		item_buffer_map[item_code] = buffer_flag
-		item_tog_map[item_code] = flt(item.tog or 0)
-		item_type_map[item_code] = item_type
-		item_sku_type_map[item_code] = calculate_sku_type(buffer_flag, item_type)
-		item_moq_map[item_code] = flt(item.moq or 0)
-		item_batch_size_map[item_code] = flt(item.batch_size or 0)
-
-	# Get stock map for all items
-	all_item_codes = set(item_buffer_map.keys())
-	stock_map = get_stock_map_for_mrp(all_item_codes)
-
-	# Get WIP map for all items
-	wip_map = get_wip_map_for_mrp()
+	frappe.logger("prakash_steel").info(f"[MRP Job {job_id or 'Unknown'}] Starting MRP calculation...")
 
-	# Get Open SO map for all items (for non-buffer items)
-	open_so_map = get_open_so_map_for_mrp()
+	# Taken before reading anything, so changes made during the run make it stale
+	data_fingerprint = mrp_plan.get_data_fingerprint()
 
-	# Get Qualified Demand map (Open SO with delivery_date <= today) - for buffer items
-	qualified_demand_map = get_qualified_demand_map_for_mrp()
+	def report_phase(phase):
+		if progress:
+			phase_idx = MRP_PROGRESS_PHASES.index(phase)
+			progress.update(phase_idx, len(MRP_PROGRESS_PHASES), phase)
 
-	# Get Open PO map (Purchase Order quantity - received quantity) - for BOTA/PTA buffer items
-	open_po_map = get_open_po_map_for_mrp()
+	report_phase("Loading planning inputs")
 
-	# Get MRQ map (Material Request Quantity - sum of qty from Material Request Items with status 'Pending')
-	mrq_map = get_mrq_map_for_mrp()
+	# Same snapshot and kernel as the PO Recomendation for PSP report: every enabled item
+	# (buffer and non-buffer) plus the BOM components reached from them, parents before children
+	planning_inputs = planning_kernel.PlanningInputs()
+	kernel = planning_inputs.kernel
+	bom_graph = kernel.bom_graph
+	item_order = kernel.item_order
+	all_item_codes = set(kernel.item_buffer_map)
 
-	# Initialize parent demand map (for non-buffer items)
-	# This will accumulate parent demands from all BOMs
-	parent_demand_map = {}  # item_code -> total parent demand from all BOMs
+	item_buffer_map = kernel.item_buffer_map
+	item_sku_type_map = kernel.item_sku_type_map
+	stock_map = kernel.stock_map
+	wip_map = kernel.wip_map
+	# Qualified demand (Open SO with delivery_date <= today) is also the Open SO non-buffer
+	# items net against
+	open_so_map = kernel.demand_map
+	qualified_demand_map = kernel.qualified_demand_map
+	open_po_map = kernel.open_po_map
+	mrq_map = kernel.mrq_map
 
-	# Detailed tracking for logging
-	detailed_info = {}  # item_code -> detailed information dict
+	report_phase("Planning")
 
 	# Step 1: Calculate initial order recommendations for all items
 	# Buffer: TOG - Stock - WIP
 	# Non-buffer: Open SO - Stock - WIP
-	initial_order_recommendations = {}
-
-	# Initialize detailed info for all items
-	for item_code in all_item_codes:
-		buffer_flag = item_buffer_map.get(item_code, "Non-Buffer")
-		is_buffer = buffer_flag == "Buffer"
-		stock = flt(stock_map.get(item_code, 0))
-		wip = flt(wip_map.get(item_code, 0))
-		open_so = flt(open_so_map.get(item_code, 0))
-		tog = flt(item_tog_map.get(item_code, 0))
-		qualified_demand = flt(qualified_demand_map.get(item_code, 0))
-		open_po = flt(open_po_map.get(item_code, 0))
-		mrq = flt(mrq_map.get(item_code, 0))
-		item_type = item_type_map.get(item_code)
-		sku_type = item_sku_type_map.get(item_code)
-
-		detailed_info[item_code] = {
-			"item_code": item_code,
-			"buffer_flag": buffer_flag,
-			"is_buffer": is_buffer,
-			"item_type": item_type,
-			"sku_type": sku_type,
-			"tog": tog,
-			"qualified_demand": qualified_demand,
-			"open_so": open_so,
-			"stock": stock,
-			"wip": wip,
-			"open_po": open_po,
-			"mrq": mrq,
-			"parent_demands": [],  # List of {parent_item, bom_name, demand_qty}
-			"total_parent_demand": 0,
-			"initial_order_rec": 0,
-			"final_order_rec": 0,
-			"calculation_breakdown": "",
+	initial_order_recommendations = kernel.initial_order_recommendations()
+
+	# Step 2: Compare today's inputs with the stored plan. A net-change run only plans
+	# the items whose inputs or BOM changed (and what their changes flow into); a full
+	# run, or a net-change run that is due for a full regeneration, plans every item.
+	plan_rows = {}
+	for item_code in item_order:
+		plan_rows[item_code] = {
+			"buffer_flag": item_buffer_map.get(item_code, "Non-Buffer"),
+			"item_type": planning_inputs.items[item_code].item_type if item_code in all_item_codes else None,
+			"sku_type": item_sku_type_map.get(item_code),
+			"bom_no": bom_graph.get_bom(item_code),
+			"bom_lines": mrp_plan.get_bom_lines(bom_graph, item_code),
+			"tog": flt(kernel.item_tog_map.get(item_code, 0)),
+			"qualified_demand": flt(qualified_demand_map.get(item_code, 0)),
+			"open_so": flt(open_so_map.get(item_code, 0)),
+			"stock": flt(stock_map.get(item_code, 0)),
+			"wip": flt(wip_map.get(item_code, 0)),
+			"open_po": flt(open_po_map.get(item_code, 0)),
+			"mrq": flt(mrq_map.get(item_code, 0)),
+			"moq": flt(kernel.moq_map.get(item_code, 0)),
+			"batch_size": flt(kernel.batch_size_map.get(item_code, 0)),
 		}
 
-		order_rec = calculate_initial_order_recommendation(
-			item_code,
-			item_buffer_map,
-			item_tog_map,
-			item_sku_type_map,
-			stock_map,
-			wip_map,
-			open_so_map,
-			qualified_demand_map,
-			open_po_map,
-		)
-		initial_order_recommendations[item_code] = order_rec
-		detailed_info[item_code]["initial_order_rec"] = order_rec
-
-	# Step 1.5: Apply MOQ/Batch Size to initial order recommendations for parent items
-	# This ensures parent items use net order recommendations when traversing BOMs
-	initial_net_order_recommendations = {}
-	for item_code in all_item_codes:
-		base_order_rec = initial_order_recommendations.get(item_code, 0)
-		moq = flt(item_moq_map.get(item_code, 0))
-		batch_size = flt(item_batch_size_map.get(item_code, 0))
-		net_order_rec = calculate_net_order_recommendation(base_order_rec, moq, batch_size)
-		initial_net_order_recommendations[item_code] = net_order_rec
-
-	# Step 2: Traverse BOMs starting from items with net order recommendations > 0
-	# We need to process all items that have initial net order recommendations
-	# Get all items with net order recommendations > 0, sorted for consistent processing
-	items_to_process = [
-		(item_code, net_order_rec)
-		for item_code, net_order_rec in initial_net_order_recommendations.items()
-		if net_order_rec > 0
-	]
-	items_to_process.sort(key=lambda x: x[0])  # Sort by item_code
-
-	# Process each item with net order recommendation > 0
-	# Each traversal uses its own visited_items set to prevent circular references
-	# But parent_demand_map accumulates demands from all traversals
-	for item_code, net_order_rec in items_to_process:
-		traverse_bom_for_mrp(
-			item_code,
-			net_order_rec,  # Use net order recommendation (after MOQ/Batch Size)
-			item_buffer_map,
-			item_tog_map,
-			item_type_map,
-			item_sku_type_map,
-			stock_map,
-			wip_map,
-			open_so_map,
-			qualified_demand_map,
-			open_po_map,
-			mrq_map,
-			parent_demand_map,
-			detailed_info,
-			set(),  # visited_items for this traversal (prevents circular references)
-			level=0,
-		)
-
-	# Step 3: Calculate final order recommendations for all items
-	# Now parent_demand_map has accumulated all parent demands
-	final_order_recommendations = {}
-
-	for item_code in all_item_codes:
-		# Update total_parent_demand in detailed_info
-		if item_code in detailed_info:
-			detailed_info[item_code]["total_parent_demand"] = flt(parent_demand_map.get(item_code, 0))
-
-		# Calculate base order recommendation (with MRQ already subtracted)
-		order_rec = calculate_final_order_recommendation(
-			item_code,
-			item_buffer_map,
-			item_tog_map,
-			item_sku_type_map,
-			stock_map,
-			wip_map,
-			open_so_map,
-			qualified_demand_map,
-			open_po_map,
-			mrq_map,
-			parent_demand_map,
+	full_regeneration_reason = mrp_plan.get_full_regeneration_reason(run_type)
+	if full_regeneration_reason:
+		run_type = mrp_plan.RUN_TYPE_FULL
+		previous_plan = {}
+		changed_items = set(item_order)
+	else:
+		previous_plan = mrp_plan.get_previous_plan()
+		changed_items = mrp_plan.get_changed_items(plan_rows, previous_plan)
+
+	# Step 3: Explode net order recommendations (after MOQ/Batch Size) through the BOMs in
+	# low-level-code order, so every item is planned once with its complete parent demand,
+	# then work out the final and net order recommendations with those parent demands.
+	# BOM families that share no item are propagated in parallel processes.
+	planned = kernel.plan(changed_items, previous_plan, processes=mrp_plan.get_planning_processes())
+	final_order_recommendations_updated = planned.final_order_rec
+	net_order_recommendations_final = planned.net_order_rec
+
+	for item_code, plan_row in plan_rows.items():
+		plan_row.update(
+			{
+				"parent_demand": flt(planned.parent_demand.get(item_code, 0)),
+				"initial_order_rec": initial_order_recommendations[item_code],
+				"final_order_rec": final_order_recommendations_updated[item_code],
+				"net_order_rec": net_order_recommendations_final[item_code],
+			}
 		)
 
-		final_order_recommendations[item_code] = order_rec
-
-	# Step 4: Apply MOQ/Batch Size to get net order recommendations
-	net_order_recommendations = {}  # item_code -> net order recommendation (after MOQ/Batch Size)
-
-	for item_code in all_item_codes:
-		base_order_rec = final_order_recommendations.get(item_code, 0)
-		moq = flt(item_moq_map.get(item_code, 0))
-		batch_size = flt(item_batch_size_map.get(item_code, 0))
-		net_order_rec = calculate_net_order_recommendation(base_order_rec, moq, batch_size)
-		net_order_recommendations[item_code] = net_order_rec
-
-	# Step 5: Re-traverse BOMs using net_order_recommendations to update child requirements
-	# This ensures children get the adjusted values (after MOQ/Batch Size) from their parents
-	# Clear parent_demand_map and recalculate with net_order_recommendations
-	parent_demand_map_net = {}  # New parent demand map using net order recommendations
-
-	# Clear parent_demands from detailed_info to avoid duplicates from first traversal
-	# We'll rebuild them in the second traversal
-	for item_code in all_item_codes:
-		if item_code in detailed_info:
-			detailed_info[item_code]["parent_demands"] = []
-			detailed_info[item_code]["total_parent_demand"] = 0
-
-	# Get items with net_order_recommendation > 0
-	# Only get items that are NOT children of other items (root items only)
-	# We'll traverse from root items, and children will be handled recursively
-	items_with_net_rec = [
-		(item_code, net_rec) for item_code, net_rec in net_order_recommendations.items() if net_rec > 0
-	]
-	items_with_net_rec.sort(key=lambda x: x[0])  # Sort by item_code
-
-	# Use a single shared visited_items set for the entire Step 5 traversal
-	# This prevents the same item from being traversed multiple times
-	global_visited_items = set()
-
-	# Re-traverse BOMs using net_order_recommendations
-	# Only traverse items that haven't been visited yet (to avoid duplicates)
-	for item_code, net_rec in items_with_net_rec:
-		if item_code not in global_visited_items:
-			traverse_bom_for_mrp_with_net_rec(
-				item_code,
-				net_rec,
-				item_buffer_map,
-				item_tog_map,
-				item_type_map,
-				item_sku_type_map,
-				item_moq_map,
-				item_batch_size_map,
-				stock_map,
-				wip_map,
-				open_so_map,
-				qualified_demand_map,
-				open_po_map,
-				mrq_map,
-				parent_demand_map_net,
-				detailed_info,
-				global_visited_items,  # Use shared visited_items set
-				level=0,
-			)
-
-	# Step 6: Recalculate final order recommendations with updated parent demands
-	# Then apply MOQ/Batch Size again to get final net_order_recommendations
-	final_order_recommendations_updated = {}
-	net_order_recommendations_final = {}
-
-	for item_code in all_item_codes:
-		# Recalculate with updated parent demands
-		order_rec = calculate_final_order_recommendation(
-			item_code,
-			item_buffer_map,
-			item_tog_map,
-			item_sku_type_map,
-			stock_map,
-			wip_map,
-			open_so_map,
-			qualified_demand_map,
-			open_po_map,
-			mrq_map,
-			parent_demand_map_net,  # Use updated parent demands
+	# Time-phased mode: the same items netted per day or week bucket over the horizon
+	buckets = time_phased.get_settings_buckets()
+	if buckets:
+		planner = time_phased.TimePhasedPlanner.load(kernel, buckets, planning_inputs)
+		time_phased_result = planner.plan()
+		for item_code, plan_row in plan_rows.items():
+			item_plan = planner.get_item_plan(time_phased_result, item_code)
+			plan_row["time_phased_plan"] = json.dumps(item_plan) if item_plan else None
+
+	# The human-readable breakdown is rendered per item when a planner opens it (see
+	# get_mrp_item_breakdown); the log of every item is only written in debug mode
+	if mrp_plan.is_debug_enabled(debug):
+		net_order_recommendations = {
+			item_code: net_order_recommendations_final[item_code] for item_code in sorted(all_item_codes)
+		}
+		parent_demands = get_parent_demands(
+			bom_graph, item_order, net_order_recommendations_final, item_buffer_map
 		)
-		final_order_recommendations_updated[item_code] = order_rec
-
-		# Apply MOQ/Batch Size again
-		moq = flt(item_moq_map.get(item_code, 0))
-		batch_size = flt(item_batch_size_map.get(item_code, 0))
-		net_order_rec = calculate_net_order_recommendation(order_rec, moq, batch_size)
-		net_order_recommendations_final[item_code] = net_order_rec
-
-		# Update detailed_info
-		if item_code in detailed_info:
-			detailed_info[item_code]["final_order_rec"] = order_rec
-			detailed_info[item_code]["net_order_rec"] = net_order_rec
-
-		# Ensure detailed_info exists for this item
-		if item_code not in detailed_info:
-			buffer_flag = item_buffer_map.get(item_code, "Non-Buffer")
-			detailed_info[item_code] = {
-				"item_code": item_code,
-				"buffer_flag": buffer_flag,
-				"is_buffer": buffer_flag == "Buffer",
-				"item_type": item_type_map.get(item_code),
-				"sku_type": item_sku_type_map.get(item_code),
-				"tog": flt(item_tog_map.get(item_code, 0)),
-				"qualified_demand": flt(qualified_demand_map.get(item_code, 0)),
-				"open_so": flt(open_so_map.get(item_code, 0)),
-				"stock": flt(stock_map.get(item_code, 0)),
-				"wip": flt(wip_map.get(item_code, 0)),
-				"open_po": flt(open_po_map.get(item_code, 0)),
-				"mrq": flt(mrq_map.get(item_code, 0)),
-				"moq": moq,
-				"batch_size": batch_size,
-				"parent_demands": [],
-				"total_parent_demand": flt(parent_demand_map_net.get(item_code, 0)),
-				"initial_order_rec": initial_order_recommendations.get(item_code, 0),
-				"final_order_rec": order_rec,
-				"net_order_rec": net_order_rec,
-				"calculation_breakdown": "",
-			}
-
-		# Update detailed_info with final values
-		if item_code in detailed_info:
-			detailed_info[item_code]["final_order_rec"] = order_rec
-			detailed_info[item_code]["net_order_rec"] = net_order_rec
-			moq = flt(item_moq_map.get(item_code, 0))
-			batch_size = flt(item_batch_size_map.get(item_code, 0))
-			detailed_info[item_code]["moq"] = moq
-			detailed_info[item_code]["batch_size"] = batch_size
-
-		# Build calculation breakdown for ALL items (even if net_order_rec is 0)
-		# Ensure item is in detailed_info (should always be true at this point)
-		if item_code not in detailed_info:
-			# This shouldn't happen, but create it if missing
-			buffer_flag = item_buffer_map.get(item_code, "Non-Buffer")
-			detailed_info[item_code] = {
-				"item_code": item_code,
-				"buffer_flag": buffer_flag,
-				"is_buffer": buffer_flag == "Buffer",
-				"item_type": item_type_map.get(item_code),
-				"sku_type": item_sku_type_map.get(item_code),
-				"tog": flt(item_tog_map.get(item_code, 0)),
-				"qualified_demand": flt(qualified_demand_map.get(item_code, 0)),
-				"open_so": flt(open_so_map.get(item_code, 0)),
-				"stock": flt(stock_map.get(item_code, 0)),
-				"wip": flt(wip_map.get(item_code, 0)),
-				"open_po": flt(open_po_map.get(item_code, 0)),
-				"mrq": flt(mrq_map.get(item_code, 0)),
-				"moq": moq,
-				"batch_size": batch_size,
-				"parent_demands": [],
-				"total_parent_demand": flt(parent_demand_map_net.get(item_code, 0)),
-				"initial_order_rec": initial_order_recommendations.get(item_code, 0),
-				"final_order_rec": order_rec,
-				"net_order_rec": net_order_rec,
-				"calculation_breakdown": "",
-			}
-			frappe.log_error(
-				f"Item {item_code} was missing from detailed_info in Step 6 - created it",
-				"MRP Generation Warning",
-			)
-
-		# Now build the breakdown for ALL items
-		info = detailed_info[item_code]
-		build_calculation_breakdown(info, parent_demand_map_net)  # Use updated parent demands
-
-		# Verify breakdown was created (for debugging)
-		if not info.get("calculation_breakdown") or not info["calculation_breakdown"].strip():
-			frappe.log_error(
-				f"Item {item_code} has empty calculation_breakdown after build_calculation_breakdown",
-				"MRP Generation Warning",
-			)
-
-	# Generate detailed log - ensure all items with net_order_rec > 0 are included
-	detailed_log = generate_detailed_log(detailed_info, net_order_recommendations_final)
+		detailed_info = {
+			item_code: get_detailed_info(item_code, plan_rows[item_code], parent_demands.get(item_code, []))
+			for item_code in net_order_recommendations
+		}
+		for info in detailed_info.values():
+			build_calculation_breakdown(info, {info["item_code"]: info["total_parent_demand"]})
 
-	# Log to console (will be visible in server logs)
-	frappe.log_error(detailed_log, "MRP Generation")
+		# Generate detailed log - ensure all items with net_order_rec > 0 are included
+		detailed_log = generate_detailed_log(detailed_info, net_order_recommendations)
 
-	# Also print to console for immediate visibility
-	print(detailed_log)
+		# Debug mode only, so the Error Log is not filled on every run
+		frappe.log_error(detailed_log, "MRP Generation")
 
 	# Get job_id for logging and caching
 	job_id = None
@@ -474,11 +285,47 @@ def _generate_mrp_order_recommendations_worker():
 		# Try to get from cache (stored when job was enqueued)
 		job_id = frappe.cache().get_value(f"mrp_job_id_{frappe.session.user}")
 
+	report_phase("Saving the plan")
+
+	# Persist the plan: every row after a full run, only the re-planned ones after a net change
+	items_with_rec = len(
+		[item_code for item_code in all_item_codes if net_order_recommendations_final[item_code] > 0]
+	)
+	mrp_run = mrp_plan.save_mrp_run(
+		run_type,
+		"Completed",
+		started_on,
+		based_on=None if full_regeneration_reason else mrp_plan.get_last_run(),
+		item_count=len(item_order),
+		changed_item_count=len(changed_items),
+		recomputed_item_count=len(planned.planned_items),
+		recommendation_count=items_with_rec,
+		full_regeneration_reason=full_regeneration_reason,
+		data_fingerprint=data_fingerprint,
+	)
+	if full_regeneration_reason:
+		mrp_plan.save_plan(mrp_run, plan_rows)
+	else:
+		mrp_plan.save_plan(
+			mrp_run,
+			plan_rows,
+			planned.planned_items,
+			removed_item_codes=set(previous_plan) - set(plan_rows),
+		)
+
+	# The per-item results live in MRP Plan Item (see get_mrp_results); the job result
+	# is only the run summary, so neither the cache nor the browser holds the whole plan
 	result = {
-		"order_recommendations": final_order_recommendations_updated,
-		"net_order_recommendations": net_order_recommendations_final,  # Final net order recommendations after MOQ/Batch Size
-		"detailed_info": detailed_info,
-		"message": "Order recommendations calculated. Check server logs and console for detailed breakdown. Net order recommendations are shown.",
+		"mrp_run": mrp_run,
+		"run_type": run_type,
+		# Same count as MRP Run.item_count, so a shared run reports what a fresh one did
+		"item_count": len(item_order),
+		"recommendation_count": items_with_rec,
+		"message": (
+			f"Order recommendations calculated ({run_type} run {mrp_run}: "
+			f"{len(planned.planned_items)} of {len(item_order)} items planned). "
+			"Open an item in the results for its detailed breakdown."
+		),
 		"status": "completed",
 	}
 
@@ -488,12 +335,10 @@ def _generate_mrp_order_recommendations_worker():
 		frappe.cache().set_value(cache_key, result, expires_in_sec=3600)  # Store for 1 hour
 
 	# Log job completion
-	items_with_rec = len([qty for qty in net_order_recommendations_final.values() if flt(qty) > 0])
 	completion_msg = (
 		f"[MRP Job {job_id or 'Unknown'}] Completed! Items with net order rec > 0: {items_with_rec}"
 	)
-	print(completion_msg)
-	frappe.log_error(completion_msg, "MRP Generation Job")
+	frappe.logger("prakash_steel").info(completion_msg)
 
 	return result
 
@@ -611,6 +456,30 @@ def get_mrp_job_result(job_id):
 		}
 
 
+@frappe.whitelist()
+def get_mrp_results(start=0, page_length=50, sort_by="net_order_rec", sort_order="desc", filters=None):
+	"""
+	One page of the latest MRP results (MRP Plan Item of enabled items).
+
+	Args:
+		start, page_length: page window (page_length is capped at 500)
+		sort_by, sort_order: any numeric plan column, item_code, buffer_flag or sku_type
+		filters: dict or JSON with item_code (substring), buffer_flag, sku_type, with_recommendation
+	"""
+	if not frappe.has_permission("MRP Plan Item", "read"):
+		return {"error": "Not permitted to read MRP results"}
+
+	if isinstance(filters, str):
+		try:
+			filters = json.loads(filters)
+		except (json.JSONDecodeError, ValueError):
+			return {"error": f"Invalid JSON format for filters: {filters}"}
+
+	results = mrp_plan.get_plan_items(start, page_length, sort_by, sort_order, filters)
+	results["mrp_run"] = mrp_plan.get_last_run()
+	return results
+
+
 @frappe.whitelist()
 def get_mr_creation_progress(job_id):  # noqa: F811
 	"""
@@ -774,7 +643,7 @@ def create_material_request(item_code, qty):
 	schedule_date = add_days(today(), 7)
 
 	# Set company name
-	company = "RAMLAL DUGAR"
+	company = MRP_MATERIAL_REQUEST_COMPANY
 
 	# Verify company exists
 	if not frappe.db.exists("Company", company):
@@ -782,7 +651,7 @@ def create_material_request(item_code, qty):
 
 	try:
 		# Set warehouse
-		warehouse = "Finished Goods - RD"
+		warehouse = MRP_MATERIAL_REQUEST_WAREHOUSE
 
 		# Verify warehouse exists
 		if not frappe.db.exists("Warehouse", warehouse):
@@ -833,6 +702,7 @@ def create_material_requests_automatically(net_order_recommendations=None):
 	Args:
 	        net_order_recommendations: Dict of item_code -> net_order_recommendation (optional)
 	                Can be a dict or JSON string. If not provided, will enqueue as background job
+	                that takes them from the latest MRP results
 	"""
 	# Parse net_order_recommendations if it's a string (JSON)
 	if isinstance(net_order_recommendations, str):
@@ -846,24 +716,55 @@ def create_material_requests_automatically(net_order_recommendations=None):
 			}
 
 	if net_order_recommendations is None:
-		# Enqueue as background job (without parameters - will get from cache)
-		job = frappe.enqueue(
-			"prakash_steel.prakash_steel.doctype.mrp_genaration.mrp_genaration._create_material_requests_worker",
-			queue="long",
-			timeout=1800,  # 30 minutes timeout
-			job_name=f"MRP Material Request Creation - {frappe.session.user}",
-			is_async=True,
-			now=False,  # Ensure it's queued, not executed immediately
-		)
+		# Planners who shared an MRP run share its Material Requests as well: one job per
+		# stored plan, joined when another planner already started it, and never repeated
+		# once the run records that its Material Requests were created
+		mrp_run = mrp_plan.get_last_run()
+		if mrp_run:
+			if frappe.db.get_value("MRP Run", mrp_run, "material_requests_created_on"):
+				return {
+					"mrp_run": mrp_run,
+					"status": "completed",
+					"already_created": True,
+					"message": f"Material Requests for MRP run {mrp_run} have already been created.",
+				}
 
-		job_id = job.id if hasattr(job, "id") else str(job)
-		frappe.cache().set_value(f"mr_creation_job_id_{frappe.session.user}", job_id, expires_in_sec=1800)
+			job_id, attached = mrp_plan.enqueue_shared_job(
+				"prakash_steel.prakash_steel.doctype.mrp_genaration.mrp_genaration._create_material_requests_worker",
+				f"mrp_material_requests::{mrp_run}",
+				queue="long",
+				timeout=1800,  # 30 minutes timeout
+				job_name=f"MRP Material Request Creation - {mrp_run}",
+				mrp_run=mrp_run,
+			)
+			frappe.cache().set_value(f"mr_creation_job_id_{frappe.session.user}", job_id, expires_in_sec=1800)
+			job_progress.add_job_follower(job_id)
+			if attached:
+				return {
+					"job_id": job_id,
+					"status": "queued",
+					"attached": True,
+					"message": f"Material Requests for MRP run {mrp_run} are already being created (Job ID: {job_id}); following it.",
+				}
+		else:
+			# Enqueue as background job (without parameters - will get from cache)
+			job = frappe.enqueue(
+				"prakash_steel.prakash_steel.doctype.mrp_genaration.mrp_genaration._create_material_requests_worker",
+				queue="long",
+				timeout=1800,  # 30 minutes timeout
+				job_name=f"MRP Material Request Creation - {frappe.session.user}",
+				is_async=True,
+				now=False,  # Ensure it's queued, not executed immediately
+			)
+
+			job_id = job.id if hasattr(job, "id") else str(job)
+			frappe.cache().set_value(f"mr_creation_job_id_{frappe.session.user}", job_id, expires_in_sec=1800)
+			job_progress.add_job_follower(job_id)
 
 		# Log job creation
-		print(
+		frappe.logger("prakash_steel").info(
 			f"[MR Creation] Job queued with ID: {job_id}, Name: MRP Material Request Creation - {frappe.session.user}"
 		)
-		frappe.log_error(f"MR Creation job queued: {job_id}", "MR Creation Job")
 
 		return {
 			"job_id": job_id,
@@ -889,12 +790,12 @@ def create_material_requests_automatically(net_order_recommendations=None):
 
 		job_id = job.id if hasattr(job, "id") else str(job)
 		frappe.cache().set_value(f"mr_creation_job_id_{frappe.session.user}", job_id, expires_in_sec=1800)
+		job_progress.add_job_follower(job_id)
 
 		# Log job creation
-		print(
+		frappe.logger("prakash_steel").info(
 			f"[MR Creation] Job queued with ID: {job_id}, Name: MRP Material Request Creation - {frappe.session.user}"
 		)
-		frappe.log_error(f"MR Creation job queued: {job_id}", "MR Creation Job")
 
 		return {
 			"job_id": job_id,
@@ -903,10 +804,34 @@ def create_material_requests_automatically(net_order_recommendations=None):
 		}
 
 
-def _create_material_requests_worker(net_order_recommendations=None):
+def _create_material_requests_worker(net_order_recommendations=None, mrp_run=None):
+	"""
+	Background job: create Material Requests, pushing progress and the outcome to the
+	users following the job. With mrp_run, they are created from that run's stored plan.
+	"""
+	job = frappe.get_job()
+	job_id = job.id if job else None
+	progress = job_progress.JobProgress(
+		job_progress.MR_CREATION_PROGRESS_EVENT, job_id, progress_cache_key=f"mr_creation_progress_{job_id}"
+	)
+	try:
+		result = _create_material_requests(net_order_recommendations, progress, mrp_run)
+	except Exception as e:
+		progress.finish(error=str(e))
+		raise
+
+	progress.finish(result)
+	return result
+
+
+def _create_material_requests(net_order_recommendations, progress, mrp_run=None):
 	"""
 	Worker function that creates Material Requests.
 	This runs as a background job to prevent UI blocking.
+
+	With mrp_run the recommendations are that run's stored plan and nothing else; the job
+	stops without creating anything when a newer run has replaced the plan since it was
+	queued, or when the run's Material Requests were already created.
 	"""
 	# Log job start
 	job_id = None
@@ -920,15 +845,32 @@ def _create_material_requests_worker(net_order_recommendations=None):
 	if not job_id:
 		job_id = frappe.cache().get_value(f"mr_creation_job_id_{frappe.session.user}")
 
-	start_msg = f"[MR Creation Job {job_id or 'Unknown'}] Starting Material Request creation..."
-	print(start_msg)
-	frappe.log_error(start_msg, "MR Creation Job")
+	frappe.logger("prakash_steel").info(
+		f"[MR Creation Job {job_id or 'Unknown'}] Starting Material Request creation..."
+	)
 
-	# If not provided as parameter, try to get from cache
-	if net_order_recommendations is None:
+	if mrp_run:
+		if frappe.db.get_value("MRP Run", mrp_run, "material_requests_created_on"):
+			return _get_skipped_mr_creation_result(
+				f"Material Requests for MRP run {mrp_run} have already been created."
+			)
+		# The stored plan holds the latest run only
+		latest_run = mrp_plan.get_last_run()
+		if latest_run != mrp_run:
+			return _get_skipped_mr_creation_result(
+				f"MRP run {mrp_run} was replaced by {latest_run} before its Material Requests were "
+				"created; create them from the latest run instead."
+			)
+		net_order_recommendations = mrp_plan.get_plan_net_order_recommendations()
+
+	# If not provided as parameter, try to get from cache, then from the latest MRP results
+	elif net_order_recommendations is None:
 		cache_key = f"mr_net_order_recs_{frappe.session.user}"
 		net_order_recommendations = frappe.cache().get_value(cache_key)
 
+	if net_order_recommendations is None:
+		net_order_recommendations = mrp_plan.get_plan_net_order_recommendations()
+
 	# Parse if it's a string (JSON)
 	if isinstance(net_order_recommendations, str):
 		import json
@@ -964,23 +906,10 @@ def _create_material_requests_worker(net_order_recommendations=None):
 			"message": "No order recommendations provided",
 		}
 
-	# Get detailed_info from cache if available (from MRP calculation)
-	detailed_info = {}
-	try:
-		# Try to get from the most recent MRP result
-		job_id = frappe.cache().get_value(f"mrp_job_id_{frappe.session.user}")
-		if job_id:
-			cache_key = f"mrp_result_{job_id}"
-			mrp_result = frappe.cache().get_value(cache_key)
-			if mrp_result:
-				detailed_info = mrp_result.get("detailed_info", {})
-	except:
-		pass
-
 	# Filter items with net_order_recommendation > 0
-	items_to_process = [
-		(item_code, qty) for item_code, qty in net_order_recommendations.items() if flt(qty) > 0
-	]
+	items_to_process = {
+		item_code: flt(qty) for item_code, qty in net_order_recommendations.items() if flt(qty) > 0
+	}
 
 	if not items_to_process:
 		return {
@@ -990,1000 +919,173 @@ def _create_material_requests_worker(net_order_recommendations=None):
 			"message": "No items with Net Order Recommendation > 0 found",
 		}
 
-	total_items = len(items_to_process)
-	success_count = 0
-	error_count = 0
-	material_requests = []
-	errors = []
-
-	# Store progress in cache for frontend polling
-	progress_cache_key = f"mr_creation_progress_{job_id}"
-
-	def update_progress(current, total, current_item=None):
-		"""Update progress in cache"""
-		progress = {
-			"current": current,
-			"total": total,
-			"percent": int((current / total) * 100) if total > 0 else 0,
-			"current_item": current_item,
-			"success_count": success_count,
-			"error_count": error_count,
-		}
-		frappe.cache().set_value(progress_cache_key, progress, expires_in_sec=1800)
-		# Also print for debugging
-		print(
-			f"[MR Creation Progress] {current}/{total} ({progress['percent']}%) - Item: {current_item}, Success: {success_count}, Failed: {error_count}"
+	# One Material Request per item, its batches as lines (or one line, per settings);
+	# item details are read once for all items and documents are committed in chunks
+	settings = frappe.get_cached_doc("Production planning settings")
+	commit_size = settings.get("mrp_material_request_commit_size")
+
+	# Progress is pushed (throttled) to the users following the job
+	def update_progress(current, total, result):
+		progress.update(
+			current,
+			total,
+			success_count=result["success_count"],
+			error_count=result["error_count"],
 		)
 
-	# Initialize progress at start
-	update_progress(0, total_items, None)
-
-	# Create Material Request(s) for each item
-	for idx, (item_code, net_qty) in enumerate(items_to_process, 1):
-		# Update progress before processing item
-		update_progress(idx, total_items, item_code)
-		if not item_code or net_qty <= 0:
-			error_count += 1
-			errors.append(f"{item_code}: Invalid quantity")
-			continue
+	result = create_material_requests_in_bulk(
+		items_to_process,
+		MRP_MATERIAL_REQUEST_COMPANY,
+		MRP_MATERIAL_REQUEST_WAREHOUSE,
+		group_by="item_code",
+		max_lines_per_request=None,
+		progress_callback=update_progress,
+		batch_line_policy=settings.get("mrp_batch_line_policy") or ONE_LINE_PER_BATCH,
+		commit_every=DEFAULT_MATERIAL_REQUEST_COMMIT_SIZE if commit_size is None else cint(commit_size),
+	)
+	if result.get("error"):
+		# Company or warehouse missing
+		result = {
+			"success_count": 0,
+			"error_count": 1,
+			"material_requests": [],
+			"errors": [result["error"]],
+			"message": result["error"],
+		}
 
-		try:
-			# Get batch_size for this item
-			batch_size = 0
-			if item_code in detailed_info:
-				batch_size = flt(detailed_info[item_code].get("batch_size", 0))
-			else:
-				# Fallback: get from item doctype
-				item_doc = frappe.get_doc("Item", item_code)
-				batch_size = flt(item_doc.get("custom_batch_size", 0))
-
-			if batch_size > 0:
-				# Item has batch_size - create multiple Material Requests
-				# Since net_order_recommendation is already adjusted to be a multiple of batch_size,
-				# we just need to divide to get the number of Material Requests
-				# Example: net_qty = 1600, batch_size = 400 -> 4 Material Requests of 400 each
-				num_requests = int(flt(net_qty) / flt(batch_size))
-
-				# Create Material Requests, each with batch_size quantity
-				for i in range(num_requests):
-					result = create_material_request(item_code, batch_size)
-					if result.get("error"):
-						error_count += 1
-						errors.append(f"{item_code} (MR #{i + 1} of {num_requests}): {result.get('error')}")
-					else:
-						success_count += 1
-						material_requests.append(result.get("material_request"))
-					# Update progress after each MR creation
-					update_progress(idx, total_items, item_code)
-
-				# Handle remainder (shouldn't happen if net_order_recommendation is properly calculated, but just in case)
-				remainder = flt(net_qty) % flt(batch_size)
-				if remainder > 0:
-					# Create one more Material Request with the remainder
-					result = create_material_request(item_code, remainder)
-					if result.get("error"):
-						error_count += 1
-						errors.append(f"{item_code} (Remainder {remainder}): {result.get('error')}")
-					else:
-						success_count += 1
-						material_requests.append(result.get("material_request"))
-			else:
-				# No batch_size - create single Material Request with full quantity
-				result = create_material_request(item_code, net_qty)
-				if result.get("error"):
-					error_count += 1
-					errors.append(f"{item_code}: {result.get('error')}")
-				else:
-					success_count += 1
-					material_requests.append(result.get("material_request"))
-					# Update progress after successful creation
-					update_progress(idx, total_items, item_code)
-		except Exception as e:
-			error_count += 1
-			errors.append(f"{item_code}: {str(e)}")
-			frappe.log_error(
-				f"Error creating Material Request for {item_code}: {str(e)}",
-				"Create Material Requests Automatically Error",
-			)
-			# Update progress even on error
-			update_progress(idx, total_items, item_code)
+	result["errors"] = result["errors"][:10]  # Limit errors to first 10
+	result["status"] = "completed"
 
-	result = {
-		"success_count": success_count,
-		"error_count": error_count,
-		"material_requests": material_requests,
-		"errors": errors[:10] if len(errors) > 10 else errors,  # Limit errors to first 10
-		"message": f"Created {success_count} Material Request(s), {error_count} failed",
-		"status": "completed",
-	}
+	# Recorded on the run, so a later request for it does not order the same items again
+	if mrp_run:
+		frappe.db.set_value(
+			"MRP Run",
+			mrp_run,
+			{
+				"material_requests_created_on": now_datetime(),
+				"material_request_count": result["success_count"],
+			},
+		)
+		frappe.db.commit()
 
 	# Store result in cache for retrieval using job_id
-	job_id = None
-	try:
-		job = frappe.get_job()
-		if job and hasattr(job, "id"):
-			job_id = job.id
-	except:
-		pass
-
-	if not job_id:
-		# Try to get from cache (stored when job was enqueued)
-		job_id = frappe.cache().get_value(f"mr_creation_job_id_{frappe.session.user}")
-
 	if job_id:
 		cache_key = f"mr_creation_result_{job_id}"
 		frappe.cache().set_value(cache_key, result, expires_in_sec=1800)  # Store for 30 minutes
 
-		# Clear progress cache
-		progress_cache_key = f"mr_creation_progress_{job_id}"
-		frappe.cache().delete_value(progress_cache_key)
-
 	# Log job completion
-	completion_msg = f"[MR Creation Job {job_id or 'Unknown'}] Completed! Created {success_count} MR(s), {error_count} failed"
-	print(completion_msg)
-	frappe.log_error(completion_msg, "MR Creation Job")
+	completion_msg = (
+		f"[MR Creation Job {job_id or 'Unknown'}] Completed! "
+		f"Created {result['success_count']} MR(s), {result['error_count']} failed"
+	)
+	frappe.logger("prakash_steel").info(completion_msg)
 
 	return result
 
 
-def calculate_net_order_recommendation(base_order_rec, moq, batch_size):
-	"""
-	Calculate net order recommendation by applying MOQ/Batch Size logic.
-
-	Logic:
-	- If base_order_rec <= 0: return 0 (no order needed, ignore MOQ/Batch Size)
-	- If MOQ > 0:
-	  - If MOQ < base_order_rec: use base_order_rec
-	  - If MOQ >= base_order_rec: use MOQ
-	- Else if batch_size > 0:
-	  - ceil(base_order_rec / batch_size) * batch_size
-	- Else:
-	  - Use base_order_rec as is
-	"""
-	base_order_rec = flt(base_order_rec)
-	moq = flt(moq)
-	batch_size = flt(batch_size)
-
-	# If base order recommendation is 0 or negative, return 0
-	# Don't apply MOQ/Batch Size for negative or zero demand
-	if base_order_rec <= 0:
-		return 0
-
-	if moq > 0:
-		# Use MOQ:
-		# If MOQ < base_order_rec: use base_order_rec
-		# If MOQ >= base_order_rec: use MOQ
-		if moq < base_order_rec:
-			net_order_rec = base_order_rec
-		else:
-			net_order_rec = moq
-	elif batch_size > 0:
-		# Use Batch Size: ceil(base_order_rec / batch_size) * batch_size
-		net_order_rec = math.ceil(base_order_rec / batch_size) * batch_size
-	else:
-		# No MOQ or Batch Size, use base_order_rec as is
-		net_order_rec = base_order_rec
-
-	return max(0, flt(net_order_rec))
-
-
-def calculate_initial_order_recommendation(
-	item_code,
-	item_buffer_map,
-	item_tog_map,
-	item_sku_type_map,
-	stock_map,
-	wip_map,
-	open_so_map,
-	qualified_demand_map,
-	open_po_map,
-):
-	"""
-	Calculate initial order recommendation for a single item (before BOM traversal).
-	- Buffer: TOG + Qualified Demand - Stock - WIP/Open PO
-	  - For BOTA/PTA: TOG + Qualified Demand - Stock - WIP - Open PO
-	  - For others: TOG + Qualified Demand - Stock - WIP
-	- Non-buffer: Open SO - Stock - WIP
-	"""
-	buffer_flag = item_buffer_map.get(item_code, "Non-Buffer")
-	is_buffer = buffer_flag == "Buffer"
-
-	stock = flt(stock_map.get(item_code, 0))
-	wip = flt(wip_map.get(item_code, 0))
-
-	if is_buffer:
-		# Buffer item: Order recommendation = TOG + Qualified Demand - Stock - WIP/Open PO
-		tog = flt(item_tog_map.get(item_code, 0))
-		qualified_demand = flt(qualified_demand_map.get(item_code, 0))
-		sku_type = item_sku_type_map.get(item_code)
-		open_po = flt(open_po_map.get(item_code, 0))
-
-		if sku_type in ["BOTA", "PTA"]:
-			# For BOTA/PTA: TOG + Qualified Demand - Stock - WIP - Open PO
-			order_rec = max(0, tog + qualified_demand - stock - wip - open_po)
-		else:
-			# For other buffer items: TOG + Qualified Demand - Stock - WIP
-			order_rec = max(0, tog + qualified_demand - stock - wip)
-	else:
-		# Non-buffer item: Order recommendation = max(0, Open SO - Stock - WIP)
-		# For PTO and BOTO (purchase items): also subtract Open PO
-		open_so = flt(open_so_map.get(item_code, 0))
-		sku_type = item_sku_type_map.get(item_code)
-		open_po = flt(open_po_map.get(item_code, 0))
-
-		if sku_type in ["PTO", "BOTO"]:
-			# For PTO/BOTO: Open SO - Stock - WIP - Open PO
-			order_rec = max(0, open_so - stock - wip - open_po)
-		else:
-			# For other non-buffer items: Open SO - Stock - WIP
-			order_rec = max(0, open_so - stock - wip)
-
-	return order_rec
-
-
-def calculate_final_order_recommendation(
-	item_code,
-	item_buffer_map,
-	item_tog_map,
-	item_sku_type_map,
-	stock_map,
-	wip_map,
-	open_so_map,
-	qualified_demand_map,
-	open_po_map,
-	mrq_map,
-	parent_demand_map,
-):
-	"""
-	Calculate final order recommendation for a single item (after BOM traversal).
-	- Buffer: TOG + Qualified Demand - Stock - WIP/Open PO - MRQ (parent demand ignored)
-	  - For BOTA/PTA: TOG + Qualified Demand - Stock - WIP - Open PO - MRQ
-	  - For others: TOG + Qualified Demand - Stock - WIP - MRQ
-	- Non-buffer: max(0, (Open SO + Parent Demand) - Stock - WIP - MRQ)
-	  - For PTO/BOTO: max(0, (Open SO + Parent Demand) - Stock - WIP - Open PO - MRQ)
-	"""
-	buffer_flag = item_buffer_map.get(item_code, "Non-Buffer")
-	is_buffer = buffer_flag == "Buffer"
-
-	stock = flt(stock_map.get(item_code, 0))
-	wip = flt(wip_map.get(item_code, 0))
-	mrq = flt(mrq_map.get(item_code, 0))
-
-	if is_buffer:
-		# Buffer item: Order recommendation = TOG + Qualified Demand - Stock - WIP/Open PO - MRQ (parent demand ignored)
-		tog = flt(item_tog_map.get(item_code, 0))
-		qualified_demand = flt(qualified_demand_map.get(item_code, 0))
-		sku_type = item_sku_type_map.get(item_code)
-		open_po = flt(open_po_map.get(item_code, 0))
-
-		if sku_type in ["BOTA", "PTA"]:
-			# For BOTA/PTA: TOG + Qualified Demand - Stock - WIP - Open PO - MRQ
-			base_order_rec = tog + qualified_demand - stock - wip - open_po
-		else:
-			# For other buffer items: TOG + Qualified Demand - Stock - WIP - MRQ
-			base_order_rec = tog + qualified_demand - stock - wip
+def _get_skipped_mr_creation_result(message):
+	return {
+		"success_count": 0,
+		"error_count": 0,
+		"material_requests": [],
+		"errors": [],
+		"status": "completed",
+		"message": message,
+	}
 
-		# Subtract MRQ from base order recommendation
-		order_rec = max(0, base_order_rec - mrq)
-	else:
-		# Non-buffer item: Order recommendation = max(0, Requirement - Stock - WIP - MRQ)
-		# Requirement = Open SO + sum of all parent BOM demands
-		# For PTO and BOTO (purchase items): also subtract Open PO
-		open_so = flt(open_so_map.get(item_code, 0))
-		parent_demand = flt(parent_demand_map.get(item_code, 0))
-		requirement = open_so + parent_demand
-		sku_type = item_sku_type_map.get(item_code)
-		open_po = flt(open_po_map.get(item_code, 0))
 
-		if sku_type in ["PTO", "BOTO"]:
-			# For PTO/BOTO: Requirement - Stock - WIP - Open PO - MRQ
-			base_order_rec = requirement - stock - wip - open_po
-		else:
-			# For other non-buffer items: Requirement - Stock - WIP - MRQ
-			base_order_rec = requirement - stock - wip
-
-		# Subtract MRQ from base order recommendation
-		order_rec = max(0, base_order_rec - mrq)
-
-	return order_rec
-
-
-def traverse_bom_for_mrp(
-	parent_item_code,
-	parent_order_qty,
-	item_buffer_map,
-	item_tog_map,
-	item_type_map,
-	item_sku_type_map,
-	stock_map,
-	wip_map,
-	open_so_map,
-	qualified_demand_map,
-	open_po_map,
-	mrq_map,
-	parent_demand_map,
-	detailed_info,
-	visited_items,
-	level=0,
-):
+@frappe.whitelist()
+def get_mrp_item_breakdown(item_code):
 	"""
-	Recursively traverse BOM to calculate parent demands for child items.
-	For buffer child items: Don't add parent demand (they use TOG-based calculation)
-	For non-buffer child items: Add parent demand to requirement
-
-	Args:
-	        parent_item_code: Item code of parent item
-	        parent_order_qty: Order quantity needed for parent item
-	        detailed_info: Dict to store detailed information for each item
-	        visited_items: Set of visited items in current traversal (to prevent circular references)
+	Calculation breakdown of one item from the stored plan, rendered when a planner
+	opens the item. Parent demands are rebuilt from the stored plan rows of the items
+	whose BOMs use it.
 	"""
-	if parent_item_code in visited_items:
-		return
-
-	visited_items.add(parent_item_code)
-
-	# Get BOM for parent item
-	bom = get_default_bom(parent_item_code)
-	if not bom:
-		return
-
-	try:
-		bom_doc = frappe.get_doc("BOM", bom)
-		bom_name = bom_doc.name
-		bom_quantity = flt(bom_doc.quantity)  # Quantity of parent item produced by this BOM
-		if bom_quantity <= 0:
-			bom_quantity = 1.0  # Default to 1 if BOM quantity is 0 or negative
-
-		# Process each child item in BOM
-		for bom_item in bom_doc.items:
-			child_item_code = bom_item.item_code
-			bom_item_qty = flt(bom_item.qty)  # Quantity of child item needed in BOM
-
-			# Calculate required qty for child: parent_order_qty * (bom_item_qty / bom_quantity)
-			# This normalizes the BOM item quantity to "per unit of parent item produced"
-			# Example: If BOM produces 0.97 units of parent and needs 0.3 units of child,
-			# then for 1 unit of parent, we need: 0.3 / 0.97 units of child
-			normalized_bom_qty = bom_item_qty / bom_quantity
-			child_required_qty = math.ceil(parent_order_qty * normalized_bom_qty)
-
-			# Track parent demand in detailed_info
-			if child_item_code not in detailed_info:
-				# Initialize if not already done
-				child_buffer_flag = item_buffer_map.get(child_item_code, "Non-Buffer")
-				detailed_info[child_item_code] = {
-					"item_code": child_item_code,
-					"buffer_flag": child_buffer_flag,
-					"is_buffer": child_buffer_flag == "Buffer",
-					"item_type": item_type_map.get(child_item_code),
-					"sku_type": item_sku_type_map.get(child_item_code),
-					"tog": flt(item_tog_map.get(child_item_code, 0)),
-					"qualified_demand": flt(qualified_demand_map.get(child_item_code, 0)),
-					"open_so": flt(open_so_map.get(child_item_code, 0)),
-					"stock": flt(stock_map.get(child_item_code, 0)),
-					"wip": flt(wip_map.get(child_item_code, 0)),
-					"open_po": flt(open_po_map.get(child_item_code, 0)),
-					"mrq": flt(mrq_map.get(child_item_code, 0)),
-					"parent_demands": [],
-					"total_parent_demand": 0,
-					"initial_order_rec": 0,
-					"final_order_rec": 0,
-					"calculation_breakdown": "",
-				}
-
-			# Check if child is buffer or non-buffer
-			child_buffer_flag = item_buffer_map.get(child_item_code, "Non-Buffer")
-			is_child_buffer = child_buffer_flag == "Buffer"
-
-			if is_child_buffer:
-				# Buffer child: Don't add parent demand (they use TOG + Qualified Demand calculation)
-				# Record that parent demand was ignored (for logging)
-				detailed_info[child_item_code]["parent_demands"].append(
-					{
-						"parent_item": parent_item_code,
-						"bom_name": bom_name,
-						"demand_qty": child_required_qty,
-						"applied": False,  # Not applied because it's buffer
-						"reason": "Buffer item - parent demand ignored, uses TOG + Qualified Demand calculation",
-					}
-				)
-
-				# But we still need to traverse its BOM if it has order recommendation > 0
-				# Calculate its order recommendation (TOG + Qualified Demand, ignoring parent demand)
-				child_tog = flt(item_tog_map.get(child_item_code, 0))
-				child_qualified_demand = flt(qualified_demand_map.get(child_item_code, 0))
-				child_stock = flt(stock_map.get(child_item_code, 0))
-				child_wip = flt(wip_map.get(child_item_code, 0))
-				child_sku_type = item_sku_type_map.get(child_item_code)
-				child_open_po = flt(open_po_map.get(child_item_code, 0))
-				child_mrq = flt(mrq_map.get(child_item_code, 0))
-
-				if child_sku_type in ["BOTA", "PTA"]:
-					base_child_order_rec = (
-						child_tog + child_qualified_demand - child_stock - child_wip - child_open_po
-					)
-				else:
-					base_child_order_rec = child_tog + child_qualified_demand - child_stock - child_wip
-
-				# Subtract MRQ from base order recommendation
-				child_order_rec = max(0, base_child_order_rec - child_mrq)
-
-				# If buffer child has order recommendation > 0, traverse its BOM
-				# Use a new visited_items set to allow traversal (buffer items can be processed independently)
-				if child_order_rec > 0 and child_item_code not in visited_items:
-					traverse_bom_for_mrp(
-						child_item_code,
-						child_order_rec,
-						item_buffer_map,
-						item_tog_map,
-						item_type_map,
-						item_sku_type_map,
-						stock_map,
-						wip_map,
-						open_so_map,
-						qualified_demand_map,
-						open_po_map,
-						mrq_map,
-						parent_demand_map,
-						detailed_info,
-						visited_items.copy(),  # New set for this branch
-						level + 1,
-					)
-			else:
-				# Non-buffer child: Add parent demand to requirement
-				# Record parent demand
-				detailed_info[child_item_code]["parent_demands"].append(
-					{
-						"parent_item": parent_item_code,
-						"bom_name": bom_name,
-						"demand_qty": child_required_qty,
-						"applied": True,  # Applied to requirement
-						"reason": f"From parent {parent_item_code} (Order Qty: {parent_order_qty}) × (BOM Item Qty: {bom_item_qty} / BOM Qty: {bom_quantity}) = {normalized_bom_qty:.4f}",
-					}
-				)
+	if not item_code:
+		return {"error": "Item Code is required"}
 
-				# Accumulate parent demand (same item can appear in multiple BOMs)
-				if child_item_code in parent_demand_map:
-					parent_demand_map[child_item_code] += child_required_qty
-				else:
-					parent_demand_map[child_item_code] = child_required_qty
+	if not frappe.has_permission("MRP Plan Item", "read"):
+		return {"error": "Not permitted to read MRP results"}
 
-				# Update total parent demand in detailed_info
-				detailed_info[child_item_code]["total_parent_demand"] = flt(
-					parent_demand_map.get(child_item_code, 0)
-				)
+	plan_item = mrp_plan.get_plan_item(item_code)
+	if not plan_item:
+		return {"error": f"Item '{item_code}' is not in the stored MRP plan. Run MRP Generation first."}
 
-				# Calculate order recommendation for child item (with parent demand)
-				child_open_so = flt(open_so_map.get(child_item_code, 0))
-				child_parent_demand = flt(parent_demand_map.get(child_item_code, 0))
-				child_requirement = child_open_so + child_parent_demand
-				child_stock = flt(stock_map.get(child_item_code, 0))
-				child_wip = flt(wip_map.get(child_item_code, 0))
-				child_sku_type = item_sku_type_map.get(child_item_code)
-				child_open_po = flt(open_po_map.get(child_item_code, 0))
-				child_mrq = flt(mrq_map.get(child_item_code, 0))
-
-				if child_sku_type in ["PTO", "BOTO"]:
-					# For PTO/BOTO: Requirement - Stock - WIP - Open PO - MRQ
-					base_child_order_rec = child_requirement - child_stock - child_wip - child_open_po
-				else:
-					# For other non-buffer items: Requirement - Stock - WIP - MRQ
-					base_child_order_rec = child_requirement - child_stock - child_wip
-
-				# Subtract MRQ from base order recommendation
-				child_order_rec = max(0, base_child_order_rec - child_mrq)
-
-				# If non-buffer child has order recommendation > 0, traverse its BOM recursively
-				# Use a new visited_items set to allow traversal from different paths
-				if child_order_rec > 0 and child_item_code not in visited_items:
-					traverse_bom_for_mrp(
-						child_item_code,
-						child_order_rec,
-						item_buffer_map,
-						item_tog_map,
-						item_type_map,
-						item_sku_type_map,
-						stock_map,
-						wip_map,
-						open_so_map,
-						qualified_demand_map,
-						open_po_map,
-						mrq_map,
-						parent_demand_map,
-						detailed_info,
-						visited_items.copy(),  # New set for this branch
-						level + 1,
-					)
-
-	except Exception as e:
-		frappe.log_error(
-			f"Error traversing BOM for item {parent_item_code}: {str(e)}",
-			"MRP Generation Error",
+	child_is_buffer = plan_item.buffer_flag == "Buffer"
+	parent_demands = [
+		get_parent_demand_entry(
+			parent.item_code, parent.bom_no, parent.net_order_rec, parent.ratio, child_is_buffer
 		)
+		for parent in mrp_plan.get_plan_parents(item_code)
+		if flt(parent.net_order_rec) > 0
+	]
 
+	info = get_detailed_info(item_code, plan_item, parent_demands)
+	build_calculation_breakdown(info, {item_code: info["total_parent_demand"]})
+	info["mrp_run"] = plan_item.mrp_run
+	info["time_phased_plan"] = json.loads(plan_item.time_phased_plan) if plan_item.time_phased_plan else None
+	return info
 
-def traverse_bom_for_mrp_with_net_rec(
-	parent_item_code,
-	parent_net_order_qty,
-	item_buffer_map,
-	item_tog_map,
-	item_type_map,
-	item_sku_type_map,
-	item_moq_map,
-	item_batch_size_map,
-	stock_map,
-	wip_map,
-	open_so_map,
-	qualified_demand_map,
-	open_po_map,
-	mrq_map,
-	parent_demand_map,
-	detailed_info,
-	visited_items,
-	level=0,
-):
-	"""
-	Recursively traverse BOM using net_order_recommendations (after MOQ/Batch Size).
-	This ensures children get the adjusted values from their parents.
-	Similar to traverse_bom_for_mrp but uses net_order_recommendation values.
-	"""
-	if parent_item_code in visited_items:
-		return
-
-	visited_items.add(parent_item_code)
-
-	# Get BOM for parent item
-	bom = get_default_bom(parent_item_code)
-	if not bom:
-		return
-
-	try:
-		bom_doc = frappe.get_doc("BOM", bom)
-		bom_name = bom_doc.name
-		bom_quantity = flt(bom_doc.quantity)  # Quantity of parent item produced by this BOM
-		if bom_quantity <= 0:
-			bom_quantity = 1.0  # Default to 1 if BOM quantity is 0 or negative
-
-		# Process each child item in BOM
-		for bom_item in bom_doc.items:
-			child_item_code = bom_item.item_code
-			bom_item_qty = flt(bom_item.qty)  # Quantity of child item needed in BOM
-
-			# Calculate required qty for child: parent_net_order_qty * (bom_item_qty / bom_quantity)
-			# This normalizes the BOM item quantity to "per unit of parent item produced"
-			# Example: If BOM produces 0.97 units of parent and needs 0.3 units of child,
-			# then for 1 unit of parent, we need: 0.3 / 0.97 units of child
-			# This uses the net_order_recommendation (after MOQ/Batch Size) of parent
-			normalized_bom_qty = bom_item_qty / bom_quantity
-			child_required_qty = parent_net_order_qty * normalized_bom_qty
-
-			# Check if child is buffer or non-buffer
-			child_buffer_flag = item_buffer_map.get(child_item_code, "Non-Buffer")
-			is_child_buffer = child_buffer_flag == "Buffer"
-
-			if is_child_buffer:
-				# Buffer child: Don't add parent demand (they use TOG + Qualified Demand calculation)
-				# But record it for logging
-				if child_item_code in detailed_info:
-					detailed_info[child_item_code]["parent_demands"].append(
-						{
-							"parent_item": parent_item_code,
-							"bom_name": bom_name,
-							"demand_qty": child_required_qty,
-							"applied": False,
-							"reason": f"Buffer item - parent demand ignored (from net_order_rec: {parent_net_order_qty})",
-						}
-					)
-			else:
-				# Non-buffer child: Add parent demand to requirement
-				# Record parent demand
-				if child_item_code in detailed_info:
-					detailed_info[child_item_code]["parent_demands"].append(
-						{
-							"parent_item": parent_item_code,
-							"bom_name": bom_name,
-							"demand_qty": child_required_qty,
-							"applied": True,
-							"reason": f"From parent {parent_item_code} (Net Order Qty: {parent_net_order_qty}) × (BOM Item Qty: {bom_item_qty} / BOM Qty: {bom_quantity}) = {normalized_bom_qty:.4f}",
-						}
-					)
-
-				# Accumulate parent demand (same item can appear in multiple BOMs)
-				if child_item_code in parent_demand_map:
-					parent_demand_map[child_item_code] += child_required_qty
-				else:
-					parent_demand_map[child_item_code] = child_required_qty
-
-				# Update total parent demand in detailed_info
-				if child_item_code in detailed_info:
-					detailed_info[child_item_code]["total_parent_demand"] = flt(
-						parent_demand_map.get(child_item_code, 0)
-					)
-
-				# Calculate order recommendation for child item (with parent demand)
-				child_open_so = flt(open_so_map.get(child_item_code, 0))
-				child_parent_demand = flt(parent_demand_map.get(child_item_code, 0))
-				child_requirement = child_open_so + child_parent_demand
-				child_stock = flt(stock_map.get(child_item_code, 0))
-				child_wip = flt(wip_map.get(child_item_code, 0))
-				child_sku_type = item_sku_type_map.get(child_item_code)
-				child_open_po = flt(open_po_map.get(child_item_code, 0))
-				child_mrq = flt(mrq_map.get(child_item_code, 0))
-
-				if child_sku_type in ["PTO", "BOTO"]:
-					base_child_order_rec = child_requirement - child_stock - child_wip - child_open_po
-				else:
-					base_child_order_rec = child_requirement - child_stock - child_wip
 
-				# Subtract MRQ from base order recommendation
-				child_base_order_rec = max(0, base_child_order_rec - child_mrq)
+def get_parent_demands(bom_graph, item_order, net_order_recommendations, item_buffer_map):
+	"""item_code -> parent demand entries, from every exploding parent with a net order recommendation"""
+	parent_demands = {}
+	for parent_item_code in item_order:
+		parent_net_order_rec = net_order_recommendations[parent_item_code]
+		if parent_net_order_rec <= 0 or not bom_graph.explodes(parent_item_code):
+			continue
 
-				# Apply MOQ/Batch Size to get net_order_recommendation
-				child_moq = flt(item_moq_map.get(child_item_code, 0))
-				child_batch_size = flt(item_batch_size_map.get(child_item_code, 0))
-				child_net_order_rec = calculate_net_order_recommendation(
-					child_base_order_rec, child_moq, child_batch_size
+		bom_name = bom_graph.get_bom(parent_item_code)
+		for child_item_code, _bom_item_qty, ratio in bom_graph.get_children(parent_item_code):
+			child_is_buffer = item_buffer_map.get(child_item_code, "Non-Buffer") == "Buffer"
+			parent_demands.setdefault(child_item_code, []).append(
+				get_parent_demand_entry(
+					parent_item_code, bom_name, parent_net_order_rec, ratio, child_is_buffer
 				)
+			)
 
-				# If child has net_order_recommendation > 0, traverse its BOM recursively
-				if child_net_order_rec > 0 and child_item_code not in visited_items:
-					traverse_bom_for_mrp_with_net_rec(
-						child_item_code,
-						child_net_order_rec,
-						item_buffer_map,
-						item_tog_map,
-						item_type_map,
-						item_sku_type_map,
-						item_moq_map,
-						item_batch_size_map,
-						stock_map,
-						wip_map,
-						open_so_map,
-						qualified_demand_map,
-						open_po_map,
-						mrq_map,
-						parent_demand_map,
-						detailed_info,
-						visited_items.copy(),
-						level + 1,
-					)
-
-	except Exception as e:
-		frappe.log_error(
-			f"Error traversing BOM with net_rec for item {parent_item_code}: {str(e)}",
-			"MRP Generation Error",
-		)
-
+	return parent_demands
 
-def get_stock_map_for_mrp(item_codes):
-	"""Get stock map for all items"""
-	if not item_codes:
-		return {}
 
-	if len(item_codes) == 1:
-		item_codes_tuple = (next(iter(item_codes)),)
+def get_parent_demand_entry(parent_item_code, bom_name, parent_net_order_rec, ratio, child_is_buffer):
+	parent_net_order_rec = flt(parent_net_order_rec)
+	if child_is_buffer:
+		# Buffer child: parent demand is not added (they use TOG + Qualified Demand calculation)
+		parent_demand = {
+			"applied": False,
+			"reason": f"Buffer item - parent demand ignored (from net_order_rec: {parent_net_order_rec})",
+		}
 	else:
-		item_codes_tuple = tuple(item_codes)
-
-	bin_rows = frappe.db.sql(
-		"""
-		SELECT item_code, SUM(actual_qty) as stock
-		FROM `tabBin`
-		WHERE item_code IN %s
-		GROUP BY item_code
-		""",
-		(item_codes_tuple,),
-		as_dict=True,
-	)
-
-	return {d.item_code: flt(d.stock) for d in bin_rows}
-
-
-def get_wip_map_for_mrp():
-	"""Get WIP (Work In Progress) map - sum of (qty - produced_qty) from Work Order (where status is not Completed or Cancelled)
-	for ALL items (all-time data)
-
-	Note: We use only Work Order WIP to avoid double-counting, as work_order_qty in Sales Order Items
-	typically reflects the same Work Order quantity. We calculate remaining quantity as qty - produced_qty.
-
-	This function now checks Production Plan Settings to determine which method to use:
-	- If "from_work_order" is checked: uses Work Order based calculation (existing logic)
-	- If "from_production_plan" is checked: uses Production Plan based calculation (new logic)
-	"""
-	# Get Production Plan Settings
-	try:
-		settings = frappe.get_single("Production planning settings")
-	except Exception:
-		# If settings don't exist, default to work order method
-		settings = frappe._dict({"from_work_order": 1, "from_production_plan": 0})
-
-	wip_map = {}
-
-	# Check which method is selected
-	if settings.get("from_work_order"):
-		# Existing logic: Get WIP from Work Order (qty - produced_qty) - only for Work Orders that are not Completed or Cancelled
-		wip_rows_wo = frappe.db.sql(
-			"""
-			SELECT
-				wo.production_item as item_code,
-				SUM(GREATEST(0, IFNULL(wo.qty, 0) - IFNULL(wo.produced_qty, 0))) as wip_qty
-			FROM
-				`tabWork Order` wo
-			WHERE
-				wo.status NOT IN ('Completed', 'Cancelled')
-				AND wo.docstatus = 1
-			GROUP BY
-				wo.production_item
-			""",
-			as_dict=True,
-		)
-
-		# Build WIP map from Work Orders only
-		for row in wip_rows_wo:
-			item_code = row.item_code
-			wip_map[item_code] = flt(row.wip_qty)
-
-	elif settings.get("from_production_plan"):
-		# New logic: Get WIP from Production Plan
-		# Get all Production Plans
-		production_plans = frappe.get_all("Production Plan", filters={"docstatus": 1}, fields=["name"])
-
-		for pp in production_plans:
-			pp_name = pp.name
-
-			# Get Production Plan document to access po_items child table
-			try:
-				pp_doc = frappe.get_doc("Production Plan", pp_name)
-
-				# Check if po_items child table exists
-				if hasattr(pp_doc, "po_items") and pp_doc.po_items:
-					# Iterate through each item in po_items
-					for po_item in pp_doc.po_items:
-						item_code = po_item.item_code
-						planned_qty = flt(po_item.planned_qty) if po_item.planned_qty else 0
-
-						if not item_code:
-							continue
-
-						# Get all submitted Finished Weight documents linked to this Production Plan
-						# Get individual documents with their finish_weight values for breakdown
-						finished_weight_docs = frappe.db.sql(
-							"""
-							SELECT name, finish_weight
-							FROM `tabFinish Weight`
-							WHERE production_plan = %s
-							AND docstatus = 1
-							AND item_code = %s
-							ORDER BY name
-							""",
-							(pp_name, item_code),
-							as_dict=True,
-						)
-
-						total_finished_from_fw = sum(flt(doc.finish_weight) for doc in finished_weight_docs)
-
-						# Get all submitted Bright Bar Production documents linked to this Production Plan
-						# Get individual documents with their fg_weight values for breakdown
-						bright_bar_production_docs = frappe.db.sql(
-							"""
-							SELECT name, fg_weight
-							FROM `tabBright Bar Production`
-							WHERE production_plan = %s
-							AND docstatus = 1
-							AND finished_good = %s
-							ORDER BY name
-							""",
-							(pp_name, item_code),
-							as_dict=True,
-						)
-
-						total_finished_from_bbp = sum(
-							flt(doc.fg_weight) for doc in bright_bar_production_docs
-						)
-
-						# Total finished = finish_weight + fg_weight
-						total_finished = total_finished_from_fw + total_finished_from_bbp
-
-						# Calculate WIP: planned_qty - sum of all finish_weight and fg_weight
-						wip_qty = max(0, planned_qty - total_finished)  # Ensure non-negative
-
-						# Build WIP calculation breakdown
-						breakdown_lines = []
-						breakdown_lines.append("=" * 80)
-						breakdown_lines.append(f"WIP Calculation Breakdown (MRP Generation)")
-						breakdown_lines.append("=" * 80)
-						breakdown_lines.append(f"Production Plan: {pp_name}")
-						breakdown_lines.append(f"Item Code: {item_code}")
-						breakdown_lines.append(f"Planned Quantity: {planned_qty}")
-						breakdown_lines.append("")
-						breakdown_lines.append("Finish Weight Documents:")
-						if finished_weight_docs:
-							for fw_doc in finished_weight_docs:
-								breakdown_lines.append(
-									f"  - {fw_doc.name}: finish_weight = {flt(fw_doc.finish_weight)}"
-								)
-							breakdown_lines.append(f"  Total from Finish Weight: {total_finished_from_fw}")
-						else:
-							breakdown_lines.append("  (No Finish Weight documents found)")
-							breakdown_lines.append("  Total from Finish Weight: 0")
-						breakdown_lines.append("")
-						breakdown_lines.append("Bright Bar Production Documents:")
-						if bright_bar_production_docs:
-							for bbp_doc in bright_bar_production_docs:
-								breakdown_lines.append(
-									f"  - {bbp_doc.name}: fg_weight = {flt(bbp_doc.fg_weight)}"
-								)
-							breakdown_lines.append(
-								f"  Total from Bright Bar Production: {total_finished_from_bbp}"
-							)
-						else:
-							breakdown_lines.append("  (No Bright Bar Production documents found)")
-							breakdown_lines.append("  Total from Bright Bar Production: 0")
-						breakdown_lines.append("")
-						breakdown_lines.append(
-							f"Total Finished: {total_finished_from_fw} + {total_finished_from_bbp} = {total_finished}"
-						)
-						breakdown_lines.append(
-							f"WIP Calculation: Planned Qty - Total Finished = {planned_qty} - {total_finished} = {wip_qty}"
-						)
-						breakdown_lines.append("=" * 80)
-
-						# Log the breakdown
-						breakdown_str = "\n".join(breakdown_lines)
-						print(breakdown_str)
-						frappe.log_error(
-							breakdown_str,
-							"WIP Calculation Breakdown (MRP Generation)",
-						)
-
-						# Add to wip_map (sum if item_code already exists from another production plan)
-						if item_code in wip_map:
-							wip_map[item_code] += wip_qty
-						else:
-							wip_map[item_code] = wip_qty
-
-			except Exception as e:
-				frappe.log_error(
-					f"Error processing Production Plan {pp_name} in get_wip_map_for_mrp: {str(e)}",
-					"MRP Generation WIP Calculation Error",
-				)
-				continue
-
-	return wip_map
-
-
-def get_open_so_map_for_mrp():
-	"""Get Open SO map - sum of max(0, qty - delivered_qty) from Sales Order Items
-	IMPORTANT: This calculates OPEN SO (qty - delivered_qty), NOT total SO (qty).
-	Open SO = Sales Orders with delivery_date <= today (only those with delivery date today or in the past).
-	Total SO = All Sales Orders regardless of delivery date (not used here).
-	For each Sales Order Item, if delivered_qty >= qty (over-delivered), treat as 0.
-	This ensures over-delivery on one SO doesn't reduce open quantity of another SO.
-	"""
-	from frappe.utils import today
-
-	today_date = today()
-
-	so_rows = frappe.db.sql(
-		"""
-		SELECT
-			soi.item_code,
-			SUM(GREATEST(0, soi.qty - IFNULL(soi.delivered_qty, 0))) as so_qty
-		FROM
-			`tabSales Order` so
-		INNER JOIN
-			`tabSales Order Item` soi ON soi.parent = so.name
-		WHERE
-			so.status NOT IN ('Stopped', 'On Hold', 'Closed', 'Cancelled', 'Completed')
-			AND so.docstatus = 1
-			AND IFNULL(soi.delivery_date, '1900-01-01') <= %s
-		GROUP BY
-			soi.item_code
-		""",
-		(today_date,),
-		as_dict=True,
-	)
-
-	return {d.item_code: flt(d.so_qty) for d in so_rows}
-
-
-def get_qualified_demand_map_for_mrp():
-	"""Get qualified demand map for ALL items
-	Qualified Demand = Open SO quantity where delivery_date <= today
-	Open SO = max(0, qty - delivered_qty) (quantity left to deliver)
-	For each Sales Order Item, if delivered_qty >= qty (over-delivered), treat as 0.
-	This ensures over-delivery on one SO doesn't reduce open quantity of another SO.
-	"""
-	from frappe.utils import today
-
-	today_date = today()
-
-	so_rows = frappe.db.sql(
-		"""
-		SELECT
-			soi.item_code,
-			SUM(GREATEST(0, soi.qty - IFNULL(soi.delivered_qty, 0))) as so_qty
-		FROM
-			`tabSales Order` so
-		INNER JOIN
-			`tabSales Order Item` soi ON soi.parent = so.name
-		WHERE
-			so.status NOT IN ('Stopped', 'On Hold', 'Closed', 'Cancelled', 'Completed')
-			AND so.docstatus = 1
-			AND IFNULL(soi.delivery_date, '1900-01-01') <= %s
-		GROUP BY
-			soi.item_code
-		""",
-		(today_date,),
-		as_dict=True,
-	)
-
-	return {d.item_code: flt(d.so_qty) for d in so_rows}
-
-
-def get_mrq_map_for_mrp():
-	"""Get MRQ (Material Request Quantity) map - sum of (qty - ordered_qty) from Material Request Items
-	for all items (only Material Requests with status 'Pending' or 'Partially Ordered')
-	"""
-	# Get Material Requests with status 'Pending' or 'Partially Ordered'
-	mrq_rows = frappe.db.sql(
-		"""
-		SELECT
-			mri.item_code,
-			SUM(mri.qty - IFNULL(mri.ordered_qty, 0)) as mrq_qty
-		FROM
-			`tabMaterial Request` mr
-		INNER JOIN
-			`tabMaterial Request Item` mri ON mri.parent = mr.name
-		WHERE
-			mr.docstatus = 1
-			AND mr.status IN ('Pending', 'Partially Ordered')
-		GROUP BY
-			mri.item_code
-		""",
-		as_dict=True,
-	)
+		parent_demand = {
+			"applied": True,
+			"reason": f"From parent {parent_item_code} (Net Order Qty: {parent_net_order_rec}) × (Qty per unit: {flt(ratio):.4f})",
+		}
 
-	return {d.item_code: flt(d.mrq_qty) for d in mrq_rows}
+	return {
+		"parent_item": parent_item_code,
+		"bom_name": bom_name,
+		"demand_qty": parent_net_order_rec * flt(ratio),
+		**parent_demand,
+	}
 
 
-def get_open_po_map_for_mrp():
-	"""Get Open PO (Purchase Order) map - sum of (qty - received_qty) from Purchase Order Items
-	for all items. If (qty - received_qty) is negative for a particular PO, treat it as 0.
-	Only includes submitted Purchase Orders that are not cancelled.
-	"""
-	# Get all Purchase Order Items with their qty and received_qty
-	po_rows = frappe.db.sql(
-		"""
-		SELECT
-			poi.item_code,
-			poi.qty,
-			IFNULL(poi.received_qty, 0) as received_qty
-		FROM
-			`tabPurchase Order` po
-		INNER JOIN
-			`tabPurchase Order Item` poi ON poi.parent = po.name
-		WHERE
-			po.docstatus = 1
-			AND po.status NOT IN ('Cancelled', 'Closed')
-		""",
-		as_dict=True,
-	)
-
-	# Calculate open_po for each item
-	# For each PO item: if (qty - received_qty) < 0, treat as 0, otherwise use (qty - received_qty)
-	open_po_map = {}
-	for row in po_rows:
-		item_code = row.item_code
-		qty = flt(row.qty)
-		received_qty = flt(row.received_qty)
-		open_qty = max(0, qty - received_qty)  # If negative, treat as 0
-
-		if item_code in open_po_map:
-			open_po_map[item_code] += open_qty
-		else:
-			open_po_map[item_code] = open_qty
+def get_detailed_info(item_code, plan_row, parent_demands):
+	"""Breakdown input of one item from its plan row (see mrp_plan.PLAN_INPUT_FIELDS)"""
+	buffer_flag = plan_row.get("buffer_flag") or "Non-Buffer"
+	info = {
+		"item_code": item_code,
+		"buffer_flag": buffer_flag,
+		"is_buffer": buffer_flag == "Buffer",
+		"item_type": plan_row.get("item_type"),
+		"sku_type": plan_row.get("sku_type"),
+		"parent_demands": parent_demands,
+		"total_parent_demand": flt(plan_row.get("parent_demand")),
+		"calculation_breakdown": "",
+	}
+	for fieldname in (*mrp_plan.PLAN_INPUT_FIELDS, "initial_order_rec", "final_order_rec", "net_order_rec"):
+		info[fieldname] = flt(plan_row.get(fieldname))
 
-	return open_po_map
+	return info
 
 
 def build_calculation_breakdown(info, parent_demand_map):
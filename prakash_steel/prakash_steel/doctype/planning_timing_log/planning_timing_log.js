@@ -0,0 +1,8 @@
+// Copyright (c) 2026, beetashoke chakraborty and contributors
+// For license information, please see license.txt
+
+// frappe.ui.form.on("Planning Timing Log", {
+// 	refresh(frm) {
+
+// 	},
+// });
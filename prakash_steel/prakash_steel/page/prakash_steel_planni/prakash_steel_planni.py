@@ -9,7 +9,7 @@ from frappe.utils import flt
 
 def calculate_sku_type(buffer_flag, item_type):
 	"""
-	Same mapping logic as calculate_sku_type in po_recomendation_for_psp.py
+	Same mapping logic as calculate_sku_type in utils/planning_kernel.py
 	buffer_flag: 'Buffer' or 'Non-Buffer'
 	item_type: 'FG', 'INT', 'RAW'
 	"""
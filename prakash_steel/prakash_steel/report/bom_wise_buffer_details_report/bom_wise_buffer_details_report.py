@@ -3,7 +3,7 @@
 
 import frappe
 from frappe.utils import flt
-from prakash_steel.utils.lead_time import calculate_decoupled_lead_time, get_default_bom
+from prakash_steel.utils.bom_graph import get_cached_bom_graph
 
 
 @frappe.whitelist()
@@ -88,6 +88,7 @@ def get_columns():
 			"fieldtype": "Float",
 			"width": 120,
 		},
+		{"fieldname": "cumulative_qty", "label": "Qty per Unit", "fieldtype": "Float", "width": 110},
 		{"fieldname": "custom_buffer_flag", "label": "Buffer Flag", "fieldtype": "Data", "width": 100},
 		{
 			"fieldname": "buffer_img",
@@ -115,112 +116,86 @@ def get_columns():
 	]
 
 
-def get_all_items_recursively(bom_name, parent_item=None, level=0, visited_boms=None, item_groups_cache=None):
+def get_bom_lines(bom_name):
 	"""
-	Recursively get all items from a BOM and its nested BOMs.
+	(BOM item, [(BOM Item item_code, qty per unit of the BOM item)] in idx order) of one BOM
+	in a single query, None if it doesn't exist
+	"""
+	rows = frappe.db.sql(
+		"""
+		SELECT b.item, bi.item_code, bi.qty, b.quantity
+		FROM `tabBOM` b
+		LEFT JOIN `tabBOM Item` bi ON bi.parent = b.name AND bi.parenttype = 'BOM'
+		WHERE b.name = %s
+		ORDER BY bi.idx
+		""",
+		(bom_name,),
+	)
+	if not rows:
+		return None
+
+	# Same normalization as the BOM graph: a quantity of zero or less counts as one
+	return rows[0][0], [
+		(item_code, flt(qty) / (flt(quantity) if flt(quantity) > 0 else 1))
+		for _item, item_code, qty, quantity in rows
+		if item_code
+	]
 
-	Args:
-		bom_name: BOM name to process
-		parent_item: Parent item code (for hierarchy tracking)
-		level: Current nesting level (0 = top level)
-		visited_boms: Set of visited BOMs to prevent circular references
-		item_groups_cache: Dict to cache item_group lookups (for performance)
 
-	Returns:
-		list: List of dicts with item information including level, parent, and has_children flag
+def get_all_items_recursively(bom_name, child_lines, parent_item=None, level=1, bom_graph=None):
 	"""
-	if visited_boms is None:
-		visited_boms = set()
+	Explode a BOM and the default BOMs nested below it, depth first in BOM order.
 
-	if item_groups_cache is None:
-		item_groups_cache = {}
+	The nested levels come from the preloaded BOM graph instead of one BOM document per
+	level. Raw materials are never exploded, and a BOM is expanded only the first time it
+	is reached, which also stops circular references. A row's cumulative_qty is the product
+	of the BOM ratios on its path, i.e. how much of it one unit of the main item takes.
 
-	# Prevent circular references
-	if bom_name in visited_boms:
-		return []
+	Args:
+		bom_name: BOM being exploded
+		child_lines: (item_code, qty per unit) of its lines (see get_bom_lines)
+		parent_item: Item the BOM makes (for hierarchy tracking)
+		level: Level of its lines (0 = the main item)
+		bom_graph: BOMGraph to explode with (default: the cached one)
 
-	visited_boms.add(bom_name)
+	Returns:
+		list: List of dicts with item information including level, parent, cumulative_qty and
+		has_children flag
+	"""
+	bom_graph = bom_graph or get_cached_bom_graph()
+	visited_boms = {bom_name}
 	items_list = []
 
-	try:
-		# Get BOM document
-		bom_doc = frappe.get_doc("BOM", bom_name)
-
-		# Collect all item codes in this BOM for batch lookup
-		bom_item_codes = [bom_item.item_code for bom_item in bom_doc.items]
-
-		# Batch fetch item_groups for all items in this BOM (optimization)
-		if bom_item_codes:
-			items_to_fetch = [code for code in bom_item_codes if code not in item_groups_cache]
-			if items_to_fetch:
-				if len(items_to_fetch) == 1:
-					item_codes_tuple = (items_to_fetch[0],)
-				else:
-					item_codes_tuple = tuple(items_to_fetch)
-
-				item_group_data = frappe.db.sql(
-					"""
-					SELECT name, item_group
-					FROM `tabItem`
-					WHERE name IN %s
-					""",
-					(item_codes_tuple,),
-					as_dict=True,
-				)
-
-				# Cache the results
-				for item in item_group_data:
-					item_groups_cache[item.name] = item.item_group
-
-		# Process each item in the BOM
-		for bom_item in bom_doc.items:
-			item_code = bom_item.item_code
-
-			# Optimization: Check item_group first - Raw Materials don't have BOMs
-			# This avoids unnecessary BOM lookup for raw materials
-			item_group = item_groups_cache.get(item_code)
-
-			# Check if this item has a BOM (nested BOM)
-			has_children = False
-			child_bom = None
-
-			# If it's not a Raw Material, check for BOM
-			if not (item_group and item_group == "Raw Material"):
-				child_bom = get_default_bom(item_code)
-				if child_bom and child_bom not in visited_boms:
-					has_children = True
-
-			# Add this item to the list
-			items_list.append(
-				{
-					"item_code": item_code,
-					"parent_item": parent_item,
-					"level": level,
-					"has_children": has_children,
-				}
-			)
-
-			# If it has children, recursively get items from child BOM
-			if has_children and child_bom:
-				# Recursively get items from child BOM
-				# Pass the same visited_boms and cache to prevent cycles and reuse cache
-				child_items = get_all_items_recursively(
-					child_bom,
-					parent_item=item_code,
-					level=level + 1,
-					visited_boms=visited_boms,  # Same set to prevent cycles
-					item_groups_cache=item_groups_cache,  # Reuse cache for performance
-				)
-				items_list.extend(child_items)
-
-	except frappe.DoesNotExistError:
-		frappe.log_error(f"BOM {bom_name} does not exist", "BOM Wise Buffer Details Report Error")
-	except Exception as e:
-		frappe.log_error(
-			f"Error processing BOM {bom_name}: {str(e)}",
-			"BOM Wise Buffer Details Report Error",
+	stack = [(iter(child_lines), parent_item, level, 1.0)]
+	while stack:
+		children, parent_item, level, parent_qty = stack[-1]
+		line = next(children, None)
+		if line is None:
+			stack.pop()
+			continue
+
+		item_code, ratio = line
+		cumulative_qty = parent_qty * ratio
+
+		child_bom = bom_graph.get_bom(item_code) if bom_graph.explodes(item_code) else None
+		has_children = bool(child_bom) and child_bom not in visited_boms
+
+		items_list.append(
+			{
+				"item_code": item_code,
+				"parent_item": parent_item,
+				"level": level,
+				"cumulative_qty": cumulative_qty,
+				"has_children": has_children,
+			}
 		)
 
+		# Its children come right after it, before its next sibling
+		if has_children:
+			visited_boms.add(child_bom)
+			grandchildren = [(child, ratio) for child, _qty, ratio in bom_graph.get_children(item_code)]
+			stack.append((iter(grandchildren), item_code, level + 1, cumulative_qty))
+
 	return items_list
 
 
@@ -234,20 +209,14 @@ def get_data(filters):
 	bom_name = filters.get("bom")
 
 	try:
-		# Get BOM document to get the main item
-		bom_doc = frappe.get_doc("BOM", bom_name)
-		main_item_code = bom_doc.item if bom_doc.item else None
+		bom_lines = get_bom_lines(bom_name)
+		if bom_lines is None:
+			raise frappe.DoesNotExistError
 
-		# Check if main item has children (has a BOM with items)
-		main_item_has_children = False
-		if main_item_code:
-			# Check if main item has a BOM (it should, since we're viewing its BOM)
-			# But also check if the BOM has items
-			if bom_doc.items and len(bom_doc.items) > 0:
-				main_item_has_children = True
+		main_item_code, child_lines = bom_lines
 
 		# Get all items recursively (including nested BOMs)
-		all_items_hierarchy = get_all_items_recursively(bom_name, parent_item=main_item_code, level=1)
+		all_items_hierarchy = get_all_items_recursively(bom_name, child_lines, parent_item=main_item_code)
 
 		# Add main item as first row if it exists
 		if main_item_code:
@@ -257,7 +226,8 @@ def get_data(filters):
 					"item_code": main_item_code,
 					"parent_item": None,
 					"level": 0,
-					"has_children": main_item_has_children,
+					"cumulative_qty": 1.0,
+					"has_children": bool(child_lines),
 				},
 			)
 
@@ -265,29 +235,21 @@ def get_data(filters):
 			return data
 
 		# Get unique item codes (including main item)
-		unique_item_codes = list(set([item["item_code"] for item in all_items_hierarchy]))
+		unique_item_codes = list({item["item_code"] for item in all_items_hierarchy})
 
-		if not unique_item_codes:
-			return data
-
-		# Query all items at once using SQL for better performance
-		if len(unique_item_codes) == 1:
-			item_codes_tuple = (unique_item_codes[0],)
-		else:
-			item_codes_tuple = tuple(unique_item_codes)
-
-		# Query items from database (we don't need custom_decoupled_lead_time since we calculate it)
+		# Decoupled lead time is read as stored; it is kept up to date when BOMs and items change
 		items_data = frappe.db.sql(
 			"""
-			SELECT 
+			SELECT
 				name as item_code,
 				item_name,
 				lead_time_days,
+				custom_decoupled_lead_time,
 				custom_buffer_flag
 			FROM `tabItem`
 			WHERE name IN %s
 			""",
-			(item_codes_tuple,),
+			(tuple(unique_item_codes),),
 			as_dict=True,
 		)
 
@@ -304,19 +266,6 @@ def get_data(filters):
 			item_data = items_dict.get(item_code)
 
 			if item_data:
-				# Always calculate custom_decoupled_lead_time dynamically (like the UI does)
-				try:
-					decoupled_lead_time = calculate_decoupled_lead_time(item_code)
-				except Exception as e:
-					frappe.log_error(
-						f"Error calculating decoupled lead time for item {item_code}: {str(e)}",
-						"BOM Wise Buffer Details Report Error",
-					)
-					decoupled_lead_time = 0
-
-				# Ensure it's a float
-				decoupled_lead_time = flt(decoupled_lead_time or 0)
-
 				# Get buffer flag
 				buffer_flag = item_data.get("custom_buffer_flag") or "No"
 
@@ -327,7 +276,8 @@ def get_data(filters):
 					"item_code": item_code,
 					"item_name": item_data.get("item_name") or "",
 					"lead_time_days": flt(item_data.get("lead_time_days") or 0),
-					"custom_decoupled_lead_time": decoupled_lead_time,
+					"cumulative_qty": item_info["cumulative_qty"],
+					"custom_decoupled_lead_time": flt(item_data.get("custom_decoupled_lead_time") or 0),
 					"custom_buffer_flag": buffer_flag,
 					# Set image path if item is buffer
 					"buffer_img": "/files/toc.jpeg" if is_buffer else "",
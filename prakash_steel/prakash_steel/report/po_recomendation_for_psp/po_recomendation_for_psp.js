@@ -338,6 +338,30 @@ frappe.query_reports["PO Recomendation for PSP"] = {
 			options: "Item",
 			width: "80",
 		},
+		{
+			fieldname: "use_mrp_plan",
+			label: __("Use Latest MRP Run"),
+			fieldtype: "Check",
+			default: 0,
+			width: "80",
+			description: __(
+				"Take order recommendations from the latest MRP run when it is up to date, instead of planning again"
+			),
+		},
+		{
+			fieldname: "force_refresh",
+			label: __("Force Refresh"),
+			fieldtype: "Check",
+			default: 0,
+			width: "80",
+		},
+		{
+			fieldname: "profile",
+			label: __("Profile"),
+			fieldtype: "Check",
+			default: 0,
+			width: "80",
+		},
 	],
 
 	onload: function (report) {
@@ -419,6 +443,76 @@ frappe.query_reports["PO Recomendation for PSP"] = {
 				report.page.fields_dict.sku_type.refresh();
 			}
 		});
+
+		// Result cache counters for administrators
+		if (frappe.user.has_role("System Manager")) {
+			report.page.add_inner_button(__("Cache Statistics"), function () {
+				frappe.call({
+					method: "prakash_steel.prakash_steel.report.po_recomendation_for_psp.po_recomendation_for_psp.get_result_cache_stats",
+					callback: function (r) {
+						if (!r.message) return;
+						let stats = r.message;
+						let total = stats.hits + stats.misses;
+						let hit_rate = total ? ((stats.hits * 100) / total).toFixed(1) : 0;
+						frappe.msgprint({
+							title: __("Report Cache Statistics"),
+							message: __("Hits: {0}<br>Misses: {1}<br>Hit Rate: {2}%<br>Entries: {3} / {4}", [
+								stats.hits,
+								stats.misses,
+								hit_rate,
+								stats.entries,
+								stats.max_entries,
+							]),
+						});
+					},
+				});
+			});
+		}
+
+		// Bulk Material Requests: multi-line documents created by a background job
+		if (frappe.model.can_create("Material Request")) {
+			report.page.add_inner_button(__("Create Material Requests (Bulk)"), function () {
+				frappe.prompt(
+					[
+						{
+							fieldname: "group_by",
+							label: __("One Material Request Per"),
+							fieldtype: "Select",
+							options: [
+								{ value: "item_group", label: __("Item Group") },
+								{ value: "", label: __("Line Limit Only") },
+							],
+							default: "item_group",
+						},
+						{
+							fieldname: "max_lines_per_request",
+							label: __("Max Lines Per Material Request"),
+							fieldtype: "Int",
+							default: 50,
+						},
+					],
+					function (values) {
+						frappe.call({
+							method: "prakash_steel.prakash_steel.report.po_recomendation_for_psp.po_recomendation_for_psp.create_material_requests_in_bulk",
+							args: {
+								filters: report.get_filter_values(),
+								group_by: values.group_by,
+								max_lines_per_request: values.max_lines_per_request,
+							},
+							callback: function (r) {
+								if (r.message && r.message.error) {
+									frappe.msgprint(__("Error: {0}", [r.message.error]));
+								} else if (r.message && r.message.job_id) {
+									track_bulk_material_request_job(report, r.message.job_id);
+								}
+							},
+						});
+					},
+					__("Create Material Requests (Bulk)"),
+					__("Create")
+				);
+			});
+		}
 		// Hide buttons: Debug PO Calculation, Create Material Request, Create Material Request Automatically
 		// These buttons are commented out but can be uncommented later if needed
 		/*
@@ -711,4 +805,94 @@ frappe.query_reports["PO Recomendation for PSP"] = {
 
 		return value;
 	},
-};
\ No newline at end of file
+};
+function track_bulk_material_request_job(report, job_id) {
+	const title = __("Creating Material Requests");
+	const event = "prakash_steel_bulk_material_request_progress";
+	let finished = false;
+	let timer = null;
+
+	const show_status = function (progress) {
+		if (finished || !progress) return;
+
+		if (progress.status === "completed" || progress.status === "failed") {
+			finished = true;
+			clearTimeout(timer);
+			frappe.realtime.off(event, on_progress);
+			frappe.hide_progress();
+
+			if (progress.status === "failed") {
+				frappe.msgprint({
+					title: __("Job Failed"),
+					message: __("Error: {0}", [progress.error || __("Unknown error")]),
+					indicator: "red",
+				});
+				return;
+			}
+
+			const result = progress.result || {};
+			let message = __("Created {0} Material Request(s) for {1} item(s)", [
+				result.success_count || 0,
+				result.line_count || 0,
+			]);
+			if (result.error_count) {
+				message += "<br><br>" + __("Failed: {0}", [result.error_count]);
+				message += "<br>" + (result.errors || []).join("<br>");
+			}
+			frappe.msgprint({
+				title: __("Material Requests Created"),
+				message: message,
+				indicator: result.error_count ? "orange" : "green",
+			});
+			report.refresh();
+		} else if (progress.status === "running" && progress.total) {
+			frappe.show_progress(
+				title,
+				progress.current,
+				progress.total,
+				__("Material Request {0} of {1} - Success: {2}, Failed: {3}", [
+					progress.current,
+					progress.total,
+					progress.success_count || 0,
+					progress.error_count || 0,
+				])
+			);
+		} else {
+			frappe.show_progress(title, 0, 100, __("Preparing recommendations..."));
+		}
+	};
+
+	const on_progress = function (progress) {
+		if (progress && progress.job_id === job_id) {
+			show_status(progress);
+		}
+	};
+
+	// Progress is pushed over realtime to the users following the job. One status call
+	// after subscribing covers a job that finished before the subscription existed.
+	frappe.realtime.on(event, on_progress);
+	timer = setTimeout(function () {
+		if (finished) return;
+		finished = true;
+		frappe.realtime.off(event, on_progress);
+		frappe.hide_progress();
+		frappe.msgprint({
+			title: __("Timeout"),
+			message: __("Job is taking longer than expected. Please check the 'RQ Job' list (Job ID: {0}).", [
+				job_id,
+			]),
+			indicator: "orange",
+		});
+	}, 1800000);
+
+	show_status({ status: "queued" });
+	frappe.call({
+		method: "prakash_steel.prakash_steel.report.po_recomendation_for_psp.po_recomendation_for_psp.get_bulk_material_request_status",
+		args: { job_id: job_id },
+		callback: function (r) {
+			if (r.message && (r.message.status === "completed" || r.message.status === "failed")) {
+				show_status(r.message);
+			}
+		},
+	});
+}
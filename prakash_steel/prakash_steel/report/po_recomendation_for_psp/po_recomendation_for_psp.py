@@ -9,148 +9,76 @@
 import math
 import frappe
 from frappe import _
-from frappe.utils import flt
-from prakash_steel.utils.lead_time import get_default_bom
+from frappe.utils import cint, flt
+from prakash_steel.utils import job_progress, mrp_plan
+from prakash_steel.utils.material_request import (
+	DEFAULT_MAX_LINES_PER_REQUEST,
+	GROUP_BY_OPTIONS,
+	create_material_requests_in_bulk as create_material_requests_for_items,
+)
+from prakash_steel.utils.planning_kernel import PlanningInputs, calculate_sku_type
+from prakash_steel.utils.profiling import PhaseProfiler, is_profiling_enabled
+from prakash_steel.utils.report_cache import ReportResultCache, get_data_fingerprint
 
+# execute() results keyed by normalized filters + data fingerprint
+RESULT_CACHE = ReportResultCache("po_recomendation_for_psp", max_entries=50)
 
-def calculate_sku_type(buffer_flag, item_type):
-	"""Calculate SKU type based on buffer flag and item type
-	Same mapping logic as calculate_sku_type in item.js
-	buffer_flag: 'Buffer' or 'Non-Buffer'
-	item_type: 'FG', 'INT', 'RM'
-	"""
-	if not item_type:
-		return None
-
-	is_buffer = buffer_flag == "Buffer"
-
-	if item_type == "FG":
-		return "FGMTA" if is_buffer else "FGMTO"
-	elif item_type == "INT":
-		return "SFGMTA" if is_buffer else "SFGMTO"
-	elif item_type == "RAW":
-		return "PTA" if is_buffer else "PTO"
-
-	return None
-
+MATERIAL_REQUEST_COMPANY = "Prakash Steel Products Pvt Ltd"
+MATERIAL_REQUEST_WAREHOUSE = "Bright Bar Unit - PSPL"
 
-def calculate_net_order_recommendation(base_order_rec, moq, batch_size):
-	"""Calculate net order recommendation by applying MOQ/Batch Size logic"""
-	base_order_rec = flt(base_order_rec)
-	moq = flt(moq)
-	batch_size = flt(batch_size)
 
-	if base_order_rec <= 0:
-		return 0
+def execute(filters=None, planning_inputs=None):
+	# Opt-in per-phase timings ("profile" filter or site config), shown in the
+	# message area and appended to Planning Timing Log
+	profiler = PhaseProfiler(is_profiling_enabled(filters))
 
-	if moq > 0:
-		if moq < base_order_rec:
-			net_order_rec = base_order_rec
+	columns = get_columns(filters)
+	try:
+		if planning_inputs is not None:
+			data = get_data(filters, planning_inputs, profiler)
 		else:
-			net_order_rec = moq
-	elif batch_size > 0:
-		net_order_rec = math.ceil(base_order_rec / batch_size) * batch_size
-	else:
-		net_order_rec = base_order_rec
+			data = get_cached_data(filters, profiler)
+	finally:
+		profiler.stop()
 
-	return max(0, flt(net_order_rec))
+	if not profiler.phases:
+		return columns, data
 
+	profiler.save_log("PO Recomendation for PSP", filters, len(data))
+	return columns, data, profiler.get_message()
 
-def calculate_initial_order_recommendation(
-	item_code,
-	item_buffer_map,
-	item_tog_map,
-	item_sku_type_map,
-	stock_map,
-	wip_map,
-	open_so_map,
-	qualified_demand_map,
-	open_po_map,
-):
-	"""Calculate initial order recommendation for a single item (before BOM traversal)"""
-	buffer_flag = item_buffer_map.get(item_code, "Non-Buffer")
-	is_buffer = buffer_flag == "Buffer"
-
-	stock = flt(stock_map.get(item_code, 0))
-	wip = flt(wip_map.get(item_code, 0))
 
-	if is_buffer:
-		tog = flt(item_tog_map.get(item_code, 0))
-		qualified_demand = flt(qualified_demand_map.get(item_code, 0))
-		sku_type = item_sku_type_map.get(item_code)
-		open_po = flt(open_po_map.get(item_code, 0))
-
-		if sku_type in ["PTA", "SFGMTA"]:
-			order_rec = max(0, tog + qualified_demand - stock - wip - open_po)
-		else:
-			order_rec = max(0, tog + qualified_demand - stock - wip)
-	else:
-		qualified_demand = flt(qualified_demand_map.get(item_code, 0))
-		sku_type = item_sku_type_map.get(item_code)
-		open_po = flt(open_po_map.get(item_code, 0))
-
-		if sku_type in ["PTO", "BOTO"]:
-			order_rec = max(0, qualified_demand - stock - wip - open_po)
-		else:
-			order_rec = max(0, qualified_demand - stock - wip)
-
-	return order_rec
-
-
-def calculate_final_order_recommendation(
-	item_code,
-	item_buffer_map,
-	item_tog_map,
-	item_sku_type_map,
-	stock_map,
-	wip_map,
-	open_so_map,
-	qualified_demand_map,
-	open_po_map,
-	mrq_map,
-	parent_demand_map,
-):
-	"""Calculate final order recommendation for a single item (after BOM traversal)"""
-	buffer_flag = item_buffer_map.get(item_code, "Non-Buffer")
-	is_buffer = buffer_flag == "Buffer"
-
-	stock = flt(stock_map.get(item_code, 0))
-	wip = flt(wip_map.get(item_code, 0))
-	mrq = flt(mrq_map.get(item_code, 0))
-
-	if is_buffer:
-		tog = flt(item_tog_map.get(item_code, 0))
-		qualified_demand = flt(qualified_demand_map.get(item_code, 0))
-		sku_type = item_sku_type_map.get(item_code)
-		open_po = flt(open_po_map.get(item_code, 0))
+def get_cached_data(filters=None, profiler=None):
+	"""
+	Serve get_data from the result cache.
 
-		if sku_type in ["BOTA", "PTA"]:
-			base_order_rec = tog + qualified_demand - stock - wip - open_po
-		else:
-			base_order_rec = tog + qualified_demand - stock - wip
+	The cache key combines the normalized filters with a fingerprint of the planning
+	doctypes, so any stock, order or BOM change produces a fresh computation. The
+	"force_refresh" filter bypasses the lookup and replaces the cached entry.
+	"""
+	filters = filters or {}
+	profiler = profiler or PhaseProfiler()
 
-		order_rec = max(0, base_order_rec - mrq)
-	else:
-		qualified_demand = flt(qualified_demand_map.get(item_code, 0))
-		parent_demand = flt(parent_demand_map.get(item_code, 0))
-		requirement = qualified_demand + parent_demand
-		sku_type = item_sku_type_map.get(item_code)
-		open_po = flt(open_po_map.get(item_code, 0))
+	profiler.start_phase("Result cache lookup")
+	key = RESULT_CACHE.make_key(filters, get_data_fingerprint())
 
-		if sku_type in ["PTO", "BOTO"]:
-			base_order_rec = requirement - stock - wip - open_po
-		else:
-			base_order_rec = requirement - stock - wip
+	if not cint(filters.get("force_refresh")):
+		data = RESULT_CACHE.get(key)
+		if data is not None:
+			return data
 
-		order_rec = max(0, base_order_rec - mrq)
+	data = get_data(filters, profiler=profiler)
 
-	return order_rec
+	profiler.start_phase("Result cache store")
+	RESULT_CACHE.set(key, data)
+	return data
 
 
-def execute(filters=None):
-	columns = get_columns(filters)
-	data = get_data(filters)
-	return columns, data
+@frappe.whitelist()
+def get_result_cache_stats():
+	"""Hit/miss counters and size of the report's result cache"""
+	frappe.only_for("System Manager")
+	return RESULT_CACHE.get_stats()
 
 
 def save_daily_on_hand_colour():
@@ -161,9 +89,16 @@ def save_daily_on_hand_colour():
 	all_data = []
 	seen_item_codes = {}
 
+	# Both views are computed from the same snapshot, so the global maps are aggregated once
+	try:
+		planning_inputs = PlanningInputs()
+	except Exception:
+		frappe.log_error(frappe.get_traceback(), "save_daily_on_hand_colour: loading planning inputs failed")
+		return
+
 	try:
 		filters_purchase = {"purchase": 1, "buffer_flag": 1}
-		_, data_purchase = execute(filters_purchase)
+		data_purchase = execute(filters_purchase, planning_inputs)[1]
 		if data_purchase:
 			for row in data_purchase:
 				item_code = row.get("item_code")
@@ -174,7 +109,7 @@ def save_daily_on_hand_colour():
 
 	try:
 		filters_sell = {"sell": 1, "buffer_flag": 1}
-		_, data_sell = execute(filters_sell)
+		data_sell = execute(filters_sell, planning_inputs)[1]
 		if data_sell:
 			for row in data_sell:
 				item_code = row.get("item_code")
@@ -511,11 +446,19 @@ def get_columns(filters=None):
 	return columns
 
 
-def get_data(filters=None):
-	"""Get buffer items and calculate PO recommendations"""
+def get_data(filters=None, planning_inputs=None, profiler=None):
+	"""
+	Get buffer items and calculate PO recommendations.
+
+	planning_inputs is an optional PlanningInputs snapshot; callers rendering several
+	views pass the same one so the global maps are only loaded once. profiler is an
+	optional PhaseProfiler that records the time spent in each step.
+	"""
 	if not filters:
 		filters = {}
 
+	profiler = profiler or PhaseProfiler()
+
 	purchase = filters.get("purchase", 0)
 	sell = filters.get("sell", 0)
 	buffer_flag = filters.get("buffer_flag", 0)
@@ -550,42 +493,25 @@ def get_data(filters=None):
 			# Sell + Non-Buffer: FGMTO (FG without buffer), SFGMTO (INT without buffer)
 			allowed_sku_types = ["FGMTO", "SFGMTO"]
 
-	# Get sales order qty map (all-time data) - for ALL items
-	so_qty_map = get_sales_order_qty_map(filters)
+	if planning_inputs is None:
+		planning_inputs = PlanningInputs(profiler)
 
-	# Get qualified demand map (Open SO with delivery_date <= today)
-	qualified_demand_map = get_qualified_demand_map(filters)
+	profiler.start_phase("Prepare view")
 
-	# Get items from database based on buffer_flag filter
-	if buffer_flag:
-		# Get buffer items
-		items_query = """
-			SELECT name as item_code
-			FROM `tabItem`
-			WHERE custom_buffer_flag = 'Buffer'
-		"""
-	else:
-		# Get non-buffer items
-		items_query = """
-			SELECT name as item_code
-			FROM `tabItem`
-			WHERE custom_buffer_flag != 'Buffer' OR custom_buffer_flag IS NULL
-		"""
+	# Qualified demand = Open SO with delivery_date <= today
+	qualified_demand_map = planning_inputs.qualified_demand_map
 
-	items_result = frappe.db.sql(items_query, as_dict=1)
-	item_codes = set(item.item_code for item in items_result)
+	# Items of the selected view (buffer or non-buffer)
+	item_codes = planning_inputs.get_view_item_codes(buffer_flag)
 
 	# Filter sales order items to only selected items (buffer or non-buffer)
-	so_qty_map = {k: v for k, v in so_qty_map.items() if k in item_codes}
-
-	# Get WIP map (qty from Work Order)
-	wip_map = get_wip_map(filters)
-
-	# Get MRQ map (Material Request Quantity - sum of qty from Material Request Items)
-	mrq_map = get_mrq_map(filters)
+	so_qty_map = {k: v for k, v in planning_inputs.so_qty_map.items() if k in item_codes}
 
-	# Get Open PO map (Purchase Order Quantity - sum of (qty - received_qty) from Purchase Order Items)
-	open_po_map = get_open_po_map()
+	# WIP (Work Order / Production Plan), MRQ (open Material Request qty) and
+	# Open PO (Purchase Order qty - received qty)
+	wip_map = planning_inputs.wip_map
+	mrq_map = planning_inputs.mrq_map
+	open_po_map = planning_inputs.open_po_map
 
 	# Get items with purchase orders (especially important for BOTA, PTA, BOTO, PTO items)
 	# These items use open_po instead of open_so, so they need to be shown even without sales orders
@@ -601,267 +527,27 @@ def get_data(filters=None):
 		return []
 
 	# Get stock for all selected items (including those with purchase orders)
-	initial_stock_map = get_stock_map(all_items_to_process)
-
-	# Create remaining_stock map - tracks available stock after allocations
-	# Start with initial stock, will be reduced as items are allocated
-	remaining_stock = dict(initial_stock_map)
-
-	# Calculate PO recommendations with BOM traversal
-	# po_recommendations will contain ALL items (buffer and non-buffer)
-	po_recommendations = {}
-	item_groups_cache = {}  # Cache item_group to check for Raw Material
-
-	# Initialize parent demand map (for non-buffer items)
-	# This will accumulate parent demands from all BOMs
-	parent_demand_map = {}  # item_code -> total parent demand from all BOMs
-
-	# Process each selected item that has sales orders (for BOM traversal)
-	# Sort by item_code for consistent processing order
-	items_with_so = set(so_qty_map.keys())
-	for item_code in sorted(items_with_so):
-		so_qty = flt(so_qty_map.get(item_code, 0))
-		available_stock = flt(remaining_stock.get(item_code, 0))
-
-		# Calculate PO recommendation for this item using remaining stock
-		required_qty = max(0, so_qty - available_stock)
-
-		# Allocate stock: reduce remaining stock by what we use
-		allocated = min(so_qty, available_stock)
-		remaining_stock[item_code] = available_stock - allocated
-
-		# Add to PO recommendations
-		if item_code in po_recommendations:
-			po_recommendations[item_code] += required_qty
-		else:
-			po_recommendations[item_code] = required_qty
-
-		# If we need to produce this item, traverse BOM
-		# Only traverse if stock is insufficient (required_qty > 0)
-		if required_qty > 0:
-			traverse_bom_for_po(
-				item_code,
-				required_qty,
-				po_recommendations,
-				remaining_stock,
-				set(),
-				item_groups_cache,
-				level=0,
-			)
-
-	# Calculate parent demand for non-buffer items
-	# Same logic as mrp_genaration.py lines 160-457
-	# Step 1: Calculate initial order recommendations for all items
-	# First, get all item details needed for calculation
-	all_item_codes = all_items_to_process
-
-	# Get item details maps
-	if all_item_codes:
-		if len(all_item_codes) == 1:
-			all_items_tuple = (next(iter(all_item_codes)),)
-		else:
-			all_items_tuple = tuple(all_item_codes)
-
-		items_details_all = frappe.db.sql(
-			"""
-			SELECT
-				i.name as item_code,
-				i.custom_buffer_flag as buffer_flag,
-				i.custom_item_type as item_type,
-				i.safety_stock as tog
-			FROM
-				`tabItem` i
-			WHERE
-				i.name IN %s
-			""",
-			(all_items_tuple,),
-			as_dict=1,
-		)
-
-		item_buffer_map_all = {}
-		item_sku_type_map_all = {}
-		item_tog_map_all = {}
-		for item in items_details_all:
-			item_buffer_map_all[item.item_code] = item.buffer_flag or "Non-Buffer"
-			item_sku_type_map_all[item.item_code] = calculate_sku_type(
-				item.buffer_flag or "Non-Buffer", item.item_type
-			)
-			item_tog_map_all[item.item_code] = flt(item.tog or 0)
-	else:
-		item_buffer_map_all = {}
-		item_sku_type_map_all = {}
-		item_tog_map_all = {}
-
-	# Step 1: Calculate initial order recommendations for all items
-	initial_order_recommendations = {}
-	for item_code in all_item_codes:
-		order_rec = calculate_initial_order_recommendation(
-			item_code,
-			item_buffer_map_all,
-			item_tog_map_all,
-			item_sku_type_map_all,
-			initial_stock_map,
-			wip_map,
-			so_qty_map,
-			qualified_demand_map,
-			open_po_map,
-		)
-		initial_order_recommendations[item_code] = order_rec
-
-	# Step 1.5: Apply MOQ/Batch Size to initial order recommendations
-	initial_net_order_recommendations = {}
-
-	# Get MOQ and Batch Size for all items
-	if all_item_codes:
-		items_moq_batch_data = frappe.db.sql(
-			"""
-			SELECT
-				i.name as item_code,
-				i.min_order_qty as moq,
-				i.custom_batch_size as batch_size
-			FROM
-				`tabItem` i
-			WHERE
-				i.name IN %s
-			""",
-			(all_items_tuple,),
-			as_dict=1,
-		)
-
-		moq_map_all = {item.item_code: flt(item.moq or 0) for item in items_moq_batch_data}
-		batch_size_map_all = {item.item_code: flt(item.batch_size or 0) for item in items_moq_batch_data}
-
-		for item_code in all_item_codes:
-			base_order_rec = initial_order_recommendations.get(item_code, 0)
-			moq = moq_map_all.get(item_code, 0)
-			batch_size = batch_size_map_all.get(item_code, 0)
-			net_order_rec = calculate_net_order_recommendation(base_order_rec, moq, batch_size)
-			initial_net_order_recommendations[item_code] = net_order_rec
-	else:
-		moq_map_all = {}
-		batch_size_map_all = {}
-
-	# Step 2: Traverse BOMs starting from items with net order recommendations > 0 (first traversal)
-
-	# First traversal - accumulate parent demands
-	items_to_process = [
-		(item_code, net_order_rec)
-		for item_code, net_order_rec in initial_net_order_recommendations.items()
-		if net_order_rec > 0
-	]
-	items_to_process.sort(key=lambda x: x[0])
-
-	for item_code, net_order_rec in items_to_process:
-		traverse_bom_for_parent_demand_simple(
-			item_code,
-			net_order_rec,
-			parent_demand_map,
-			set(),
-			item_groups_cache,
-			item_buffer_map_all,
-			level=0,
-		)
+	stock_map = planning_inputs.stock_map
+	initial_stock_map = {
+		item_code: stock_map[item_code] for item_code in all_items_to_process if item_code in stock_map
+	}
 
-	# Step 3: Calculate final order recommendations for all items (with parent demands from first traversal)
-	final_order_recommendations = {}
-	for item_code in all_item_codes:
-		# Use qualified_demand_map instead of so_qty_map (all-time Open SO)
-		# The function already uses qualified_demand_map internally for non-buffer items
-		order_rec = calculate_final_order_recommendation(
-			item_code,
-			item_buffer_map_all,
-			item_tog_map_all,
-			item_sku_type_map_all,
-			initial_stock_map,
-			wip_map,
-			qualified_demand_map,  # Pass qualified_demand_map as open_so_map (function uses qualified_demand for non-buffer items)
-			qualified_demand_map,
-			open_po_map,
-			mrq_map,
-			parent_demand_map,
-		)
-		final_order_recommendations[item_code] = order_rec
-
-	# Step 4: Apply MOQ/Batch Size to get net order recommendations
-	net_order_recommendations = {}
-	for item_code in all_item_codes:
-		base_order_rec = final_order_recommendations.get(item_code, 0)
-		moq = moq_map_all.get(item_code, 0)
-		batch_size = batch_size_map_all.get(item_code, 0)
-		net_order_rec = calculate_net_order_recommendation(base_order_rec, moq, batch_size)
-		net_order_recommendations[item_code] = net_order_rec
-
-	# Step 5: Re-traverse BOMs using net_order_recommendations to update child requirements
-	parent_demand_map_net = {}
-
-	# Get items with net_order_recommendation > 0
-	items_with_net_rec = [
-		(item_code, net_rec) for item_code, net_rec in net_order_recommendations.items() if net_rec > 0
-	]
-	items_with_net_rec.sort(key=lambda x: x[0])
-
-	# Use a single shared visited_items set for the entire Step 5 traversal
-	global_visited_items = set()
-
-	# Re-traverse BOMs using net_order_recommendations
-	# Only traverse items that haven't been visited yet (to avoid duplicates)
-	for item_code, net_rec in items_with_net_rec:
-		if item_code not in global_visited_items:
-			traverse_bom_for_parent_demand(
-				item_code,
-				net_rec,
-				parent_demand_map_net,
-				global_visited_items,
-				item_groups_cache,
-				qualified_demand_map,  # Use qualified_demand_map instead of so_qty_map (all-time Open SO)
-				initial_stock_map,
-				wip_map,
-				open_po_map,
-				mrq_map,
-				moq_map_all,
-				batch_size_map_all,
-				item_buffer_map_all,
-				item_sku_type_map_all,
-				lambda item_code: None,  # Helper function - maps already populated above
-				level=0,
-			)
+	# Every default BOM is held in memory; the child rows below are built from this graph
+	bom_graph = planning_inputs.bom_graph
 
-	# Step 6: Recalculate final order recommendations with updated parent demands
-	# Then apply MOQ/Batch Size again to get final net_order_recommendations
-	# Same logic as mrp_genaration.py Step 6
-	final_order_recommendations_updated = {}
-	net_order_recommendations_final = {}
-
-	for item_code in all_item_codes:
-		# Recalculate with updated parent demands
-		# Use qualified_demand_map instead of so_qty_map (all-time Open SO)
-		# This ensures non-buffer items use qualified_demand (Open SO with delivery_date <= today)
-		# The function already uses qualified_demand_map internally for non-buffer items, so we can pass it as open_so_map
-		order_rec = calculate_final_order_recommendation(
-			item_code,
-			item_buffer_map_all,
-			item_tog_map_all,
-			item_sku_type_map_all,
-			initial_stock_map,
-			wip_map,
-			qualified_demand_map,  # Pass qualified_demand_map as open_so_map (function uses qualified_demand for non-buffer items)
-			qualified_demand_map,
-			open_po_map,
-			mrq_map,
-			parent_demand_map_net,  # Use updated parent demands
-		)
-		final_order_recommendations_updated[item_code] = order_rec
+	# Parent demands and order recommendations come from the latest MRP run when asked to and
+	# it was planned over the current data, else from the planning kernel's full plan of the
+	# snapshot (computed once for all views rendered from it, exactly as MRP Generation plans)
+	plan_outputs = get_mrp_plan_outputs(filters, profiler)
+	if plan_outputs is None:
+		profiler.start_phase("Planning pass")
+		plan_outputs = planning_inputs.full_plan
 
-		# Apply MOQ/Batch Size again
-		moq = moq_map_all.get(item_code, 0)
-		batch_size = batch_size_map_all.get(item_code, 0)
-		net_order_rec = calculate_net_order_recommendation(order_rec, moq, batch_size)
-		net_order_recommendations_final[item_code] = net_order_rec
+	parent_demand_map = plan_outputs.parent_demand
+	final_order_recommendations = plan_outputs.final_order_rec
+	net_order_recommendations = plan_outputs.net_order_rec
 
-	# Use the final updated values for the report
-	final_order_recommendations = final_order_recommendations_updated
-	net_order_recommendations = net_order_recommendations_final
-	parent_demand_map = parent_demand_map_net  # Use updated parent demands
+	profiler.start_phase("Child row building")
 
 	# Show ALL selected items, including those with purchase orders
 	# Items like BOTA, PTA, BOTO, PTO use open_po instead of open_so, so we need to include items with purchase orders
@@ -871,69 +557,49 @@ def get_data(filters=None):
 	if not all_items_to_show:
 		return []
 
-	# Build item codes tuple for SQL
-	if len(all_items_to_show) == 1:
-		item_codes_tuple = (next(iter(all_items_to_show)),)
-	else:
-		item_codes_tuple = tuple(all_items_to_show)
-
 	# Get item details with TOG, TOY, TOR, Item Type, Batch Size, MOQ, and Item Name
 	# Include buffer or non-buffer items based on filter
-	if buffer_flag:
-		items_data = frappe.db.sql(
-			"""
-			SELECT
-				i.name as item_code,
-				i.item_name,
-				i.safety_stock as tog,
-				i.custom_top_of_yellow as toy,
-				i.custom_top_of_red as tor,
-				i.custom_item_type as item_type,
-				i.custom_batch_size as batch_size,
-				i.min_order_qty as moq,
-				i.custom_buffer_flag as buffer_flag
-			FROM
-				`tabItem` i
-			WHERE
-				i.name IN %s
-				AND i.custom_buffer_flag = 'Buffer'
-			""",
-			(item_codes_tuple,),
-			as_dict=1,
-		)
-	else:
-		items_data = frappe.db.sql(
-			"""
-			SELECT
-				i.name as item_code,
-				i.item_name,
-				i.safety_stock as tog,
-				i.custom_top_of_yellow as toy,
-				i.custom_top_of_red as tor,
-				i.custom_item_type as item_type,
-				i.custom_batch_size as batch_size,
-				i.min_order_qty as moq,
-				i.custom_buffer_flag as buffer_flag
-			FROM
-				`tabItem` i
-			WHERE
-				i.name IN %s
-				AND (i.custom_buffer_flag != 'Buffer' OR i.custom_buffer_flag IS NULL)
-			""",
-			(item_codes_tuple,),
-			as_dict=1,
-		)
+	items_data = [
+		planning_inputs.items[item_code]
+		for item_code in all_items_to_show
+		if item_code in planning_inputs.items
+		and (planning_inputs.items[item_code].buffer_flag == "Buffer") == bool(buffer_flag)
+	]
 
 	# Create a map for quick lookup
 	items_map = {item.item_code: item for item in items_data}
 
 	# Build final data list with all items (buffer or non-buffer based on filter)
-	# Track total stock for display (we'll fetch it once per child item)
+	# Track total stock for display (looked up once per child item)
 	# Track total WIP/Open PO for each child item (for FIFO allocation)
 	# FIFO allocation will be applied AFTER sorting, in display order
-	child_stock_map = {}
 	child_wip_open_po_map = {}
 
+	# Collect the BOM children of every item to show, then enrich all of them at once
+	child_items_map = {}
+	for item_code in all_items_to_show:
+		bom_quantity = flt(bom_graph.get_bom_quantity(item_code)) or 1.0
+		child_items_map[item_code] = [
+			(child_item_code, flt(child_bom_qty), bom_quantity)
+			for child_item_code, child_bom_qty, _normalized_bom_qty in bom_graph.get_children(item_code)
+		]
+
+	all_child_item_codes = {
+		child_item_code
+		for child_items in child_items_map.values()
+		for child_item_code, _child_bom_qty, _bom_quantity in child_items
+	}
+	child_details_map = {}
+	child_stock_map = {}
+	for child_item_code in all_child_item_codes:
+		child_item = planning_inputs.items.get(child_item_code)
+		if child_item:
+			child_details_map[child_item_code] = {
+				"item_type": child_item.item_type,
+				"sku_type": calculate_sku_type(child_item.buffer_flag or "Non-Buffer", child_item.item_type),
+			}
+		child_stock_map[child_item_code] = math.ceil(flt(stock_map.get(child_item_code, 0)))
+
 	data = []
 	for item_code in sorted(all_items_to_show):
 		item_info = items_map.get(item_code, {})
@@ -1121,73 +787,18 @@ def get_data(filters=None):
 			}
 		)
 
-		# Get BOM for this item to find child items
-		bom = get_default_bom(item_code)
-		child_items = []
-
-		if bom:
-			try:
-				bom_doc = frappe.get_doc("BOM", bom)
-				bom_quantity = flt(bom_doc.quantity) or 1.0
-				# Get all child items from BOM
-				for bom_item in bom_doc.items:
-					child_item_code = bom_item.item_code
-					child_bom_qty = flt(bom_item.qty)
-					# Store BOM qty and BOM quantity so we can apply the correct ratio later
-					child_items.append(
-						{
-							"item_code": child_item_code,
-							"bom_qty": child_bom_qty,
-							"bom_quantity": bom_quantity,
-						}
-					)
-			except Exception as e:
-				frappe.log_error(
-					f"Error getting BOM {bom} for item {item_code}: {str(e)}", "PO Recommendation Error"
-				)
+		# Child items come from the in-memory BOM graph; their item type, buffer flag and
+		# stock were loaded for every item up front, so building rows does no queries
+		child_items = child_items_map.get(item_code, [])
 
 		# If item has child items, create a row for each child
 		# Otherwise, create one row with empty child columns
 		if child_items:
-			for child_item_info in child_items:
-				child_item_code = child_item_info["item_code"]
-				child_bom_qty = flt(child_item_info.get("bom_qty", 0))
-				child_bom_quantity = flt(child_item_info.get("bom_quantity", 1.0)) or 1.0
-
-				# Fetch child item details
-				child_item_type = None
-				child_sku_type = None
-				child_stock = 0
-
-				try:
-					child_item_doc = frappe.get_doc("Item", child_item_code)
-					child_item_type = child_item_doc.get("custom_item_type")
-					child_buffer_flag = child_item_doc.get("custom_buffer_flag") or "Non-Buffer"
-					# Calculate child SKU type using the existing function
-					child_sku_type = calculate_sku_type(child_buffer_flag, child_item_type)
-
-					# Get child item stock from Bin table (only fetch once per child item)
-					if child_item_code not in child_stock_map:
-						stock_data = frappe.db.sql(
-							"""
-							SELECT SUM(actual_qty) as stock
-							FROM `tabBin`
-							WHERE item_code = %s
-							""",
-							(child_item_code,),
-							as_dict=True,
-						)
-						total_stock = math.ceil(
-							flt(stock_data[0].stock if stock_data and stock_data[0].stock else 0)
-						)
-						child_stock_map[child_item_code] = total_stock
-
-					# Use total stock for display
-					child_stock = child_stock_map.get(child_item_code, 0)
-				except Exception as e:
-					frappe.log_error(
-						f"Error fetching child item {child_item_code}: {str(e)}", "PO Recommendation Error"
-					)
+			for child_item_code, child_bom_qty, child_bom_quantity in child_items:
+				child_details = child_details_map.get(child_item_code, {})
+				child_item_type = child_details.get("item_type")
+				child_sku_type = child_details.get("sku_type")
+				child_stock = child_stock_map.get(child_item_code, 0)
 
 				# Child Requirement should be based on the parent's net order recommendation
 				# multiplied by the BOM ratio (BOM Item Qty / BOM Qty), same as in mrp_genaration.py.
@@ -1284,6 +895,8 @@ def get_data(filters=None):
 
 	sku_filtered_data.sort(key=get_on_hand_status_value)
 
+	profiler.start_phase("FIFO allocation")
+
 	# Apply FIFO Stock Allocation and Shortage AFTER sorting (in display order)
 	# IMPORTANT: These dictionaries are GLOBAL across ALL parent items
 	# This ensures that child stock/WIP/Open PO is allocated globally using FIFO,
@@ -1318,28 +931,8 @@ def get_data(filters=None):
 		if child_item_code:
 			# Initialize remaining stock if not already done
 			if child_item_code not in remaining_child_stock_fifo:
-				# Get total stock for this child item
-				if child_item_code in child_stock_map:
-					remaining_child_stock_fifo[child_item_code] = child_stock_map[child_item_code]
-				else:
-					# Fetch stock if not in map
-					try:
-						stock_data = frappe.db.sql(
-							"""
-							SELECT SUM(actual_qty) as stock
-							FROM `tabBin`
-							WHERE item_code = %s
-							""",
-							(child_item_code,),
-							as_dict=True,
-						)
-						total_stock = int(
-							flt(stock_data[0].stock if stock_data and stock_data[0].stock else 0)
-						)
-						child_stock_map[child_item_code] = total_stock
-						remaining_child_stock_fifo[child_item_code] = total_stock
-					except Exception:
-						remaining_child_stock_fifo[child_item_code] = 0
+				# Total stock for this child item (collected for every child while building rows)
+				remaining_child_stock_fifo[child_item_code] = child_stock_map.get(child_item_code, 0)
 
 			# Initialize remaining WIP/Open PO if not already done
 			if child_item_code not in remaining_child_wip_open_po_fifo:
@@ -1657,7 +1250,7 @@ def create_material_request(item_code, qty):
 	schedule_date = add_days(today(), 7)
 
 	# Set company name
-	company = "Prakash Steel Products Pvt Ltd"
+	company = MATERIAL_REQUEST_COMPANY
 
 	# Verify company exists
 	if not frappe.db.exists("Company", company):
@@ -1665,7 +1258,7 @@ def create_material_request(item_code, qty):
 
 	try:
 		# Set warehouse
-		warehouse = "Bright Bar Unit - PSPL"
+		warehouse = MATERIAL_REQUEST_WAREHOUSE
 
 		# Verify warehouse exists
 		if not frappe.db.exists("Warehouse", warehouse):
@@ -1720,7 +1313,7 @@ def create_material_requests_automatically(filters=None):
 		filters = {}
 
 	# Get report data
-	_, data = execute(filters)
+	data = execute(filters)[1]
 
 	if not data:
 		return {
@@ -1785,479 +1378,127 @@ def create_material_requests_automatically(filters=None):
 	}
 
 
-def get_stock_map(item_codes):
-	"""Get stock map for all items"""
-	if not item_codes:
-		return {}
-
-	if len(item_codes) == 1:
-		item_codes_tuple = (next(iter(item_codes)),)
-	else:
-		item_codes_tuple = tuple(item_codes)
-
-	bin_rows = frappe.db.sql(
-		"""
-		SELECT item_code, SUM(actual_qty) as stock
-		FROM `tabBin`
-		WHERE item_code IN %s
-		GROUP BY item_code
-		""",
-		(item_codes_tuple,),
-		as_dict=True,
-	)
+@frappe.whitelist()
+def create_material_requests_in_bulk(
+	filters=None, group_by="item_group", max_lines_per_request=DEFAULT_MAX_LINES_PER_REQUEST
+):
+	"""
+	Queue creation of multi-line Material Requests for all items with net_po_recommendation > 0.
 
-	return {d.item_code: flt(d.stock) for d in bin_rows}
-
-
-def get_sales_order_qty_map(filters):
-	"""Get sales order qty map for all items"""
-	so_rows = frappe.db.sql(
-		"""
-		SELECT
-			soi.item_code,
-			SUM(soi.qty - IFNULL(soi.delivered_qty, 0)) as so_qty
-		FROM
-			`tabSales Order` so
-		INNER JOIN
-			`tabSales Order Item` soi ON soi.parent = so.name
-		WHERE
-			so.status NOT IN ('Stopped', 'On Hold', 'Closed', 'Cancelled', 'Completed')
-			AND so.docstatus = 1
-		GROUP BY
-			soi.item_code
-		""",
-		as_dict=True,
-	)
+	Items are grouped into one Material Request per item group (group_by="item_group")
+	or into plain chunks (empty group_by), with at most max_lines_per_request lines each.
+	Returns the job_id; throttled progress is pushed to the caller as
+	job_progress.BULK_MATERIAL_REQUEST_PROGRESS_EVENT realtime events, and
+	get_bulk_material_request_status returns the outcome of a finished job.
+	"""
+	frappe.has_permission("Material Request", "create", throw=True)
 
-	return {d.item_code: flt(d.so_qty) for d in so_rows}
-
-
-def get_qualified_demand_map(filters):
-	"""Get qualified demand map for all items"""
-	from frappe.utils import today
-
-	today_date = today()
-
-	so_rows = frappe.db.sql(
-		"""
-		SELECT
-			soi.item_code,
-			SUM(soi.qty - IFNULL(soi.delivered_qty, 0)) as so_qty
-		FROM
-			`tabSales Order` so
-		INNER JOIN
-			`tabSales Order Item` soi ON soi.parent = so.name
-		WHERE
-			so.status NOT IN ('Stopped', 'On Hold', 'Closed', 'Cancelled', 'Completed')
-			AND so.docstatus = 1
-			AND IFNULL(soi.delivery_date, '1900-01-01') <= %s
-		GROUP BY
-			soi.item_code
-		""",
-		(today_date,),
-		as_dict=True,
+	if isinstance(filters, str):
+		filters = frappe.parse_json(filters)
+
+	group_by = group_by or None
+	if group_by not in GROUP_BY_OPTIONS:
+		return {"error": f"Cannot group Material Requests by '{group_by}'"}
+
+	job = frappe.enqueue(
+		"prakash_steel.prakash_steel.report.po_recomendation_for_psp.po_recomendation_for_psp._create_material_requests_in_bulk_worker",
+		queue="long",
+		timeout=1800,
+		job_name=f"PO Recommendation Bulk Material Requests - {frappe.session.user}",
+		filters=filters or {},
+		group_by=group_by,
+		max_lines_per_request=cint(max_lines_per_request),
 	)
+	job_progress.add_job_follower(job.id)
 
-	return {d.item_code: flt(d.so_qty) for d in so_rows}
-
-
-def get_wip_map(filters):
-	"""Get WIP map based on Production Plan Settings"""
-	try:
-		settings = frappe.get_single("Production planning settings")
-	except Exception:
-		settings = frappe._dict({"from_work_order": 1, "from_production_plan": 0})
-
-	wip_map = {}
-
-	if settings.get("from_work_order"):
-		wip_rows_wo = frappe.db.sql(
-			"""
-			SELECT
-				wo.production_item as item_code,
-				SUM(GREATEST(0, IFNULL(wo.qty, 0) - IFNULL(wo.produced_qty, 0))) as wip_qty
-			FROM
-				`tabWork Order` wo
-			WHERE
-				wo.status NOT IN ('Completed', 'Cancelled')
-				AND wo.docstatus = 1
-			GROUP BY
-				wo.production_item
-			""",
-			as_dict=True,
-		)
-
-		for row in wip_rows_wo:
-			item_code = row.item_code
-			wip_map[item_code] = flt(row.wip_qty)
-
-	elif settings.get("from_production_plan"):
-		production_plans = frappe.get_all("Production Plan", filters={"docstatus": 1}, fields=["name"])
-
-		for pp in production_plans:
-			pp_name = pp.name
-
-			try:
-				pp_doc = frappe.get_doc("Production Plan", pp_name)
-
-				if hasattr(pp_doc, "po_items") and pp_doc.po_items:
-					for po_item in pp_doc.po_items:
-						item_code = po_item.item_code
-						planned_qty = flt(po_item.planned_qty) if po_item.planned_qty else 0
-
-						if not item_code:
-							continue
-
-						finished_weight_docs = frappe.db.sql(
-							"""
-							SELECT name, finish_weight
-							FROM `tabFinish Weight`
-							WHERE production_plan = %s
-							AND docstatus = 1
-							AND item_code = %s
-							ORDER BY name
-							""",
-							(pp_name, item_code),
-							as_dict=True,
-						)
-
-						total_finished_from_fw = sum(flt(doc.finish_weight) for doc in finished_weight_docs)
-						bright_bar_production_docs = frappe.db.sql(
-							"""
-							SELECT name, fg_weight
-							FROM `tabBright Bar Production`
-							WHERE production_plan = %s
-							AND docstatus = 1
-							AND finished_good = %s
-							ORDER BY name
-							""",
-							(pp_name, item_code),
-							as_dict=True,
-						)
-
-						total_finished_from_bbp = sum(
-							flt(doc.fg_weight) for doc in bright_bar_production_docs
-						)
-						total_finished = total_finished_from_fw + total_finished_from_bbp
-						wip_qty = max(0, planned_qty - total_finished)
-
-						if item_code in wip_map:
-							wip_map[item_code] += wip_qty
-						else:
-							wip_map[item_code] = wip_qty
-
-			except Exception as e:
-				frappe.log_error(
-					f"Error processing Production Plan {pp_name} in get_wip_map: {str(e)}",
-					"PO Recommendation WIP Calculation Error",
-				)
-				continue
+	return {
+		"job_id": job.id,
+		"status": "queued",
+		"message": "Bulk Material Request creation has been queued.",
+	}
 
-	return wip_map
-
-
-def get_mrq_map(filters):
-	"""Get MRQ map for all items"""
-	# Get Material Requests with status 'Pending' or 'Partially Ordered'
-	mrq_rows = frappe.db.sql(
-		"""
-		SELECT
-			mri.item_code,
-			SUM(GREATEST(0, mri.qty - IFNULL(mri.ordered_qty, 0))) as mrq_qty
-		FROM
-			`tabMaterial Request` mr
-		INNER JOIN
-			`tabMaterial Request Item` mri ON mri.parent = mr.name
-		WHERE
-			mr.docstatus = 1
-			AND mr.status IN ('Pending', 'Partially Ordered')
-		GROUP BY
-			mri.item_code
-		""",
-		as_dict=True,
-	)
 
-	return {d.item_code: flt(d.mrq_qty) for d in mrq_rows}
-
-
-def get_open_po_map():
-	"""Get Open PO map for all items"""
-	po_rows = frappe.db.sql(
-		"""
-		SELECT
-			poi.item_code,
-			poi.qty,
-			IFNULL(poi.received_qty, 0) as received_qty
-		FROM
-			`tabPurchase Order` po
-		INNER JOIN
-			`tabPurchase Order Item` poi ON poi.parent = po.name
-		WHERE
-			po.docstatus = 1
-			AND po.status NOT IN ('Cancelled', 'Closed')
-		""",
-		as_dict=True,
+@frappe.whitelist()
+def get_bulk_material_request_status(job_id):
+	"""Outcome of a finished create_material_requests_in_bulk job, else its last progress"""
+	if not job_id:
+		return {"error": "Job ID is required"}
+
+	result = frappe.cache().get_value(f"bulk_mr_result_{job_id}")
+	if result:
+		return result
+
+	progress = frappe.cache().get_value(f"bulk_mr_progress_{job_id}")
+	return {"status": "running", **progress} if progress else {"status": "queued"}
+
+
+def _create_material_requests_in_bulk_worker(filters=None, group_by="item_group", max_lines_per_request=None):
+	"""Background job behind create_material_requests_in_bulk"""
+	job = frappe.get_job()
+	job_id = job.id if job else None
+	progress = job_progress.JobProgress(
+		job_progress.BULK_MATERIAL_REQUEST_PROGRESS_EVENT,
+		job_id,
+		progress_cache_key=f"bulk_mr_progress_{job_id}",
 	)
 
-	open_po_map = {}
-	for row in po_rows:
-		item_code = row.item_code
-		qty = flt(row.qty)
-		received_qty = flt(row.received_qty)
-		open_qty = max(0, qty - received_qty)
-
-		if item_code in open_po_map:
-			open_po_map[item_code] += open_qty
-		else:
-			open_po_map[item_code] = open_qty
-
-	return open_po_map
-
-
-def traverse_bom_for_parent_demand_simple(
-	parent_item_code,
-	parent_net_order_qty,
-	parent_demand_map,
-	visited_items,
-	item_groups_cache,
-	item_buffer_map,
-	level=0,
-):
-	"""Simple BOM traversal for first pass - accumulates parent demands"""
-	if parent_item_code in visited_items:
-		return
-
-	visited_items.add(parent_item_code)
-
-	item_group = item_groups_cache.get(parent_item_code)
-	if not item_group:
-		try:
-			item_doc = frappe.get_doc("Item", parent_item_code)
-			item_group = item_doc.get("item_group")
-			item_groups_cache[parent_item_code] = item_group
-		except:
-			item_group = None
-
-	if item_group == "Raw Material":
-		return
-
-	bom = get_default_bom(parent_item_code)
-	if not bom:
-		return
-
 	try:
-		bom_doc = frappe.get_doc("BOM", bom)
-		bom_quantity = flt(bom_doc.quantity)
-		if bom_quantity <= 0:
-			bom_quantity = 1.0
-
-		for bom_item in bom_doc.items:
-			child_item_code = bom_item.item_code
-			bom_item_qty = flt(bom_item.qty)
+		data = execute(filters)[1]
 
-			normalized_bom_qty = bom_item_qty / bom_quantity
-			child_required_qty = parent_net_order_qty * normalized_bom_qty
-
-			child_buffer_flag = item_buffer_map.get(child_item_code, "Non-Buffer")
-			is_child_buffer = child_buffer_flag == "Buffer"
+		# Child rows repeat their parent's item_code; request every item once
+		item_qty_map = {}
+		for row in data or []:
+			item_code = row.get("item_code")
+			qty = flt(row.get("net_po_recommendation", 0))
+			if item_code and qty > 0 and item_code not in item_qty_map:
+				item_qty_map[item_code] = qty
+
+		def update_progress(current, total, result):
+			progress.update(
+				current,
+				total,
+				success_count=result["success_count"],
+				error_count=result["error_count"],
+			)
 
-			if not is_child_buffer:
-				if child_item_code in parent_demand_map:
-					parent_demand_map[child_item_code] += child_required_qty
-				else:
-					parent_demand_map[child_item_code] = child_required_qty
-			if child_item_code not in visited_items:
-				traverse_bom_for_parent_demand_simple(
-					child_item_code,
-					child_required_qty,
-					parent_demand_map,
-					visited_items.copy(),
-					item_groups_cache,
-					item_buffer_map,
-					level + 1,
-				)
+		result = create_material_requests_for_items(
+			item_qty_map,
+			MATERIAL_REQUEST_COMPANY,
+			MATERIAL_REQUEST_WAREHOUSE,
+			group_by=group_by,
+			max_lines_per_request=max_lines_per_request,
+			material_request_type="Purchase",
+			progress_callback=update_progress,
+		)
 	except Exception as e:
-		frappe.log_error(f"Error traversing BOM for {parent_item_code}: {str(e)}", "PO Recommendation Error")
-
-
-def traverse_bom_for_parent_demand(
-	parent_item_code,
-	parent_net_order_qty,
-	parent_demand_map,
-	visited_items,
-	item_groups_cache,
-	open_so_map,
-	stock_map,
-	wip_map,
-	open_po_map,
-	mrq_map,
-	moq_map,
-	batch_size_map,
-	item_buffer_map,
-	item_sku_type_map,
-	get_item_details_func,
-	level=0,
-):
-	"""Recursively traverse BOM using net_order_recommendations"""
-	if parent_item_code in visited_items:
-		return
-
-	visited_items.add(parent_item_code)
+		frappe.log_error(frappe.get_traceback(), "Bulk Material Request Error")
+		result = {"error": str(e)}
 
-	item_group = item_groups_cache.get(parent_item_code)
-	if not item_group:
-		try:
-			item_doc = frappe.get_doc("Item", parent_item_code)
-			item_group = item_doc.get("item_group")
-			item_groups_cache[parent_item_code] = item_group
-		except:
-			item_group = None
-
-	if item_group == "Raw Material":
-		return
-
-	bom = get_default_bom(parent_item_code)
-	if not bom:
-		return
-
-	try:
-		bom_doc = frappe.get_doc("BOM", bom)
-		bom_quantity = flt(bom_doc.quantity)
-		if bom_quantity <= 0:
-			bom_quantity = 1.0
-
-		for bom_item in bom_doc.items:
-			child_item_code = bom_item.item_code
-			bom_item_qty = flt(bom_item.qty)
-
-			normalized_bom_qty = bom_item_qty / bom_quantity
-			child_required_qty = parent_net_order_qty * normalized_bom_qty
-
-			get_item_details_func(child_item_code)
-			child_buffer_flag = item_buffer_map.get(child_item_code, "Non-Buffer")
-			is_child_buffer = child_buffer_flag == "Buffer"
-
-			if not is_child_buffer:
-				if child_item_code in parent_demand_map:
-					parent_demand_map[child_item_code] += child_required_qty
-				else:
-					parent_demand_map[child_item_code] = child_required_qty
-
-				child_qualified_demand = flt(open_so_map.get(child_item_code, 0))
-				child_parent_demand = flt(parent_demand_map.get(child_item_code, 0))
-				child_requirement = child_qualified_demand + child_parent_demand
-				child_stock = flt(stock_map.get(child_item_code, 0))
-				child_wip = flt(wip_map.get(child_item_code, 0))
-				child_sku_type = item_sku_type_map.get(child_item_code)
-				child_open_po = flt(open_po_map.get(child_item_code, 0))
-				child_mrq = flt(mrq_map.get(child_item_code, 0))
-
-				if child_sku_type in ["PTO", "BOTO"]:
-					base_child_order_rec = child_requirement - child_stock - child_wip - child_open_po
-				else:
-					base_child_order_rec = child_requirement - child_stock - child_wip
-
-				child_base_order_rec = max(0, base_child_order_rec - child_mrq)
-
-				child_moq = flt(moq_map.get(child_item_code, 0))
-				child_batch_size = flt(batch_size_map.get(child_item_code, 0))
-				child_net_order_rec = calculate_net_order_recommendation(
-					child_base_order_rec, child_moq, child_batch_size
-				)
-
-				if child_net_order_rec > 0 and child_item_code not in visited_items:
-					traverse_bom_for_parent_demand(
-						child_item_code,
-						child_net_order_rec,
-						parent_demand_map,
-						visited_items.copy(),
-						item_groups_cache,
-						open_so_map,
-						stock_map,
-						wip_map,
-						open_po_map,
-						mrq_map,
-						moq_map,
-						batch_size_map,
-						item_buffer_map,
-						item_sku_type_map,
-						get_item_details_func,
-						level + 1,
-					)
+	if result.get("error"):
+		outcome = {"status": "failed", "error": result["error"]}
+	else:
+		result["errors"] = result["errors"][:10]  # Limit errors to first 10
+		outcome = {"status": "completed", "percent": 100, "result": result}
 
-	except Exception as e:
-		frappe.log_error(
-			f"Error traversing BOM for parent demand for item {parent_item_code}: {str(e)}",
-			"PO Recommendation Error",
+	# Kept for a client that subscribes after the job finished (see get_bulk_material_request_status)
+	if job_id:
+		frappe.cache().set_value(
+			f"bulk_mr_result_{job_id}", outcome, expires_in_sec=job_progress.JOB_CACHE_EXPIRY
 		)
+	progress.finish(error=outcome.get("error"), result=outcome.get("result"))
+	return result
 
 
-def traverse_bom_for_po(
-	item_code, required_qty, po_recommendations, remaining_stock, visited_items, item_groups_cache, level=0
-):
-	"""Recursively traverse BOM to calculate PO recommendations for child items"""
-	if item_code in visited_items:
-		return
-
-	visited_items.add(item_code)
-
-	item_group = item_groups_cache.get(item_code)
-	if not item_group:
-		try:
-			item_doc = frappe.get_doc("Item", item_code)
-			item_group = item_doc.get("item_group")
-			item_groups_cache[item_code] = item_group
-		except:
-			item_group = None
-
-	if item_group == "Raw Material":
-		return
-
-	bom = get_default_bom(item_code)
-	if not bom:
-		return
-
-	try:
-		bom_doc = frappe.get_doc("BOM", bom)
-
-		for bom_item in bom_doc.items:
-			child_item_code = bom_item.item_code
-			bom_qty = flt(bom_item.qty)
-			child_required_qty = required_qty * bom_qty
-			child_available_stock = flt(remaining_stock.get(child_item_code, 0))
-
-			if child_item_code not in remaining_stock:
-				stock_data = frappe.db.sql(
-					"""
-					SELECT SUM(actual_qty) as stock
-					FROM `tabBin`
-					WHERE item_code = %s
-					""",
-					(child_item_code,),
-					as_dict=True,
-				)
-				child_available_stock = flt(stock_data[0].stock if stock_data else 0)
-				remaining_stock[child_item_code] = child_available_stock
-
-			allocated = min(child_required_qty, child_available_stock)
-			remaining_stock[child_item_code] = child_available_stock - allocated
-			child_po = max(0, child_required_qty - allocated)
+def get_mrp_plan_outputs(filters, profiler):
+	"""
+	Parent demands and order recommendations of the latest MRP run, when the "use_mrp_plan"
+	filter is set and that run was planned over the current data; None otherwise.
+	"""
+	if not cint(filters.get("use_mrp_plan")):
+		return None
 
-			if child_item_code in po_recommendations:
-				po_recommendations[child_item_code] += child_po
-			else:
-				po_recommendations[child_item_code] = child_po
-
-			if child_po > 0:
-				traverse_bom_for_po(
-					child_item_code,
-					child_po,
-					po_recommendations,
-					remaining_stock,
-					visited_items.copy(),
-					item_groups_cache,
-					level + 1,
-				)
+	profiler.start_phase("Load latest MRP run")
+	if not mrp_plan.get_shared_run(mrp_plan.get_data_fingerprint()):
+		return None
 
-	except Exception as e:
-		frappe.log_error(f"Error traversing BOM for item {item_code}: {str(e)}", "PO Recommendation Error")
+	return mrp_plan.get_plan_outputs()
@@ -318,15 +318,17 @@ function update_decoupled_lead_time(frm, allow_when_dirty) {
         callback: function (r) {
             console.log("[Lead Time] Server response:", r);
 
-            if (r.message !== undefined && r.message !== null) {
+            if (r.message && r.message.decoupled_lead_time !== undefined) {
                 // Only update if value is different to avoid unnecessary updates
                 const current_value = frm.doc.custom_decoupled_lead_time;
-                const new_value = r.message;
+                const new_value = r.message.decoupled_lead_time;
 
                 console.log("[Lead Time] Calculation result:", {
                     current_value: current_value,
                     new_value: new_value,
-                    changed: current_value !== new_value
+                    changed: current_value !== new_value,
+                    lead_time_version: r.message.lead_time_version,
+                    recomputed: r.message.recomputed
                 });
 
                 if (current_value !== new_value) {
@@ -383,8 +385,10 @@ function update_decoupled_lead_time(frm, allow_when_dirty) {
                 console.warn("[Lead Time] Server returned null/undefined value");
             }
 
-            // Also call debug function to get detailed information
-            get_lead_time_debug_info(frm);
+            // The detailed trace walks the whole BOM tree; only fetch it in developer mode
+            if (frappe.boot.developer_mode) {
+                get_lead_time_debug_info(frm);
+            }
         },
         error: function (err) {
             console.error("========================================");
@@ -0,0 +1,47 @@
+# Copyright (c) 2025, beetashoke chakraborty and Contributors
+# See license.txt
+
+from frappe.tests.utils import FrappeTestCase
+
+from prakash_steel.prakash_steel.report.bom_wise_buffer_details_report.bom_wise_buffer_details_report import (
+	get_all_items_recursively,
+)
+from prakash_steel.tests.test_mrp_plan import make_graph
+
+
+class TestBOMWiseBufferDetailsReport(FrappeTestCase):
+	def test_explosion_is_depth_first_and_expands_each_bom_once(self):
+		graph = make_graph(
+			{
+				"FG": [("SFG-A", 1), ("SFG-B", 1)],
+				"SFG-A": [("INT", 2), ("RM-1", 1)],
+				"SFG-B": [("INT", 1)],
+				"INT": [("RM-2", 0.5)],
+			}
+		)
+
+		rows = get_all_items_recursively(
+			"BOM-FG", [("SFG-A", 3), ("SFG-B", 1)], parent_item="FG", bom_graph=graph
+		)
+
+		self.assertEqual(
+			[
+				(
+					row["item_code"],
+					row["parent_item"],
+					row["level"],
+					row["cumulative_qty"],
+					row["has_children"],
+				)
+				for row in rows
+			],
+			[
+				("SFG-A", "FG", 1, 3, True),
+				("INT", "SFG-A", 2, 6, True),
+				("RM-2", "INT", 3, 3, False),
+				("RM-1", "SFG-A", 2, 3, False),
+				("SFG-B", "FG", 1, 1, True),
+				# INT's BOM was already expanded under SFG-A
+				("INT", "SFG-B", 2, 1, False),
+			],
+		)
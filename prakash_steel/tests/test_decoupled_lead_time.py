@@ -0,0 +1,65 @@
+# Copyright (c) 2025, beetashoke chakraborty and Contributors
+# See license.txt
+
+from frappe.tests.utils import FrappeTestCase
+
+from prakash_steel.tests.test_mrp_plan import make_graph
+from prakash_steel.utils.decoupled_lead_time import get_changed_ancestor_lead_times, get_decoupled_lead_times
+
+
+class TestDecoupledLeadTime(FrappeTestCase):
+	def test_longest_path_stops_at_buffer_components(self):
+		graph = make_graph(
+			{
+				"FG": [("SFG-A", 1), ("SFG-B", 1)],
+				"SFG-A": [("RM-1", 1)],
+				"SFG-B": [("BUF", 1), ("RM-2", 1)],
+				"BUF": [("RM-3", 1)],
+			}
+		)
+		graph.buffer_flags[graph.item_ids["BUF"]] = 1
+		lead_time_map = {"FG": 2, "SFG-A": 3, "SFG-B": 1, "BUF": 20, "RM-1": 4, "RM-2": 5, "RM-3": 30}
+
+		values = get_decoupled_lead_times(graph, lead_time_map)
+
+		self.assertEqual(values["SFG-A"], 7)
+		self.assertEqual(values["SFG-B"], 6)
+		self.assertEqual(values["FG"], 9)
+		# A buffer item still has its own path; it just adds nothing to its parents
+		self.assertEqual(values["BUF"], 50)
+		self.assertEqual(values["RM-3"], 30)
+
+	def test_missing_items_and_bom_loops_are_skipped(self):
+		graph = make_graph({"A": [("B", 1), ("GONE", 1)], "B": [("A", 1)]})
+		graph.item_groups[graph.item_ids["B"]] = "Sub Assemblies"
+		lead_time_map = {"A": 1, "B": 2}
+
+		values = get_decoupled_lead_times(graph, lead_time_map, ["A"])
+
+		self.assertEqual(values, {"A": 3, "B": 2})
+
+	def test_ancestors_are_updated_transitively_until_unchanged(self):
+		graph = make_graph(
+			{
+				"FG-1": [("SFG", 1)],
+				"FG-2": [("SFG", 1), ("RM-2", 1)],
+				"SFG": [("INT", 1)],
+				"INT": [("RM-1", 1)],
+			}
+		)
+		lead_time_map = {"FG-1": 1, "FG-2": 1, "SFG": 2, "INT": 3, "RM-1": 4, "RM-2": 30}
+		stored_map = get_decoupled_lead_times(graph, lead_time_map)
+
+		# RM-1 takes longer: INT, SFG and FG-1 move, FG-2 stays on RM-2
+		lead_time_map["RM-1"] = 10
+		values = get_changed_ancestor_lead_times(graph, ["RM-1"], lead_time_map, stored_map)
+		self.assertEqual(values, {"RM-1": 10, "INT": 13, "SFG": 15, "FG-1": 16})
+		stored_map.update(values)
+
+		# INT turns into a buffer: its own value stays, but it no longer adds to SFG
+		graph.buffer_flags[graph.item_ids["INT"]] = 1
+		values = get_changed_ancestor_lead_times(graph, ["INT"], lead_time_map, stored_map)
+		self.assertEqual(values, {"SFG": 2, "FG-1": 3})
+		stored_map.update(values)
+
+		self.assertEqual(stored_map, get_decoupled_lead_times(graph, lead_time_map))
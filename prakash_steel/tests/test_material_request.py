@@ -0,0 +1,25 @@
+# Copyright (c) 2025, beetashoke chakraborty and Contributors
+# See license.txt
+
+from frappe.tests.utils import FrappeTestCase
+
+from prakash_steel.utils.material_request import group_material_request_lines, split_into_batches
+
+
+class TestMaterialRequest(FrappeTestCase):
+	def test_split_into_batches(self):
+		self.assertEqual(split_into_batches(16000, 400), [400] * 40)
+		self.assertEqual(split_into_batches(1000, 400), [400, 400, 200])
+		self.assertEqual(split_into_batches(300, 400), [300])
+		self.assertEqual(split_into_batches(1000, 0), [1000])
+
+	def test_batches_of_an_item_share_one_request(self):
+		lines = [
+			{"item_code": item_code, "qty": qty, "material_request_type": "Purchase"}
+			for item_code, qty in (("A", 400), ("A", 400), ("B", 50), ("A", 200))
+		]
+
+		batches = group_material_request_lines(lines, group_by="item_code")
+
+		self.assertEqual([batch["group"] for batch in batches], ["A", "B"])
+		self.assertEqual([line["qty"] for line in batches[0]["lines"]], [400, 400, 200])
@@ -0,0 +1,229 @@
+# Copyright (c) 2025, beetashoke chakraborty and Contributors
+# See license.txt
+
+import random
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import flt
+
+from prakash_steel.prakash_steel.doctype.mrp_genaration import mrp_genaration
+from prakash_steel.utils import mrp_plan, planning_kernel
+from prakash_steel.utils.bom_graph import RAW_MATERIAL_GROUP, BOMGraph
+
+
+def make_graph(boms):
+	"""BOMGraph from item_code -> [(child_item_code, qty)], every BOM making one unit"""
+	graph = BOMGraph()
+	for item_code in boms:
+		graph.add_item(item_code, "Sub Assemblies")
+	for lines in boms.values():
+		for child_item_code, _qty in lines:
+			graph.add_item(child_item_code, RAW_MATERIAL_GROUP)
+
+	for item_id, item_code in enumerate(graph.item_codes):
+		if item_code in boms:
+			graph.boms[item_id] = f"BOM-{item_code}"
+			graph.bom_quantities[item_id] = 1.0
+		for child_item_code, qty in boms.get(item_code, ()):
+			graph.child_ids.append(graph.item_ids[child_item_code])
+			graph.child_qtys.append(qty)
+			graph.child_ratios.append(qty)
+		graph.child_offsets.append(len(graph.child_ids))
+
+	return graph
+
+
+def make_random_plan_inputs(rng, level_count=4, per_level=12, prefix="_Test MRP Item"):
+	levels = [[f"{prefix} {level}-{n}" for n in range(per_level)] for level in range(level_count)]
+	boms = {
+		item_code: [(child, flt(rng.uniform(0.5, 3), 3)) for child in rng.sample(levels[level + 1], 3)]
+		for level in range(level_count - 1)
+		for item_code in levels[level]
+	}
+	item_codes = [item_code for level in levels for item_code in level]
+	inputs = {
+		"buffer": {item_code: rng.choice(["Buffer", "Non-Buffer", "Non-Buffer"]) for item_code in item_codes},
+		"sku_type": {item_code: rng.choice(["PTA", "PTO", "SFGMTO", None]) for item_code in item_codes},
+	}
+	for fieldname in mrp_plan.PLAN_INPUT_FIELDS:
+		inputs[fieldname] = {item_code: rng.randint(0, 300) for item_code in item_codes}
+	for item_code in item_codes:
+		# MOQ and batch size are mutually exclusive on Item
+		if inputs["moq"][item_code] % 2:
+			inputs["batch_size"][item_code] = 0
+
+	return make_graph(boms), item_codes, inputs
+
+
+def plan(graph, item_codes, inputs, previous_plan=None):
+	"""Plan like the MRP worker: full without previous_plan, net change with it"""
+	kernel = planning_kernel.PlanningKernel(
+		graph,
+		item_codes,
+		inputs["buffer"],
+		inputs["tog"],
+		inputs["sku_type"],
+		inputs["stock"],
+		inputs["wip"],
+		inputs["open_so"],
+		inputs["qualified_demand"],
+		inputs["open_po"],
+		inputs["mrq"],
+		inputs["moq"],
+		inputs["batch_size"],
+	)
+	plan_rows = {
+		item_code: {
+			"buffer_flag": inputs["buffer"][item_code],
+			"sku_type": inputs["sku_type"][item_code],
+			"bom_lines": mrp_plan.get_bom_lines(graph, item_code),
+			**{fieldname: inputs[fieldname][item_code] for fieldname in mrp_plan.PLAN_INPUT_FIELDS},
+		}
+		for item_code in kernel.item_order
+	}
+
+	if previous_plan is None:
+		previous_plan, changed_items = {}, set(kernel.item_order)
+	else:
+		changed_items = mrp_plan.get_changed_items(plan_rows, previous_plan)
+
+	planned = kernel.plan(changed_items, previous_plan)
+
+	stored_plan = {
+		item_code: frappe._dict(
+			plan_rows[item_code],
+			item_code=item_code,
+			parent_demand=flt(planned.parent_demand[item_code], mrp_plan.PLAN_PRECISION),
+			net_order_rec=flt(planned.net_order_rec[item_code], mrp_plan.PLAN_PRECISION),
+		)
+		for item_code in kernel.item_order
+	}
+	return stored_plan, set(changed_items), len(planned.planned_items)
+
+
+class TestMRPPlan(FrappeTestCase):
+	def test_parent_demand_flows_through_non_buffer_items(self):
+		graph = make_graph({"FG": [("SFG", 2)], "SFG": [("RM", 0.5)]})
+		item_codes = ["FG", "SFG", "RM"]
+		inputs = {"buffer": dict.fromkeys(item_codes, "Non-Buffer"), "sku_type": dict.fromkeys(item_codes)}
+		for fieldname in mrp_plan.PLAN_INPUT_FIELDS:
+			inputs[fieldname] = dict.fromkeys(item_codes, 0)
+		inputs["open_so"]["FG"] = 10
+		inputs["stock"]["SFG"] = 5
+
+		stored_plan, _changed, _recomputed = plan(graph, item_codes, inputs)
+
+		self.assertEqual(stored_plan["FG"].net_order_rec, 10)
+		self.assertEqual(stored_plan["SFG"].parent_demand, 20)
+		self.assertEqual(stored_plan["SFG"].net_order_rec, 15)
+		self.assertEqual(stored_plan["RM"].parent_demand, 7.5)
+		self.assertEqual(stored_plan["RM"].net_order_rec, 7.5)
+
+		net_order_recs = {item_code: row.net_order_rec for item_code, row in stored_plan.items()}
+		parent_demands = mrp_genaration.get_parent_demands(
+			graph, graph.get_low_level_order(item_codes), net_order_recs, inputs["buffer"]
+		)
+		info = mrp_genaration.get_detailed_info("SFG", stored_plan["SFG"], parent_demands["SFG"])
+		mrp_genaration.build_calculation_breakdown(info, {"SFG": info["total_parent_demand"]})
+
+		self.assertEqual([pd["parent_item"] for pd in info["parent_demands"]], ["FG"])
+		self.assertEqual(info["parent_demands"][0]["demand_qty"], 20)
+		self.assertIn("Total Parent Demand: 20", info["calculation_breakdown"])
+
+	def test_net_change_matches_full_run(self):
+		rng = random.Random(11)
+		for _attempt in range(5):
+			graph, item_codes, inputs = make_random_plan_inputs(rng)
+			previous_plan, _changed, _recomputed = plan(graph, item_codes, inputs)
+
+			for item_code in rng.sample(item_codes, 3):
+				inputs["open_so"][item_code] += rng.randint(1, 500)
+				inputs["stock"][item_code] = rng.randint(0, 50)
+
+			net_change_plan, changed_items, recomputed = plan(graph, item_codes, inputs, previous_plan)
+			full_plan, _changed, full_recomputed = plan(graph, item_codes, inputs)
+
+			self.assertEqual(len(changed_items), 3)
+			self.assertLess(recomputed, full_recomputed)
+			for item_code in item_codes:
+				self.assertAlmostEqual(
+					net_change_plan[item_code].net_order_rec, full_plan[item_code].net_order_rec, places=6
+				)
+
+	def test_bom_change_replans_old_and_new_children(self):
+		graph, item_codes, inputs = make_random_plan_inputs(random.Random(3))
+		previous_plan, _changed, _recomputed = plan(graph, item_codes, inputs)
+
+		parent = "_Test MRP Item 1-0"
+		old_children = {child for child, _qty, _ratio in graph.get_children(parent)}
+		new_child = next(
+			item_code
+			for item_code in item_codes
+			if item_code.startswith("_Test MRP Item 2-") and item_code not in old_children
+		)
+		boms = {
+			item_code: [(child, qty) for child, qty, _ratio in graph.get_children(item_code)]
+			for item_code in item_codes
+			if graph.explodes(item_code)
+		}
+		boms[parent] = [*boms[parent][1:], (new_child, 2)]
+		graph = make_graph(boms)
+
+		net_change_plan, changed_items, _recomputed = plan(graph, item_codes, inputs, previous_plan)
+		full_plan, _changed, _recomputed = plan(graph, item_codes, inputs)
+
+		self.assertTrue(old_children | {new_child} <= changed_items)
+		for item_code in item_codes:
+			self.assertAlmostEqual(
+				net_change_plan[item_code].net_order_rec, full_plan[item_code].net_order_rec, places=6
+			)
+
+	def test_parallel_plan_matches_single_process(self):
+		rng = random.Random(7)
+		boms, item_codes, inputs = {}, [], {}
+		for family in range(3):
+			graph, family_item_codes, family_inputs = make_random_plan_inputs(
+				rng, prefix=f"_Test MRP Family {family}"
+			)
+			boms.update(
+				(item_code, [(child, qty) for child, qty, _ratio in graph.get_children(item_code)])
+				for item_code in family_item_codes
+				if graph.explodes(item_code)
+			)
+			item_codes += family_item_codes
+			for fieldname, values in family_inputs.items():
+				inputs.setdefault(fieldname, {}).update(values)
+
+		graph = make_graph(boms)
+		kernel = planning_kernel.PlanningKernel(
+			graph,
+			item_codes,
+			inputs["buffer"],
+			inputs["tog"],
+			inputs["sku_type"],
+			inputs["stock"],
+			inputs["wip"],
+			inputs["open_so"],
+			inputs["qualified_demand"],
+			inputs["open_po"],
+			inputs["mrq"],
+			inputs["moq"],
+			inputs["batch_size"],
+		)
+		components = graph.get_components(kernel.item_order)
+		self.assertEqual(sum(map(len, components)), len(item_codes))
+		for component in components:
+			self.assertEqual(len({item_code.split()[3] for item_code in component}), 1)
+
+		dirty_items = {"_Test MRP Family 0 0-1", "_Test MRP Family 2 1-4"}
+		self.assertEqual(len(kernel.get_item_groups(dirty_items, 4)), 2)
+
+		with patch.object(planning_kernel, "PARALLEL_PLAN_MIN_ITEMS", 0):
+			parallel_plan = kernel.plan(processes=2)
+		single_process_plan = kernel.plan()
+
+		self.assertEqual(parallel_plan.planned_items, single_process_plan.planned_items)
+		self.assertEqual(parallel_plan.net_order_rec, single_process_plan.net_order_rec)
+		self.assertEqual(parallel_plan.parent_demand, single_process_plan.parent_demand)
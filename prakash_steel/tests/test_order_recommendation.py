@@ -0,0 +1,184 @@
+# Copyright (c) 2025, beetashoke chakraborty and Contributors
+# See license.txt
+
+import random
+
+import numpy as np
+from frappe.tests.utils import FrappeTestCase
+
+from prakash_steel.utils import planning_kernel
+from prakash_steel.utils.order_recommendation import (
+	PlanningTable,
+	final_order_recommendations,
+	initial_order_recommendations,
+	net_order_recommendations,
+)
+
+SKU_TYPES = ["FGMTA", "FGMTO", "SFGMTA", "SFGMTO", "PTA", "PTO", "BOTA", "BOTO", "BBMTA", None]
+
+
+def make_random_inputs(rng, item_count):
+	"""Random planning maps; values are sparse and include zeros, negatives and fractions"""
+	item_codes = [f"_Test Planning Item {i}" for i in range(item_count)]
+
+	def quantity_map(zero_ratio=0.3, allow_negative=True):
+		values = {}
+		for item_code in item_codes:
+			roll = rng.random()
+			if roll < zero_ratio / 2:
+				continue  # missing from the map
+			if roll < zero_ratio:
+				values[item_code] = 0
+			elif allow_negative and roll < zero_ratio + 0.1:
+				values[item_code] = -rng.uniform(0, 500)
+			elif roll < zero_ratio + 0.2:
+				values[item_code] = rng.randint(1, 5000)
+			else:
+				values[item_code] = rng.uniform(0, 5000) * rng.choice([1, 0.001, 1e6])
+		return values
+
+	return {
+		"item_codes": item_codes,
+		"item_buffer_map": {
+			item_code: rng.choice(["Buffer", "Non-Buffer", None]) for item_code in item_codes
+		},
+		"item_tog_map": quantity_map(allow_negative=False),
+		"item_sku_type_map": {item_code: rng.choice(SKU_TYPES) for item_code in item_codes},
+		"stock_map": quantity_map(),
+		"wip_map": quantity_map(allow_negative=False),
+		"open_so_map": quantity_map(),
+		"qualified_demand_map": quantity_map(),
+		"open_po_map": quantity_map(allow_negative=False),
+		"mrq_map": quantity_map(),
+		"moq_map": quantity_map(zero_ratio=0.6, allow_negative=False),
+		"batch_size_map": quantity_map(zero_ratio=0.6, allow_negative=False),
+		"parent_demand_map": quantity_map(zero_ratio=0.5, allow_negative=False),
+	}
+
+
+def make_table(inputs, demand_map):
+	return PlanningTable(
+		inputs["item_codes"],
+		inputs["item_buffer_map"],
+		inputs["item_tog_map"],
+		inputs["item_sku_type_map"],
+		inputs["stock_map"],
+		inputs["wip_map"],
+		demand_map,
+		inputs["qualified_demand_map"],
+		inputs["open_po_map"],
+		inputs["mrq_map"],
+		inputs["moq_map"],
+		inputs["batch_size_map"],
+	)
+
+
+class TestOrderRecommendationKernel(FrappeTestCase):
+	def assertBitIdentical(self, expected, actual):
+		for item_code, expected_value in expected.items():
+			actual_value = actual[item_code]
+			self.assertEqual(float(expected_value).hex(), float(actual_value).hex(), item_code)
+
+	def test_mrp_formulas_match_scalar_functions(self):
+		for seed in range(25):
+			rng = random.Random(seed)
+			inputs = make_random_inputs(rng, rng.randint(1, 400))
+			table = make_table(inputs, inputs["open_so_map"])
+			scalar_args = (
+				inputs["item_buffer_map"],
+				inputs["item_tog_map"],
+				inputs["item_sku_type_map"],
+				inputs["stock_map"],
+				inputs["wip_map"],
+				inputs["open_so_map"],
+				inputs["qualified_demand_map"],
+				inputs["open_po_map"],
+			)
+
+			initial = initial_order_recommendations(table)
+			self.assertBitIdentical(
+				{
+					item_code: planning_kernel.calculate_initial_order_recommendation(item_code, *scalar_args)
+					for item_code in table.item_codes
+				},
+				table.to_dict(initial),
+			)
+
+			final = final_order_recommendations(table, table.column(inputs["parent_demand_map"]))
+			expected_final = {
+				item_code: planning_kernel.calculate_final_order_recommendation(
+					item_code, *scalar_args, inputs["mrq_map"], inputs["parent_demand_map"]
+				)
+				for item_code in table.item_codes
+			}
+			self.assertBitIdentical(expected_final, table.to_dict(final))
+
+			net = net_order_recommendations(final, table.moq, table.batch_size)
+			self.assertBitIdentical(
+				{
+					item_code: planning_kernel.calculate_net_order_recommendation(
+						expected_final[item_code],
+						inputs["moq_map"].get(item_code, 0),
+						inputs["batch_size_map"].get(item_code, 0),
+					)
+					for item_code in table.item_codes
+				},
+				table.to_dict(net),
+			)
+
+	def test_report_formulas_match_scalar_functions(self):
+		report_initial_sku_types = ("PTA", "SFGMTA")
+
+		for seed in range(25):
+			rng = random.Random(1000 + seed)
+			inputs = make_random_inputs(rng, rng.randint(1, 400))
+			table = make_table(inputs, inputs["qualified_demand_map"])
+			# The report nets non-buffer items against qualified demand
+			scalar_args = (
+				inputs["item_buffer_map"],
+				inputs["item_tog_map"],
+				inputs["item_sku_type_map"],
+				inputs["stock_map"],
+				inputs["wip_map"],
+				inputs["qualified_demand_map"],
+				inputs["qualified_demand_map"],
+				inputs["open_po_map"],
+			)
+
+			initial = initial_order_recommendations(table, buffer_open_po_sku_types=report_initial_sku_types)
+			self.assertBitIdentical(
+				{
+					item_code: planning_kernel.calculate_initial_order_recommendation(
+						item_code, *scalar_args, buffer_open_po_sku_types=report_initial_sku_types
+					)
+					for item_code in table.item_codes
+				},
+				table.to_dict(initial),
+			)
+
+			final = final_order_recommendations(table, table.column(inputs["parent_demand_map"]))
+			self.assertBitIdentical(
+				{
+					item_code: planning_kernel.calculate_final_order_recommendation(
+						item_code, *scalar_args, inputs["mrq_map"], inputs["parent_demand_map"]
+					)
+					for item_code in table.item_codes
+				},
+				table.to_dict(final),
+			)
+
+	def test_net_recommendation_edge_cases(self):
+		rng = random.Random(7)
+		values = [0, -1.5, 1e-9, 0.1 + 0.2, 399.99, 400, 400.0000001, 16000, 1e15]
+		for _ in range(2000):
+			base = rng.choice([*values, rng.uniform(-10, 1e5)])
+			moq = rng.choice([0, 0, 1, 400, 16000, rng.uniform(0, 1e4)])
+			batch_size = rng.choice([0, 0, 0.3, 7, 400, rng.uniform(0, 1e3)])
+
+			expected = planning_kernel.calculate_net_order_recommendation(base, moq, batch_size)
+			actual = net_order_recommendations(
+				np.array([base], dtype=np.float64),
+				np.array([moq], dtype=np.float64),
+				np.array([batch_size], dtype=np.float64),
+			)[0]
+			self.assertEqual(float(expected).hex(), float(actual).hex(), (base, moq, batch_size))
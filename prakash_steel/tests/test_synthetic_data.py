@@ -0,0 +1,52 @@
+# Copyright (c) 2025, beetashoke chakraborty and Contributors
+# See license.txt
+
+from frappe.tests.utils import FrappeTestCase
+
+from prakash_steel.benchmarks.synthetic_data import NAME_PREFIX, SYNTHETIC_DOCTYPES, build_synthetic_data
+
+CONFIG = {
+	"item_count": 120,
+	"bom_depth": 3,
+	"fan_out": 4,
+	"shared_ratio": 0.5,
+	"sales_orders": 20,
+	"purchase_orders": 10,
+	"material_requests": 10,
+	"work_orders": 5,
+	"seed": 7,
+}
+
+
+class TestSyntheticData(FrappeTestCase):
+	def test_same_seed_gives_same_catalogue(self):
+		self.assertEqual(build_synthetic_data(CONFIG), build_synthetic_data(CONFIG))
+		self.assertNotEqual(build_synthetic_data(CONFIG), build_synthetic_data({**CONFIG, "seed": 8}))
+
+	def test_row_counts_and_names(self):
+		data = build_synthetic_data(CONFIG)
+		self.assertEqual(len(data["Item"]), CONFIG["item_count"])
+		self.assertEqual(len(data["Sales Order"]), CONFIG["sales_orders"])
+		self.assertEqual(len(data["Work Order"]), CONFIG["work_orders"])
+
+		for doctype in SYNTHETIC_DOCTYPES:
+			names = [row["name"] for row in data[doctype]]
+			self.assertEqual(len(names), len(set(names)), doctype)
+			self.assertTrue(all(name.startswith(NAME_PREFIX) for name in names), doctype)
+
+	def test_boms_are_acyclic_and_share_sub_assemblies(self):
+		data = build_synthetic_data(CONFIG)
+		level_count = CONFIG["bom_depth"] + 1
+		item_levels = {row["name"]: int(row["name"][-6:]) % level_count for row in data["Item"]}
+		bom_items = {row["name"]: row["item"] for row in data["BOM"]}
+
+		parents_by_child = {}
+		for row in data["BOM Item"]:
+			parent_item = bom_items[row["parent"]]
+			# Lines only point one level down, so no BOM can reach itself
+			self.assertEqual(item_levels[row["item_code"]], item_levels[parent_item] + 1)
+			parents_by_child.setdefault(row["item_code"], set()).add(parent_item)
+
+		self.assertTrue(any(len(parents) > 1 for parents in parents_by_child.values()))
+		# Raw materials have no BOM
+		self.assertFalse([item for item in bom_items.values() if item_levels[item] == level_count - 1])
@@ -0,0 +1,106 @@
+# Copyright (c) 2025, beetashoke chakraborty and Contributors
+# See license.txt
+
+import random
+
+import numpy as np
+from frappe.tests.utils import FrappeTestCase
+
+from prakash_steel.tests.test_mrp_plan import make_graph, make_random_plan_inputs
+from prakash_steel.utils import mrp_plan, planning_kernel, time_phased
+
+
+def make_kernel(graph, item_codes, inputs):
+	return planning_kernel.PlanningKernel(
+		graph,
+		item_codes,
+		inputs["buffer"],
+		inputs["tog"],
+		inputs["sku_type"],
+		inputs["stock"],
+		inputs["wip"],
+		inputs["qualified_demand"],
+		inputs["qualified_demand"],
+		inputs["open_po"],
+		inputs["mrq"],
+		inputs["moq"],
+		inputs["batch_size"],
+	)
+
+
+def make_planner(kernel, buckets, inputs, lead_time_map=None, rows=None):
+	"""Planner with every quantity of inputs due now, plus (fieldname, item_code, due_date, qty) rows"""
+	index = kernel.table.index
+	matrices = {}
+	for fieldname in ("qualified_demand", "open_po", "mrq", "wip"):
+		values = [(item_code, None, qty) for item_code, qty in inputs[fieldname].items()]
+		values += [
+			(item_code, due_date, qty) for field, item_code, due_date, qty in rows or () if field == fieldname
+		]
+		matrices[fieldname] = buckets.to_matrix(values, index)
+
+	return time_phased.TimePhasedPlanner(
+		kernel,
+		buckets,
+		lead_time_map or {},
+		matrices["qualified_demand"],
+		matrices["open_po"],
+		matrices["mrq"],
+		matrices["wip"],
+	)
+
+
+class TestTimePhased(FrappeTestCase):
+	def test_everything_due_now_matches_single_bucket_plan(self):
+		rng = random.Random(5)
+		for _attempt in range(5):
+			graph, item_codes, inputs = make_random_plan_inputs(rng)
+			kernel = make_kernel(graph, item_codes, inputs)
+			buckets = time_phased.Buckets("Week", 4, "2025-01-01")
+			lead_time_map = {item_code: rng.randint(0, 20) for item_code in item_codes}
+
+			result = make_planner(kernel, buckets, inputs, lead_time_map).plan()
+			single_bucket = kernel.plan()
+
+			for item_code in item_codes:
+				row = kernel.table.index[item_code]
+				self.assertAlmostEqual(
+					result.planned_receipts[row, 0], single_bucket.net_order_rec[item_code]
+				)
+				self.assertEqual(result.planned_receipts[row, 1:].sum(), 0)
+
+	def test_lead_time_moves_component_demand_earlier(self):
+		graph = make_graph({"FG": [("RM", 2)]})
+		item_codes = ["FG", "RM"]
+		inputs = {"buffer": dict.fromkeys(item_codes, "Non-Buffer"), "sku_type": dict.fromkeys(item_codes)}
+		for fieldname in mrp_plan.PLAN_INPUT_FIELDS:
+			inputs[fieldname] = dict.fromkeys(item_codes, 0)
+
+		kernel = make_kernel(graph, item_codes, inputs)
+		buckets = time_phased.Buckets("Week", 6, "2025-01-01")
+		planner = make_planner(
+			kernel,
+			buckets,
+			inputs,
+			lead_time_map={"FG": 10},
+			rows=[("qualified_demand", "FG", "2025-01-29", 5), ("wip", "RM", "2025-01-15", 4)],
+		)
+		result = planner.plan()
+		fg, rm = kernel.table.index["FG"], kernel.table.index["RM"]
+
+		# Due in week 4, released two weeks earlier; RM needs 10 in week 2 and has 4 arriving then
+		self.assertEqual(result.planned_receipts[fg].tolist(), [0, 0, 0, 0, 5, 0, 0])
+		self.assertEqual(result.planned_releases[fg].tolist(), [0, 0, 5, 0, 0, 0, 0])
+		self.assertEqual(result.gross_requirements[rm].tolist(), [0, 0, 10, 0, 0, 0, 0])
+		self.assertEqual(result.planned_receipts[rm].tolist(), [0, 0, 6, 0, 0, 0, 0])
+
+		item_plan = planner.get_item_plan(result, "RM")
+		self.assertEqual(item_plan["bucket_end_dates"][2], "2025-01-15")
+		self.assertEqual(item_plan["planned_receipts"], [0, 0, 6, 0, 0, 0, 0])
+
+	def test_lot_size_surplus_covers_later_buckets(self):
+		orders = time_phased.lot_size(np.array([[3.0, 4.0, 4.0, 0.0]]), np.array([10.0]), np.array([0.0]))
+		self.assertEqual(orders.tolist(), [[10.0, 0.0, 10.0, 0.0]])
+
+		orders = time_phased.lot_size(np.array([[3.0, 4.0, 4.0, 0.0]]), np.array([0.0]), np.array([5.0]))
+		self.assertEqual(orders.tolist(), [[5.0, 5.0, 5.0, 0.0]])
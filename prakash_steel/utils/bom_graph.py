@@ -0,0 +1,368 @@
+# Copyright (c) 2025, beetashoke chakraborty and contributors
+# For license information, please see license.txt
+
+from array import array
+
+import frappe
+from frappe import _
+from frappe.utils import flt
+
+from prakash_steel.utils.lead_time import get_default_bom_rows
+
+RAW_MATERIAL_GROUP = "Raw Material"
+
+BOM_GRAPH_CACHE_KEY = "prakash_steel.bom_graph"
+# Upper bound on how long a graph missed by every invalidation hook can stay in use
+BOM_GRAPH_CACHE_EXPIRY = 6 * 60 * 60
+
+
+class BOMGraph:
+	"""
+	Read-only, in-memory snapshot of the default BOM of every item.
+
+	Item codes are interned to integer ids and the BOM lines of every item are
+	held in compact adjacency arrays (CSR layout: ``child_offsets[i]`` to
+	``child_offsets[i + 1]`` index into the child arrays). Traversals built on
+	top of the graph never touch the database once it is loaded.
+	"""
+
+	def __init__(self):
+		self.item_codes = []  # id -> item_code
+		self.item_ids = {}  # item_code -> id
+		self.item_groups = []  # id -> item_group
+		self.buffer_flags = array("b")  # id -> 1 if custom_buffer_flag == "Buffer"
+		self.boms = []  # id -> default BOM name (None when the item has no BOM)
+		self.bom_quantities = array("d")  # id -> BOM quantity (as stored)
+		self.child_offsets = array("l", [0])
+		self.child_ids = array("l")
+		self.child_qtys = array("d")  # raw BOM Item qty
+		self.child_ratios = array("d")  # BOM Item qty / BOM quantity (quantity <= 0 treated as 1)
+		# Where-used index over the exploding BOM lines, built on first use (see get_parents)
+		self._parent_offsets = None
+		self._parent_lines = None  # index into the child arrays, grouped by child
+		self._line_parent_ids = None  # BOM line -> parent id
+
+	def __contains__(self, item_code):
+		return item_code in self.item_ids
+
+	def __len__(self):
+		return len(self.item_codes)
+
+	def add_item(self, item_code, item_group=None, is_buffer=False):
+		"""Intern an item and return its id"""
+		item_id = self.item_ids.get(item_code)
+		if item_id is not None:
+			return item_id
+
+		item_id = len(self.item_codes)
+		self.item_ids[item_code] = item_id
+		self.item_codes.append(item_code)
+		self.item_groups.append(item_group)
+		self.buffer_flags.append(1 if is_buffer else 0)
+		self.boms.append(None)
+		self.bom_quantities.append(0.0)
+		return item_id
+
+	def get_item_group(self, item_code):
+		item_id = self.item_ids.get(item_code)
+		return self.item_groups[item_id] if item_id is not None else None
+
+	def is_buffer(self, item_code):
+		item_id = self.item_ids.get(item_code)
+		return item_id is not None and bool(self.buffer_flags[item_id])
+
+	def get_bom(self, item_code):
+		item_id = self.item_ids.get(item_code)
+		return self.boms[item_id] if item_id is not None else None
+
+	def get_bom_quantity(self, item_code):
+		item_id = self.item_ids.get(item_code)
+		return self.bom_quantities[item_id] if item_id is not None else 0.0
+
+	def explodes(self, item_code):
+		"""True when the item has a default BOM and is not a raw material"""
+		item_id = self.item_ids.get(item_code)
+		if item_id is None or self.boms[item_id] is None:
+			return False
+		return self.item_groups[item_id] != RAW_MATERIAL_GROUP
+
+	def get_children(self, item_code):
+		"""Return (child_item_code, bom_item_qty, normalized_ratio) for each BOM line, in BOM order"""
+		item_id = self.item_ids.get(item_code)
+		if item_id is None:
+			return []
+
+		item_codes = self.item_codes
+		start, end = self.child_offsets[item_id], self.child_offsets[item_id + 1]
+		return [
+			(item_codes[self.child_ids[i]], self.child_qtys[i], self.child_ratios[i])
+			for i in range(start, end)
+		]
+
+	def get_parents(self, item_code):
+		"""
+		Return (parent_item_code, bom_item_qty, normalized_ratio) for each exploding BOM line
+		that uses the item, in parent id order and then BOM order.
+		"""
+		item_id = self.item_ids.get(item_code)
+		if item_id is None:
+			return []
+
+		if self._parent_offsets is None:
+			self._build_where_used_index()
+
+		item_codes = self.item_codes
+		line_parents = self._line_parent_ids
+		start, end = self._parent_offsets[item_id], self._parent_offsets[item_id + 1]
+		return [
+			(item_codes[line_parents[line]], self.child_qtys[line], self.child_ratios[line])
+			for line in self._parent_lines[start:end]
+		]
+
+	def get_descendants(self, item_codes):
+		"""All items reachable from item_codes through exploding BOMs (roots excluded unless reached)"""
+		descendants = set()
+		stack = [item_code for item_code in item_codes if self.explodes(item_code)]
+		expanded = set(stack)
+
+		while stack:
+			item_code = stack.pop()
+			for child_item_code, _qty, _ratio in self.get_children(item_code):
+				descendants.add(child_item_code)
+				if child_item_code not in expanded and self.explodes(child_item_code):
+					expanded.add(child_item_code)
+					stack.append(child_item_code)
+
+		return descendants
+
+	def get_ancestors(self, item_codes):
+		"""All items whose exploding BOMs use item_codes, directly or further up (where-used)"""
+		ancestors = set()
+		stack = list(item_codes)
+
+		while stack:
+			item_code = stack.pop()
+			for parent_item_code, _qty, _ratio in self.get_parents(item_code):
+				if parent_item_code not in ancestors:
+					ancestors.add(parent_item_code)
+					stack.append(parent_item_code)
+
+		return ancestors
+
+	def get_components(self, item_codes):
+		"""
+		Split item_codes into weakly connected components of the exploding BOM lines among
+		them: items sharing no component, directly or through other items, land in
+		different lists. Each list keeps the order of item_codes.
+		"""
+		position = {item_code: idx for idx, item_code in enumerate(item_codes)}
+		roots = list(range(len(item_codes)))
+
+		def find(idx):
+			while roots[idx] != idx:
+				roots[idx] = roots[roots[idx]]
+				idx = roots[idx]
+			return idx
+
+		for idx, item_code in enumerate(item_codes):
+			if not self.explodes(item_code):
+				continue
+			for child_item_code, _qty, _ratio in self.get_children(item_code):
+				child_idx = position.get(child_item_code)
+				if child_idx is not None:
+					roots[find(child_idx)] = find(idx)
+
+		components = {}
+		for idx, item_code in enumerate(item_codes):
+			components.setdefault(find(idx), []).append(item_code)
+		return list(components.values())
+
+	def get_low_level_order(self, roots):
+		"""
+		Return the roots and every item reachable from them, sorted by low-level code.
+
+		An item's low-level code is the length of the longest BOM path from a root down
+		to it, so every parent comes before all of its children and a planning pass can
+		explode each BOM exactly once. Throws a ValidationError naming the offending loop
+		when the BOMs are cyclic.
+		"""
+		unknown_roots = []
+		root_ids = set()
+		for item_code in roots:
+			item_id = self.item_ids.get(item_code)
+			if item_id is None:
+				unknown_roots.append(item_code)
+			else:
+				root_ids.add(item_id)
+
+		# Collect the reachable sub-graph and count the incoming BOM lines of each item
+		in_degree = dict.fromkeys(root_ids, 0)
+		expanded = set()
+		stack = list(root_ids)
+		while stack:
+			item_id = stack.pop()
+			if item_id in expanded:
+				continue
+			expanded.add(item_id)
+			for child_id in self._get_exploded_child_ids(item_id):
+				in_degree[child_id] = in_degree.get(child_id, 0) + 1
+				if child_id not in expanded:
+					stack.append(child_id)
+
+		# Kahn's algorithm; an item's level is one more than its deepest parent
+		levels = {}
+		ready = [item_id for item_id, degree in in_degree.items() if degree == 0]
+		for item_id in ready:
+			levels[item_id] = 0
+
+		processed = 0
+		while ready:
+			item_id = ready.pop()
+			processed += 1
+			for child_id in self._get_exploded_child_ids(item_id):
+				levels[child_id] = max(levels.get(child_id, 0), levels[item_id] + 1)
+				in_degree[child_id] -= 1
+				if in_degree[child_id] == 0:
+					ready.append(child_id)
+
+		if processed < len(in_degree):
+			self._throw_bom_loop({item_id for item_id, degree in in_degree.items() if degree > 0})
+
+		item_codes = self.item_codes
+		ordered_ids = sorted(levels, key=lambda item_id: (levels[item_id], item_codes[item_id]))
+		return sorted(unknown_roots) + [item_codes[item_id] for item_id in ordered_ids]
+
+	def _build_where_used_index(self):
+		# Counting sort of the exploding BOM lines by child id (CSR layout, like the child arrays)
+		counts = [0] * (len(self.item_codes) + 1)
+		for item_id in range(len(self.item_codes)):
+			for child_id in self._get_exploded_child_ids(item_id):
+				counts[child_id + 1] += 1
+
+		for item_id in range(len(self.item_codes)):
+			counts[item_id + 1] += counts[item_id]
+
+		parent_lines = array("l", [0]) * counts[-1]
+		line_parent_ids = array("l", [0]) * len(self.child_ids)
+		cursor = counts[:-1]
+		for item_id in range(len(self.item_codes)):
+			if not self._get_exploded_child_ids(item_id):
+				continue
+			for line in range(self.child_offsets[item_id], self.child_offsets[item_id + 1]):
+				child_id = self.child_ids[line]
+				parent_lines[cursor[child_id]] = line
+				line_parent_ids[line] = item_id
+				cursor[child_id] += 1
+
+		self._parent_offsets = array("l", counts)
+		self._parent_lines = parent_lines
+		self._line_parent_ids = line_parent_ids
+
+	def _get_exploded_child_ids(self, item_id):
+		if self.boms[item_id] is None or self.item_groups[item_id] == RAW_MATERIAL_GROUP:
+			return ()
+		return self.child_ids[self.child_offsets[item_id] : self.child_offsets[item_id + 1]]
+
+	def _throw_bom_loop(self, remaining_ids):
+		"""Walk parent links inside the unresolved items until one repeats and report that loop"""
+		parent_ids = {}
+		for item_id in remaining_ids:
+			for child_id in self._get_exploded_child_ids(item_id):
+				if child_id in remaining_ids:
+					parent_ids.setdefault(child_id, []).append(item_id)
+
+		path = []
+		position = {}
+		item_id = min(remaining_ids, key=lambda i: self.item_codes[i])
+		while item_id not in position:
+			position[item_id] = len(path)
+			path.append(item_id)
+			item_id = parent_ids[item_id][0]
+
+		loop = [self.item_codes[i] for i in reversed(path[position[item_id] :])]
+		loop.append(loop[0])
+		frappe.throw(
+			_("BOM loop detected: {0}. Fix the BOMs of these items before planning.").format(
+				" → ".join(loop)
+			),
+			title=_("BOM Recursion"),
+		)
+
+
+def load_bom_graph():
+	"""
+	Load every item and its default BOM into a BOMGraph with three set-based queries.
+
+	Default BOMs come from ``prakash_steel.utils.lead_time.get_default_bom_rows``, so
+	they follow the same precedence as ``get_default_bom``: active default submitted BOM,
+	then any active submitted BOM, then any active BOM, newest first within each tier.
+	"""
+	graph = BOMGraph()
+
+	items = frappe.db.sql(
+		"""
+		SELECT name, item_group, custom_buffer_flag
+		FROM `tabItem`
+		""",
+		as_dict=True,
+	)
+	for item in items:
+		graph.add_item(item.name, item.item_group, item.custom_buffer_flag == "Buffer")
+
+	default_boms = {}  # bom name -> item id
+	for bom in get_default_bom_rows():
+		item_id = graph.add_item(bom.item)
+		graph.boms[item_id] = bom.name
+		graph.bom_quantities[item_id] = flt(bom.quantity)
+		default_boms[bom.name] = item_id
+
+	bom_items = frappe.db.sql(
+		"""
+		SELECT bi.parent, bi.item_code, bi.qty
+		FROM `tabBOM Item` bi
+		INNER JOIN `tabBOM` b ON b.name = bi.parent
+		WHERE b.is_active = 1
+			AND bi.parenttype = 'BOM'
+		ORDER BY bi.parent, bi.idx
+		""",
+		as_dict=True,
+	)
+
+	children_by_item = {}
+	for row in bom_items:
+		parent_id = default_boms.get(row.parent)
+		if parent_id is None:
+			continue
+		children_by_item.setdefault(parent_id, []).append((graph.add_item(row.item_code), flt(row.qty)))
+
+	for item_id in range(len(graph.item_codes)):
+		bom_quantity = graph.bom_quantities[item_id]
+		if bom_quantity <= 0:
+			bom_quantity = 1.0
+
+		for child_id, qty in children_by_item.get(item_id, ()):
+			graph.child_ids.append(child_id)
+			graph.child_qtys.append(qty)
+			graph.child_ratios.append(qty / bom_quantity)
+		graph.child_offsets.append(len(graph.child_ids))
+
+	return graph
+
+
+def get_cached_bom_graph():
+	"""
+	load_bom_graph(), kept in the cache with its where-used index built. It is cleared
+	(see clear_bom_graph_cache) whenever a BOM, draft or submitted, is saved, cancelled or
+	deleted, and when an item is deleted, renamed or its group or buffer flag changes; the
+	key also expires after BOM_GRAPH_CACHE_EXPIRY seconds.
+	"""
+	graph = frappe.cache().get_value(BOM_GRAPH_CACHE_KEY)
+	if graph is None:
+		graph = load_bom_graph()
+		graph._build_where_used_index()
+		frappe.cache().set_value(BOM_GRAPH_CACHE_KEY, graph, expires_in_sec=BOM_GRAPH_CACHE_EXPIRY)
+	return graph
+
+
+def clear_bom_graph_cache():
+	frappe.cache().delete_value(BOM_GRAPH_CACHE_KEY)
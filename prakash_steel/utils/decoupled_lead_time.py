@@ -0,0 +1,402 @@
+# Copyright (c) 2025, beetashoke chakraborty and contributors
+# For license information, please see license.txt
+
+"""
+Decoupled lead time of many items in one pass over the BOM graph.
+
+An item's decoupled lead time is its own lead_time_days plus the longest decoupled lead
+time among the components of its default BOM. Buffer components decouple the path and
+add nothing; raw materials and items without a BOM have only their own lead time. Every
+item is evaluated once and its value reused by all of its parents, so a full catalogue
+costs one walk over the BOM lines instead of one recursive walk per item.
+
+When one item's lead time, buffer flag or BOM changes, only it and its where-used
+ancestors are evaluated again (update_ancestor_decoupled_lead_times), on top of the
+stored values of everything else. Saves only queue their items
+(queue_decoupled_lead_time_update); one background job recomputes them after commit.
+get_stored_decoupled_lead_time serves the stored
+value as long as its freshness stamp matches the current lead-time version.
+"""
+
+import frappe
+from frappe.utils import flt
+
+from prakash_steel.utils.bom_graph import clear_bom_graph_cache, get_cached_bom_graph, load_bom_graph
+
+# Same as the precision of Item.custom_decoupled_lead_time
+DECOUPLED_LEAD_TIME_PRECISION = 2
+
+# Version of the lead-time inputs (BOMs, item lead times, groups and buffer flags): replaced
+# whenever one of them changes. Stored values are stamped with the version they were
+# computed for, per item or for the whole catalogue after a full refresh.
+LEAD_TIME_VERSION_KEY = "prakash_steel.lead_time_version"
+LEAD_TIME_STAMPS_KEY = "prakash_steel.decoupled_lead_time_stamps"
+CATALOGUE_STAMP_KEY = "prakash_steel.decoupled_lead_time_catalogue_stamp"
+
+# Items saved since the last recompute job, shared by every request and job
+PENDING_ITEMS_KEY = "prakash_steel.pending_lead_time_items"
+# Set while a recompute job is queued but not started, and while one drains the pending
+# items; see _enqueue_pending_lead_time_items for how they keep an item from being missed
+RECOMPUTE_QUEUED_KEY = "prakash_steel.lead_time_recompute_queued"
+RECOMPUTE_DRAINING_KEY = "prakash_steel.lead_time_recompute_draining"
+RECOMPUTE_JOB_TIMEOUT = 3600
+
+
+def get_decoupled_lead_times(bom_graph, lead_time_map, item_codes=None):
+	"""
+	Decoupled lead time of item_codes (default: every item in lead_time_map).
+
+	lead_time_map is item_code -> lead_time_days of every existing item; BOM components
+	missing from it are skipped. A component that leads back into its own path (a BOM
+	loop) is skipped as well, like the recursive calculation did.
+
+	Returns:
+		dict: item_code -> decoupled lead time, including every component evaluated on the way
+	"""
+	values = {}
+
+	for root in lead_time_map if item_codes is None else item_codes:
+		if root in values or root not in lead_time_map:
+			continue
+
+		# Depth-first, iteratively: [item_code, pending components, longest component so far]
+		path = {root}
+		stack = [[root, _get_decoupling_children(bom_graph, lead_time_map, root), 0.0]]
+		while stack:
+			entry = stack[-1]
+			for child_item_code in entry[1]:
+				if child_item_code in values:
+					entry[2] = max(entry[2], values[child_item_code])
+				elif child_item_code not in path:
+					path.add(child_item_code)
+					children = _get_decoupling_children(bom_graph, lead_time_map, child_item_code)
+					stack.append([child_item_code, children, 0.0])
+					break
+			else:
+				stack.pop()
+				item_code, _children, longest = entry
+				path.discard(item_code)
+				values[item_code] = flt(lead_time_map[item_code]) + longest
+				if stack:
+					stack[-1][2] = max(stack[-1][2], values[item_code])
+
+	return values
+
+
+def get_item_lead_times():
+	"""(item_code -> lead_time_days, item_code -> stored custom_decoupled_lead_time) in one query"""
+	lead_time_map = {}
+	stored_map = {}
+	for item_code, lead_time_days, decoupled_lead_time in frappe.db.sql(
+		"""
+		SELECT name, lead_time_days, custom_decoupled_lead_time
+		FROM `tabItem`
+		"""
+	):
+		lead_time_map[item_code] = flt(lead_time_days)
+		stored_map[item_code] = flt(decoupled_lead_time)
+	return lead_time_map, stored_map
+
+
+def update_all_decoupled_lead_times():
+	"""
+	Recompute the decoupled lead time of every item and write the changed values back
+	with one bulk update. Returns the number of items updated.
+	"""
+	lead_time_version = get_lead_time_version()
+	bom_graph = load_bom_graph()
+	lead_time_map, stored_map = get_item_lead_times()
+	values = get_decoupled_lead_times(bom_graph, lead_time_map)
+
+	updates = {}
+	for item_code, value in values.items():
+		value = flt(value, DECOUPLED_LEAD_TIME_PRECISION)
+		if value != flt(stored_map.get(item_code), DECOUPLED_LEAD_TIME_PRECISION):
+			updates[item_code] = {"custom_decoupled_lead_time": value}
+
+	if updates:
+		# Derived value: leave Item.modified alone so open forms don't turn stale
+		frappe.db.bulk_update("Item", updates, update_modified=False)
+
+	# Every stored value is now fresh, unless an input changed while this ran
+	frappe.cache().set_value(CATALOGUE_STAMP_KEY, lead_time_version)
+	return len(updates)
+
+
+def update_ancestor_decoupled_lead_times(item_codes, bom_graph=None):
+	"""
+	Recompute the decoupled lead time of item_codes and of the items whose default BOMs
+	use them, directly or further up, and write the changed values back (see
+	get_changed_ancestor_lead_times). The where-used index comes from the cached BOM graph.
+
+	Returns:
+		dict: item_code -> new decoupled lead time of the items that changed
+	"""
+	bom_graph = bom_graph or get_cached_bom_graph()
+	item_codes = set(item_codes)
+	ancestors = bom_graph.get_ancestors(item_codes) | item_codes
+	components = {
+		child_item_code
+		for item_code in ancestors
+		if bom_graph.explodes(item_code)
+		for child_item_code, _qty, _ratio in bom_graph.get_children(item_code)
+	}
+
+	lead_time_map = {}
+	stored_map = {}
+	for item in frappe.get_all(
+		"Item",
+		filters={"name": ("in", list(ancestors | components))},
+		fields=["name", "lead_time_days", "custom_decoupled_lead_time"],
+	):
+		lead_time_map[item.name] = flt(item.lead_time_days)
+		stored_map[item.name] = flt(item.custom_decoupled_lead_time)
+
+	values = get_changed_ancestor_lead_times(bom_graph, item_codes, lead_time_map, stored_map)
+	if values:
+		frappe.db.bulk_update(
+			"Item",
+			{item_code: {"custom_decoupled_lead_time": value} for item_code, value in values.items()},
+			update_modified=False,
+		)
+
+	return values
+
+
+def get_changed_ancestor_lead_times(bom_graph, item_codes, lead_time_map, stored_map):
+	"""
+	New decoupled lead times of item_codes and their where-used ancestors, where changed.
+
+	Items are evaluated children first, against the stored value (stored_map) of every
+	component that is not evaluated again. An ancestor is only evaluated once one of its
+	components changed, so the walk stops wherever a value stays the same. lead_time_map
+	and stored_map must cover the ancestors and all of their components.
+	"""
+	item_codes = set(item_codes)
+	ancestors = bom_graph.get_ancestors(item_codes) | item_codes
+
+	dirty = set(item_codes)
+	values = {}
+	for item_code in _get_children_first_order(bom_graph, ancestors):
+		if item_code not in dirty or item_code not in lead_time_map:
+			continue
+
+		longest = max(
+			(
+				values.get(child_item_code, flt(stored_map.get(child_item_code)))
+				for child_item_code in _get_decoupling_children(bom_graph, lead_time_map, item_code)
+			),
+			default=0,
+		)
+		value = flt(lead_time_map[item_code] + longest, DECOUPLED_LEAD_TIME_PRECISION)
+		if value != flt(stored_map.get(item_code), DECOUPLED_LEAD_TIME_PRECISION):
+			values[item_code] = value
+		# item_codes themselves always reach their parents: a new buffer flag changes what an
+		# item adds to them, and the form may already have stored the item's own value
+		if item_code in values or item_code in item_codes:
+			dirty.update(parent for parent, _qty, _ratio in bom_graph.get_parents(item_code))
+
+	return values
+
+
+def queue_decoupled_lead_time_update(item_codes, bom_graph_changed=False):
+	"""
+	Recompute item_codes and their ancestors once the current transaction commits.
+
+	Item codes touched in a transaction are collected in a set; on commit they join the
+	pending items in the cache and a single job recomputes all of them, so a bulk
+	import costs one job instead of a walk and a job per item. Pass bom_graph_changed
+	when a BOM, item group or buffer flag changed, so the cached BOM graph is reloaded.
+	"""
+	pending = frappe.flags.pending_lead_time_items
+	if pending is None:
+		pending = frappe.flags.pending_lead_time_items = set()
+		frappe.db.after_commit.add(_enqueue_pending_lead_time_items)
+		frappe.db.after_rollback.add(_forget_pending_lead_time_items)
+
+	pending.update(item_codes)
+	if bom_graph_changed:
+		frappe.flags.lead_time_bom_graph_changed = True
+
+
+def recompute_pending_lead_times():
+	"""Background job: recompute the pending items and their ancestors until none are left"""
+	cache = frappe.cache()
+	# From here on a save that finds no draining job queues another one
+	cache.delete_value(RECOMPUTE_QUEUED_KEY)
+	if not _claim_recompute_key(RECOMPUTE_DRAINING_KEY):
+		# Another job is draining and reads the pending items again before it stops, so
+		# two jobs never write the same ancestors at once
+		return
+
+	draining = True
+	try:
+		while True:
+			item_codes = _get_pending_lead_time_items()
+			if not item_codes:
+				# Items added before the flag went down would be skipped by their enqueue, so
+				# look once more after dropping it; later ones queue a job of their own
+				cache.delete_value(RECOMPUTE_DRAINING_KEY)
+				draining = False
+				if not _get_pending_lead_time_items() or not _claim_recompute_key(RECOMPUTE_DRAINING_KEY):
+					break
+				draining = True
+				continue
+
+			cache.srem(PENDING_ITEMS_KEY, *item_codes)
+			try:
+				update_ancestor_decoupled_lead_times(item_codes)
+				frappe.db.commit()
+			except Exception:
+				# Keep the batch pending for the job the next save queues
+				frappe.db.rollback()
+				cache.sadd(PENDING_ITEMS_KEY, *item_codes)
+				raise
+	finally:
+		# A failed job must not leave saves parking their items behind a flag nobody drains
+		if draining:
+			cache.delete_value(RECOMPUTE_DRAINING_KEY)
+
+
+def _enqueue_pending_lead_time_items():
+	item_codes = frappe.flags.pop("pending_lead_time_items", None)
+	bom_graph_changed = frappe.flags.pop("lead_time_bom_graph_changed", False)
+	if not item_codes:
+		return
+
+	# The transaction is committed, so anything loaded from here on sees the change
+	if bom_graph_changed:
+		clear_bom_graph_cache()
+	bump_lead_time_version()
+
+	# The items go in first: a draining job re-reads the set after dropping its flag, and a
+	# queued job reads it after it starts, so either one picks them up. Only when neither
+	# is around is a job queued; a job that is still "started" but done draining does not
+	# count, which is why this is not left to RQ's deduplicate.
+	cache = frappe.cache()
+	cache.sadd(PENDING_ITEMS_KEY, *item_codes)
+	if cache.exists(cache.make_key(RECOMPUTE_DRAINING_KEY)):
+		return
+	if not _claim_recompute_key(RECOMPUTE_QUEUED_KEY):
+		return
+
+	frappe.enqueue(
+		"prakash_steel.utils.decoupled_lead_time.recompute_pending_lead_times",
+		queue="long",
+		timeout=RECOMPUTE_JOB_TIMEOUT,
+	)
+
+
+def _get_pending_lead_time_items():
+	return {frappe.safe_decode(item_code) for item_code in frappe.cache().smembers(PENDING_ITEMS_KEY)}
+
+
+def _claim_recompute_key(key):
+	"""Set key unless it is already set; it expires with the job timeout in case a worker dies"""
+	cache = frappe.cache()
+	return bool(cache.set(cache.make_key(key), 1, nx=True, ex=RECOMPUTE_JOB_TIMEOUT))
+
+
+def _forget_pending_lead_time_items():
+	frappe.flags.pop("pending_lead_time_items", None)
+	frappe.flags.pop("lead_time_bom_graph_changed", None)
+
+
+def get_stored_decoupled_lead_time(item_code):
+	"""
+	Item's custom_decoupled_lead_time and the lead-time version it is fresh for.
+
+	The stored value is served as is (one indexed read) while its stamp matches the
+	current version; a stale value is recomputed over the cached BOM graph, stored and
+	stamped first. Returns None for an item that does not exist.
+	"""
+	stored = frappe.db.get_value("Item", item_code, "custom_decoupled_lead_time")
+	if stored is None and not frappe.db.exists("Item", item_code):
+		return None
+
+	lead_time_version = get_lead_time_version()
+	value = flt(stored, DECOUPLED_LEAD_TIME_PRECISION)
+	is_fresh = lead_time_version in (
+		frappe.cache().hget(LEAD_TIME_STAMPS_KEY, item_code),
+		frappe.cache().get_value(CATALOGUE_STAMP_KEY),
+	)
+
+	if not is_fresh:
+		value = flt(calculate_decoupled_lead_time_from_graph(item_code), DECOUPLED_LEAD_TIME_PRECISION)
+		if value != flt(stored, DECOUPLED_LEAD_TIME_PRECISION):
+			frappe.db.set_value("Item", item_code, "custom_decoupled_lead_time", value, update_modified=False)
+		frappe.cache().hset(LEAD_TIME_STAMPS_KEY, item_code, lead_time_version)
+
+	return frappe._dict(
+		decoupled_lead_time=value, lead_time_version=lead_time_version, recomputed=not is_fresh
+	)
+
+
+def calculate_decoupled_lead_time_from_graph(item_code):
+	"""Decoupled lead time of one item over the cached BOM graph (one Item query for its sub-tree)"""
+	bom_graph = get_cached_bom_graph()
+	item_codes = bom_graph.get_descendants([item_code]) | {item_code}
+	lead_time_map = {
+		item.name: flt(item.lead_time_days)
+		for item in frappe.get_all(
+			"Item", filters={"name": ("in", list(item_codes))}, fields=["name", "lead_time_days"]
+		)
+	}
+	return get_decoupled_lead_times(bom_graph, lead_time_map, [item_code]).get(item_code, 0)
+
+
+def get_lead_time_version():
+	lead_time_version = frappe.cache().get_value(LEAD_TIME_VERSION_KEY)
+	if not lead_time_version:
+		lead_time_version = frappe.generate_hash(length=12)
+		frappe.cache().set_value(LEAD_TIME_VERSION_KEY, lead_time_version)
+	return lead_time_version
+
+
+def bump_lead_time_version():
+	"""Mark every stored decoupled lead time stale (a BOM or an item's lead-time input changed)"""
+	frappe.cache().delete_value([LEAD_TIME_VERSION_KEY, LEAD_TIME_STAMPS_KEY])
+
+
+def _get_children_first_order(bom_graph, item_codes):
+	"""item_codes ordered so that every item comes after its components among them (Kahn)"""
+	pending = {
+		item_code: sum(
+			1
+			for child_item_code, _qty, _ratio in bom_graph.get_children(item_code)
+			if child_item_code in item_codes
+		)
+		if bom_graph.explodes(item_code)
+		else 0
+		for item_code in item_codes
+	}
+	ready = sorted(item_code for item_code, count in pending.items() if not count)
+	order = []
+	while ready:
+		item_code = ready.pop()
+		order.append(item_code)
+		for parent_item_code, _qty, _ratio in bom_graph.get_parents(item_code):
+			if parent_item_code in pending:
+				pending[parent_item_code] -= 1
+				if not pending[parent_item_code]:
+					ready.append(parent_item_code)
+
+	# Items in a BOM loop never become ready; evaluate them last, like the recursive walk
+	# that skipped the repeated item
+	ordered = set(order)
+	order.extend(sorted(item_code for item_code in item_codes if item_code not in ordered))
+	return order
+
+
+def _get_decoupling_children(bom_graph, lead_time_map, item_code):
+	"""Components of item_code's default BOM that add to its lead time (non-buffer, existing)"""
+	if not bom_graph.explodes(item_code):
+		return iter(())
+
+	return iter(
+		[
+			child_item_code
+			for child_item_code, _qty, _ratio in bom_graph.get_children(item_code)
+			if child_item_code in lead_time_map and not bom_graph.is_buffer(child_item_code)
+		]
+	)
@@ -3,7 +3,8 @@
 
 import frappe
 from frappe import _
-from prakash_steel.utils.lead_time import update_decoupled_lead_time_for_item, get_default_bom
+from prakash_steel.utils.decoupled_lead_time import queue_decoupled_lead_time_update
+from prakash_steel.utils.lead_time import clear_default_bom_memo, get_default_bom
 
 
 def update_decoupled_lead_time_on_item_save(doc, method=None):
@@ -21,23 +22,15 @@ def update_decoupled_lead_time_on_item_save(doc, method=None):
 			"Item Docstatus Warning",
 		)
 
-	# Always update to ensure database has latest calculated value
-	# This is safe because the calculation is idempotent
-	try:
-		from prakash_steel.utils.lead_time import calculate_decoupled_lead_time
-
-		# Calculate the decoupled lead time
-		decoupled_lead_time = calculate_decoupled_lead_time(doc.name)
-
-		doc.custom_decoupled_lead_time = decoupled_lead_time
+	# Nothing the decoupled lead time depends on changed (new items count as changed)
+	bom_graph_changed = doc.has_value_changed("custom_buffer_flag") or doc.has_value_changed("item_group")
+	if not (bom_graph_changed or doc.has_value_changed("lead_time_days")):
+		return
 
-		if doc.has_value_changed("lead_time_days") or doc.has_value_changed("custom_buffer_flag"):
-			# Use frappe.enqueue to update parent items asynchronously after save
-			frappe.enqueue(
-				"prakash_steel.utils.item._update_parent_items_lead_time",
-				item_code=doc.name,
-				now=False,  # Run after current transaction
-			)
+	# Recomputed with the items above it in one background job after the transaction
+	# commits, together with every other item saved until then (e.g. a whole data import)
+	try:
+		queue_decoupled_lead_time_update([doc.name], bom_graph_changed=bom_graph_changed)
 	except Exception as e:
 		frappe.log_error(
 			f"Error updating decoupled lead time for item {doc.name} on save: {str(e)}",
@@ -45,18 +38,25 @@ def update_decoupled_lead_time_on_item_save(doc, method=None):
 		)
 
 
+def update_decoupled_lead_time_on_item_trash(doc, method=None):
+	# The items above it lose a component, and the cached BOM graph still holds it
+	queue_decoupled_lead_time_update([doc.name], bom_graph_changed=True)
+
+
+def update_decoupled_lead_time_on_item_rename(doc, method=None, old=None, new=None, merge=False):
+	# The cached BOM graph still knows the item (and a merged item's BOMs) by the old name
+	queue_decoupled_lead_time_update([new or doc.name], bom_graph_changed=True)
+
+
 def update_decoupled_lead_time_on_bom_save(doc, method=None):
-	# Only process submitted BOMs
-	if doc.docstatus != 1:
-		return
+	# Saved (draft or submitted), changed after submit, cancelled or deleted: active draft
+	# BOMs are default BOMs too, so the default BOM of doc.item may have changed
+	clear_default_bom_memo()
 
-	# Update the main item's decoupled lead time
+	# Update the main item's decoupled lead time and every item above it
 	if doc.item:
 		try:
-			update_decoupled_lead_time_for_item(doc.item)
-
-			# Also update parent items that use this item in their BOM
-			_update_parent_items_lead_time(doc.item)
+			queue_decoupled_lead_time_update([doc.item], bom_graph_changed=True)
 		except Exception as e:
 			frappe.log_error(
 				f"Error updating decoupled lead time for item {doc.item} when BOM {doc.name} changed: {str(e)}",
@@ -64,47 +64,6 @@ def update_decoupled_lead_time_on_bom_save(doc, method=None):
 			)
 
 
-def _update_parent_items_lead_time(item_code):
-	"""
-	Update decoupled lead time for all parent items that use this item in their BOM.
-	This is needed because when a child item's lead time changes, parent items are affected.
-
-	Args:
-		item_code: Item code whose parents need to be updated
-	"""
-	try:
-		# Find all BOMs that use this item
-		parent_boms = frappe.db.sql(
-			"""
-			SELECT DISTINCT b.item
-			FROM `tabBOM` b
-			INNER JOIN `tabBOM Item` bi ON b.name = bi.parent
-			WHERE bi.item_code = %s
-			AND b.is_active = 1
-			AND b.docstatus = 1
-			""",
-			(item_code,),
-			as_dict=True,
-		)
-
-		# Update each parent item
-		for bom in parent_boms:
-			parent_item = bom.item
-			if parent_item:
-				try:
-					update_decoupled_lead_time_for_item(parent_item)
-				except Exception as e:
-					frappe.log_error(
-						f"Error updating parent item {parent_item} lead time: {str(e)}",
-						"Parent Item Lead Time Update Error",
-					)
-	except Exception as e:
-		frappe.log_error(
-			f"Error finding parent items for {item_code}: {str(e)}",
-			"Parent Item Lead Time Update Error",
-		)
-
-
 def validate_min_order_qty_and_batch_size(doc, method=None):
 	"""
 	Validate that min_order_qty and custom_batch_size are mutually exclusive.
@@ -0,0 +1,87 @@
+# Copyright (c) 2025, beetashoke chakraborty and contributors
+# For license information, please see license.txt
+
+import time
+
+import frappe
+
+MRP_PROGRESS_EVENT = "prakash_steel_mrp_progress"
+MR_CREATION_PROGRESS_EVENT = "prakash_steel_mr_creation_progress"
+BULK_MATERIAL_REQUEST_PROGRESS_EVENT = "prakash_steel_bulk_material_request_progress"
+
+# Followers and the last progress of a job are kept as long as its result
+JOB_CACHE_EXPIRY = 3600
+
+
+def add_job_follower(job_id, user=None):
+	"""Push the progress of job_id to user (default: the session user)"""
+	user = user or frappe.session.user
+	cache_key = f"job_followers_{job_id}"
+	followers = frappe.cache().get_value(cache_key) or []
+	if user not in followers:
+		followers.append(user)
+		frappe.cache().set_value(cache_key, followers, expires_in_sec=JOB_CACHE_EXPIRY)
+
+
+def get_job_followers(job_id):
+	return frappe.cache().get_value(f"job_followers_{job_id}") or []
+
+
+class JobProgress:
+	"""
+	Throttled realtime progress of a background job, pushed to the users following it.
+
+	update() publishes at most once per min_interval seconds, unless the percentage
+	moved by min_percent_step or more since the last published update. The published
+	state is also kept under progress_cache_key for a client that opens the form while
+	the job runs. finish() always publishes, with the job's result or error.
+	"""
+
+	def __init__(self, event, job_id, progress_cache_key=None, min_interval=0.5, min_percent_step=5):
+		self.event = event
+		self.job_id = job_id
+		self.progress_cache_key = progress_cache_key
+		self.min_interval = min_interval
+		self.min_percent_step = min_percent_step
+		self._last_published = None
+		self._last_percent = 0
+
+	def update(self, current, total, message=None, **data):
+		percent = int(current * 100 / total) if total else 0
+		now = time.monotonic()
+		if (
+			self._last_published is not None
+			and now - self._last_published < self.min_interval
+			and percent - self._last_percent < self.min_percent_step
+		):
+			return
+
+		self._last_published = now
+		self._last_percent = percent
+		progress = {
+			"current": current,
+			"total": total,
+			"percent": percent,
+			"message": message,
+			**data,
+		}
+		if self.progress_cache_key:
+			frappe.cache().set_value(self.progress_cache_key, progress, expires_in_sec=JOB_CACHE_EXPIRY)
+		self._publish({"status": "running", **progress})
+
+	def finish(self, result=None, error=None):
+		if self.progress_cache_key:
+			frappe.cache().delete_value(self.progress_cache_key)
+		self._publish(
+			{"status": "failed", "error": error}
+			if error
+			else {"status": "completed", "percent": 100, "result": result}
+		)
+
+	def _publish(self, message):
+		if not self.job_id:
+			return
+
+		message["job_id"] = self.job_id
+		for user in get_job_followers(self.job_id):
+			frappe.publish_realtime(self.event, message, user=user)
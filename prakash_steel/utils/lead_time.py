@@ -3,263 +3,149 @@
 
 import frappe
 
+DEFAULT_BOM_MEMO_KEY = "prakash_steel.default_boms"
+
 
 def calculate_decoupled_lead_time(item_code):
-	if not item_code:
-		return 0
+	"""
+	Decoupled lead time of one item, computed over the cached BOM graph
+	(see prakash_steel.utils.decoupled_lead_time).
+	"""
+	from prakash_steel.utils.decoupled_lead_time import calculate_decoupled_lead_time_from_graph
 
-	# Check if item exists in database before trying to calculate
-	# This prevents errors when calculating for new items that haven't been saved yet
-	if not frappe.db.exists("Item", item_code):
+	if not item_code or not frappe.db.exists("Item", item_code):
 		return 0
 
-	# Track visited items to avoid infinite loops
-	visited_items = set()
-
-	# Cache for item_group lookups to improve performance
-	item_groups_cache = {}
-
-	# Calculate recursively
 	try:
-		result = _calculate_lead_time_recursive(item_code, visited_items, item_groups_cache)
-		return result
-	except frappe.DoesNotExistError:
-		# Item doesn't exist (might have been deleted), return 0 silently
-		return 0
+		return calculate_decoupled_lead_time_from_graph(item_code)
 	except Exception as e:
 		frappe.log_error(
-			f"Error in calculate_decoupled_lead_time for item {item_code}: {str(e)}\nTraceback: {frappe.get_traceback()}",
+			f"Error in calculate_decoupled_lead_time for item {item_code}: {str(e)}\n"
+			f"Traceback: {frappe.get_traceback()}",
 			"Lead Time Calculation Error",
 		)
 		return 0
 
 
-def _calculate_lead_time_recursive(item_code, visited_items, item_groups_cache=None):
-	if not item_code or item_code in visited_items:
-		return 0
-
-	# Mark as visited
-	visited_items.add(item_code)
-
-	# Initialize cache if not provided
-	if item_groups_cache is None:
-		item_groups_cache = {}
-
-	try:
-		# Get the item document
-		item_doc = frappe.get_doc("Item", item_code)
-
-		# Get item's own lead time (regardless of buffer status)
-		item_lead_time = flt(item_doc.get("lead_time_days") or 0)
-
-		# OPTIMIZATION: Check item_group first - Raw Materials don't have BOMs
-		# This avoids unnecessary BOM lookup for raw materials
-		item_group = item_doc.get("item_group")
-
-		# Cache the item_group for future use
-		if item_code not in item_groups_cache:
-			item_groups_cache[item_code] = item_group
-
-		# If it's a Raw Material, skip BOM check (end of branch)
-		if item_group == "Raw Material":
-			return item_lead_time
-
-		# Get default BOM for this item (only if not Raw Material)
-		bom = get_default_bom(item_code)
-
-		# If no BOM, return only item's own lead time (end of branch)
-		if not bom:
-			return item_lead_time
-
-		# Get BOM document
-		try:
-			bom_doc = frappe.get_doc("BOM", bom)
-		except Exception as e:
-			frappe.log_error(
-				f"Error getting BOM {bom} for item {item_code}: {str(e)}", "Lead Time Calculation Error"
-			)
-			return item_lead_time
-
-		# Process ALL BOM items (both buffer and non-buffer)
-		# For each child item, calculate its contribution to the longest path
-		child_contributions = []
-
-		for bom_item in bom_doc.items:
-			child_item_code = bom_item.item_code
-
-			# Skip if already visited (circular reference protection)
-			if child_item_code in visited_items:
-				continue
-
-			try:
-				# OPTIMIZATION: Check item_group from cache first
-				child_item_group = item_groups_cache.get(child_item_code)
-
-				# If it's Raw Material (from cache), get lead time but skip BOM check
-				if child_item_group == "Raw Material":
-					# Raw Material - get lead time but don't check for BOM (end of branch)
-					child_item = frappe.get_doc("Item", child_item_code)
-					child_lead_time = flt(child_item.get("lead_time_days") or 0)
-					# Raw Material contributes only its own lead time
-					child_contributions.append(child_lead_time)
-					continue
+def get_default_bom(item_code):
+	"""
+	Get the default BOM for an item.
 
-				# Get child item document
-				child_item = frappe.get_doc("Item", child_item_code)
+	Args:
+		item_code (str): Item code
 
-				# Cache item_group if not already cached
-				if child_item_code not in item_groups_cache:
-					item_groups_cache[child_item_code] = child_item.get("item_group")
+	Returns:
+		str: BOM name if found, None otherwise
+	"""
+	if not item_code:
+		return None
 
-				# Get child item's own lead time
-				child_lead_time = flt(child_item.get("lead_time_days") or 0)
+	return get_default_boms([item_code]).get(item_code)
 
-				# Check if child is buffer
-				child_buffer_flag = child_item.get("custom_buffer_flag")
-				child_is_buffer = child_buffer_flag == "Buffer"
 
-				if child_is_buffer:
-					# Buffer item: stop the path here, contribute 0 (don't traverse its BOM)
-					# The path ends at the buffer item, so it contributes nothing to parent
-					child_contributions.append(0)
-				else:
-					# Non-buffer item: recursively get its full decoupled_lead_time
-					# Create a copy of visited_items for this branch
-					branch_visited = visited_items.copy()
-
-					# Recursively calculate FULL decoupled lead time for this child
-					child_full_decoupled = _calculate_lead_time_recursive(
-						child_item_code, branch_visited, item_groups_cache
-					)
+def get_default_boms(item_codes=None):
+	"""
+	Get the default BOM of many items at once.
 
-					# The child's full decoupled includes its own lead_time + BOM contribution
-					# We need the full value for the path calculation
-					child_contributions.append(child_full_decoupled)
+	Precedence per item: active default submitted BOM, then any active submitted BOM,
+	then any active BOM (even if not submitted), newest first within each tier.
+	Resolved in one query and memoized for the rest of the request or job, so repeated
+	lookups (e.g. from recursive traversals) don't hit the database again.
 
-			except frappe.DoesNotExistError:
-				# Child item doesn't exist, skip it
-				continue
-			except Exception as e:
-				frappe.log_error(
-					f"Error processing child item {child_item_code} in BOM {bom}: {str(e)}",
-					"Lead Time Calculation Error",
-				)
-				continue
+	Args:
+		item_codes (list): Item codes to resolve; None resolves every item with a BOM
 
-		# If no valid child items, return only item's own lead time
-		if not child_contributions:
-			return item_lead_time
+	Returns:
+		dict: item_code -> BOM name (None for requested items without a BOM)
+	"""
+	memo = _get_default_bom_memo()
+	boms = memo["boms"]
 
-		# Take the maximum contribution from all children (longest path)
-		max_child_contribution = max(child_contributions)
+	if item_codes is None:
+		if not memo["complete"]:
+			boms.update({row.item: row.name for row in get_default_bom_rows()})
+			memo["complete"] = True
+		return {item_code: bom for item_code, bom in boms.items() if bom}
 
-		# Return: item's own lead time + longest path through BOM
-		result = item_lead_time + max_child_contribution
-		return result
+	item_codes = set(item_codes)
+	if not memo["complete"]:
+		missing = [item_code for item_code in item_codes if item_code and item_code not in boms]
+		if missing:
+			resolved = {row.item: row.name for row in get_default_bom_rows(missing)}
+			for item_code in missing:
+				boms[item_code] = resolved.get(item_code)
 
-	except frappe.DoesNotExistError:
-		# Item doesn't exist
-		frappe.log_error(f"Item {item_code} does not exist", "Lead Time Calculation Error")
-		return 0
-	except Exception as e:
-		frappe.log_error(
-			f"Error calculating lead time for item {item_code}: {str(e)}\nTraceback: {frappe.get_traceback()}",
-			"Lead Time Calculation Error",
-		)
-		return 0
+	return {item_code: boms.get(item_code) for item_code in item_codes}
 
 
-def get_default_bom(item_code):
+def get_default_bom_rows(item_codes=None):
 	"""
-	Get the default BOM for an item.
-
-	Args:
-		item_code (str): Item code
+	Return the winning BOM row (item, name, quantity) of each item, one query.
 
-	Returns:
-		str: BOM name if found, None otherwise
+	Rows are ranked with the same precedence as get_default_bom and the first row of
+	every item is kept.
 	"""
-	# First try to get default active BOM (submitted)
-	bom = frappe.db.get_value(
-		"BOM",
-		{"item": item_code, "is_active": 1, "is_default": 1, "docstatus": 1},
-		"name",
-		order_by="creation desc",
+	conditions = ""
+	values = {}
+	if item_codes is not None:
+		if not item_codes:
+			return []
+		conditions = "AND item IN %(item_codes)s"
+		values["item_codes"] = tuple(item_codes)
+
+	rows = frappe.db.sql(
+		f"""
+		SELECT item, name, quantity
+		FROM `tabBOM`
+		WHERE is_active = 1
+			{conditions}
+		ORDER BY
+			item,
+			CASE WHEN is_default = 1 AND docstatus = 1 THEN 0 WHEN docstatus = 1 THEN 1 ELSE 2 END,
+			creation DESC
+		""",
+		values,
+		as_dict=True,
 	)
 
-	# If no default submitted BOM, try any active submitted BOM
-	if not bom:
-		bom = frappe.db.get_value(
-			"BOM", {"item": item_code, "is_active": 1, "docstatus": 1}, "name", order_by="creation desc"
-		)
+	default_rows = []
+	seen_items = set()
+	for row in rows:
+		if row.item in seen_items:
+			continue
+		seen_items.add(row.item)
+		default_rows.append(row)
 
-	# If still no BOM, try any active BOM (even if not submitted)
-	if not bom:
-		bom = frappe.db.get_value(
-			"BOM", {"item": item_code, "is_active": 1}, "name", order_by="creation desc"
-		)
+	return default_rows
 
-	return bom
 
+def clear_default_bom_memo():
+	"""Forget memoized default BOMs (call after BOMs are submitted, changed or cancelled)"""
+	request_cache = getattr(frappe.local, "request_cache", None)
+	if request_cache is not None:
+		request_cache.pop(DEFAULT_BOM_MEMO_KEY, None)
 
-def update_decoupled_lead_time_for_item(item_code):
-	"""
-	Update the decoupled lead time field for a specific item.
-	Args:
-		item_code (str): Item code to update
-	"""
-	try:
-		# Safety check: Verify Item exists and is not submitted (Item should never be submitted)
-		item_docstatus = frappe.db.get_value("Item", item_code, "docstatus")
-		if item_docstatus is None:
-			# Item doesn't exist
-			return None
-
-		# Item should always have docstatus = 0 (it's a save doctype, not submit doctype)
-		# If somehow it's submitted, log a warning but still update the field
-		if item_docstatus != 0:
-			frappe.log_error(
-				f"WARNING: Item {item_code} has docstatus={item_docstatus} (expected 0). Item should not be submitted.",
-				"Item Docstatus Warning",
-			)
 
-		decoupled_lead_time = calculate_decoupled_lead_time(item_code)
+def _get_default_bom_memo():
+	# frappe.local.request_cache lives for one web request or background job
+	request_cache = getattr(frappe.local, "request_cache", None)
+	if request_cache is None:
+		return {"boms": {}, "complete": False}
 
-		# Use frappe.db.set_value() to update only the field value
-		# This does NOT submit the document, it only updates the field
-		frappe.db.set_value("Item", item_code, "custom_decoupled_lead_time", decoupled_lead_time)
-
-		frappe.db.commit()
-
-		return decoupled_lead_time
-	except Exception as e:
-		frappe.log_error(
-			f"Error updating decoupled lead time for item {item_code}: {str(e)}",
-			"Decoupled Lead Time Update Error",
-		)
-		return None
+	memo = request_cache.get(DEFAULT_BOM_MEMO_KEY)
+	if memo is None:
+		memo = request_cache[DEFAULT_BOM_MEMO_KEY] = {"boms": {}, "complete": False}
+	return memo
 
 
 def update_decoupled_lead_time_for_finished_goods():
 	"""
-	Update decoupled lead time for all finished goods items that have BOMs.
+	Update the decoupled lead time of every item in one pass over the BOM graph
+	(see prakash_steel.utils.decoupled_lead_time).
 	"""
-	# Get all items that have active BOMs
-	items_with_bom = frappe.db.sql(
-		"""
-		SELECT DISTINCT b.item
-		FROM `tabBOM` b
-		WHERE b.is_active = 1
-		AND b.docstatus = 1
-	""",
-		as_dict=True,
-	)
+	from prakash_steel.utils.decoupled_lead_time import update_all_decoupled_lead_times
 
-	updated_count = 0
-	for item in items_with_bom:
-		item_code = item.item
-		if update_decoupled_lead_time_for_item(item_code):
-			updated_count += 1
+	updated_count = update_all_decoupled_lead_times()
 
 	frappe.msgprint(f"Updated decoupled lead time for {updated_count} items")
 	return updated_count
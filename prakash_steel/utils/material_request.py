@@ -0,0 +1,214 @@
+# Copyright (c) 2025, beetashoke chakraborty and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.utils import add_days, cint, flt, today
+
+# Item types made in-house get "Manufacture" requests, everything else "Purchase"
+MANUFACTURE_ITEM_TYPES = ("BB", "RB")
+DEFAULT_MAX_LINES_PER_REQUEST = 50
+GROUP_BY_OPTIONS = ("item_group", None)
+
+# How the quantity of an item with a batch size goes on its Material Request
+ONE_LINE_PER_BATCH = "One Line per Batch"
+ONE_LINE_PER_ITEM = "One Line per Item"
+BATCH_LINE_POLICIES = (ONE_LINE_PER_BATCH, ONE_LINE_PER_ITEM)
+
+
+def get_material_request_type(item_type):
+	return "Manufacture" if item_type in MANUFACTURE_ITEM_TYPES else "Purchase"
+
+
+def get_item_request_details(item_codes):
+	"""Stock UOM, item group and item type of many items in one query"""
+	if not item_codes:
+		return {}
+
+	items = frappe.db.sql(
+		"""
+		SELECT name, stock_uom, item_group, custom_item_type, custom_batch_size
+		FROM `tabItem`
+		WHERE name IN %s
+		""",
+		(tuple(item_codes),),
+		as_dict=True,
+	)
+	return {item.name: item for item in items}
+
+
+def split_into_batches(qty, batch_size):
+	"""Quantities of the batches qty is made of: full batches, then any remainder"""
+	qty, batch_size = flt(qty), flt(batch_size)
+	if batch_size <= 0 or qty <= batch_size:
+		return [qty]
+
+	batch_count = int(qty // batch_size)
+	batches = [batch_size] * batch_count
+	remainder = flt(qty - batch_count * batch_size, 9)
+	if remainder > 0:
+		batches.append(remainder)
+	return batches
+
+
+def group_material_request_lines(lines, group_by="item_group", max_lines_per_request=None):
+	"""
+	Split request lines into batches, one batch per Material Request.
+
+	Lines are grouped by material_request_type and, when group_by is set, by that line
+	field (e.g. item_group). Each group keeps its line order and is cut into chunks of
+	at most max_lines_per_request lines (no cap when it is 0 or None).
+	"""
+	groups = {}
+	for line in lines:
+		key = (line["material_request_type"], line.get(group_by) if group_by else None)
+		groups.setdefault(key, []).append(line)
+
+	batches = []
+	for (material_request_type, group), group_lines in groups.items():
+		chunk_size = cint(max_lines_per_request) or len(group_lines)
+		for start in range(0, len(group_lines), chunk_size):
+			batches.append(
+				{
+					"material_request_type": material_request_type,
+					"group": group,
+					"lines": group_lines[start : start + chunk_size],
+				}
+			)
+
+	return batches
+
+
+def create_material_requests_in_bulk(
+	item_qty_map,
+	company,
+	warehouse,
+	group_by="item_group",
+	max_lines_per_request=DEFAULT_MAX_LINES_PER_REQUEST,
+	material_request_type=None,
+	progress_callback=None,
+	batch_line_policy=ONE_LINE_PER_ITEM,
+	commit_every=None,
+):
+	"""
+	Create and submit multi-line Material Requests for item_code -> qty.
+
+	Company, warehouse and item UOM details are checked once for the whole batch instead
+	of once per item. Items are grouped into documents by group_material_request_lines;
+	material_request_type forces one type for every line, otherwise it follows the item
+	type as MRP Generation does. With batch_line_policy ONE_LINE_PER_BATCH an item with a
+	batch size gets one line per batch (see split_into_batches) instead of one line.
+
+	Every document is inserted and submitted under its own savepoint, so one failing
+	document does not undo the others; commit_every commits after every that many
+	documents, so a long run keeps what it has created.
+
+	progress_callback(current, total, result) is called after each document.
+
+	Returns:
+		dict: success_count (documents created), error_count, material_requests, errors,
+		line_count, message; or {"error": ...} when company or warehouse is invalid
+	"""
+	if not frappe.db.exists("Company", company):
+		return {"error": f"Company '{company}' not found in the system."}
+
+	if not frappe.db.exists("Warehouse", warehouse):
+		return {"error": f"Warehouse '{warehouse}' not found in the system."}
+
+	result = {"success_count": 0, "error_count": 0, "material_requests": [], "errors": [], "line_count": 0}
+
+	item_qty_map = {
+		item_code: flt(qty) for item_code, qty in item_qty_map.items() if item_code and flt(qty) > 0
+	}
+	item_details = get_item_request_details(list(item_qty_map))
+	schedule_date = add_days(today(), 7)
+
+	lines = []
+	for item_code, qty in item_qty_map.items():
+		item = item_details.get(item_code)
+		if not item:
+			result["error_count"] += 1
+			result["errors"].append(f"{item_code}: Item not found")
+			continue
+
+		if not item.stock_uom:
+			result["error_count"] += 1
+			result["errors"].append(f"{item_code}: Stock UOM not found")
+			continue
+
+		line_qtys = [qty]
+		if batch_line_policy == ONE_LINE_PER_BATCH:
+			line_qtys = split_into_batches(qty, item.custom_batch_size)
+
+		# Lines are raised in the stock UOM, so no conversion lookup is needed
+		for line_qty in line_qtys:
+			lines.append(
+				{
+					"item_code": item_code,
+					"qty": line_qty,
+					"uom": item.stock_uom,
+					"stock_uom": item.stock_uom,
+					"conversion_factor": 1.0,
+					"warehouse": warehouse,
+					"schedule_date": schedule_date,
+					"item_group": item.item_group,
+					"material_request_type": material_request_type
+					or get_material_request_type(item.custom_item_type),
+				}
+			)
+
+	result["line_count"] = len(lines)
+	batches = group_material_request_lines(lines, group_by, max_lines_per_request)
+
+	for idx, batch in enumerate(batches, 1):
+		frappe.db.savepoint("bulk_material_request")
+		try:
+			mr_doc = frappe.get_doc(
+				{
+					"doctype": "Material Request",
+					"company": company,
+					"transaction_date": today(),
+					"schedule_date": schedule_date,
+					"material_request_type": batch["material_request_type"],
+					"items": [
+						{
+							"item_code": line["item_code"],
+							"qty": line["qty"],
+							"uom": line["uom"],
+							"stock_uom": line["stock_uom"],
+							"conversion_factor": line["conversion_factor"],
+							"warehouse": line["warehouse"],
+							"schedule_date": line["schedule_date"],
+						}
+						for line in batch["lines"]
+					],
+				}
+			)
+			mr_doc.insert()
+			mr_doc.submit()
+
+			result["success_count"] += 1
+			result["material_requests"].append(mr_doc.name)
+		except Exception as e:
+			frappe.db.rollback(save_point="bulk_material_request")
+			item_codes = [line["item_code"] for line in batch["lines"]]
+			result["error_count"] += 1
+			result["errors"].append(
+				f"{', '.join(item_codes[:3])}{' ...' if len(item_codes) > 3 else ''}: {e!s}"
+			)
+			frappe.log_error(
+				f"Error creating Material Request for {', '.join(item_codes)}: {e!s}",
+				"Bulk Material Request Error",
+			)
+
+		if commit_every and idx % cint(commit_every) == 0:
+			frappe.db.commit()
+
+		if progress_callback:
+			progress_callback(idx, len(batches), result)
+
+	item_count = len({line["item_code"] for line in lines})
+	result["message"] = (
+		f"Created {result['success_count']} Material Request(s) for {item_count} item(s), "
+		f"{result['error_count']} failed"
+	)
+	return result
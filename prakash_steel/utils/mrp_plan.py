@@ -0,0 +1,488 @@
+# Copyright (c) 2025, beetashoke chakraborty and contributors
+# For license information, please see license.txt
+
+"""
+Persisted MRP plan and net-change planning.
+
+Every MRP run leaves one MRP Plan Item per planned item holding the inputs it was
+planned with and the recommendations it got. A net-change run compares today's inputs
+with those rows, and only the items whose own inputs or BOM changed, plus whatever
+their changed recommendations flow into, are planned again. Everything else keeps its
+stored parent demand.
+"""
+
+import json
+import os
+
+import frappe
+from frappe.utils import cint, date_diff, flt, now, now_datetime
+from frappe.utils.background_jobs import create_job_id, is_job_enqueued
+from frappe.utils.synchronization import filelock
+
+from prakash_steel.utils import report_cache
+
+RUN_TYPE_FULL = "Full"
+RUN_TYPE_NET_CHANGE = "Net Change"
+RUN_TYPES = (RUN_TYPE_FULL, RUN_TYPE_NET_CHANGE)
+
+# Quantities an item is planned with; a change in any of them re-plans the item
+PLAN_INPUT_FIELDS = (
+	"tog",
+	"qualified_demand",
+	"open_so",
+	"stock",
+	"wip",
+	"open_po",
+	"mrq",
+	"moq",
+	"batch_size",
+)
+PLAN_KEY_FIELDS = ("buffer_flag", "sku_type", "bom_lines")
+PLAN_OUTPUT_FIELDS = ("parent_demand", "initial_order_rec", "final_order_rec", "net_order_rec")
+
+# Columns served when the plan is read page by page, and the ones it can be sorted on
+PLAN_VIEW_FIELDS = (
+	"item_code",
+	"mrp_run",
+	"item_type",
+	"buffer_flag",
+	"sku_type",
+	"bom_no",
+	*PLAN_INPUT_FIELDS,
+	*PLAN_OUTPUT_FIELDS,
+)
+PLAN_SORT_FIELDS = ("item_code", "buffer_flag", "sku_type", *PLAN_INPUT_FIELDS, *PLAN_OUTPUT_FIELDS)
+DEFAULT_PAGE_LENGTH = 50
+MAX_PAGE_LENGTH = 500
+
+# Float columns are stored as decimal(21, 9), so values are compared at that precision
+PLAN_PRECISION = 9
+DEFAULT_FULL_REGENERATION_DAYS = 7
+
+# Site config flag that makes every MRP run write the full per-item breakdown log
+MRP_DEBUG_SITE_CONFIG_KEY = "prakash_steel_mrp_debug"
+
+MRP_WORKER = "prakash_steel.prakash_steel.doctype.mrp_genaration.mrp_genaration._generate_mrp_order_recommendations_worker"
+
+# Besides PLANNING_FINGERPRINT_DOCTYPES (see prakash_steel.utils.report_cache), an MRP run
+# reads these; they are too large to count on every request, so only their latest change
+# is compared
+FINGERPRINT_LATEST_CHANGE_DOCTYPES = ("Stock Ledger Entry", "Sales Order Item", "Purchase Order Item")
+
+
+def get_bom_lines(bom_graph, item_code):
+	"""Exploding BOM lines of an item as a JSON list of [child_item_code, qty per unit]"""
+	if not bom_graph.explodes(item_code):
+		return "[]"
+	return json.dumps([[child, ratio] for child, _qty, ratio in bom_graph.get_children(item_code)])
+
+
+def get_full_regeneration_days():
+	days = frappe.db.get_single_value("Production planning settings", "mrp_full_regeneration_days")
+	return DEFAULT_FULL_REGENERATION_DAYS if days is None else cint(days)
+
+
+def get_planning_processes():
+	"""Processes an MRP run plans in; 0 in the settings means one per CPU core"""
+	processes = cint(frappe.db.get_single_value("Production planning settings", "mrp_planning_processes"))
+	return processes or os.cpu_count() or 1
+
+
+def get_full_regeneration_reason(run_type):
+	"""Why a run has to plan every item from scratch, or None when net change is enough"""
+	if run_type != RUN_TYPE_NET_CHANGE:
+		return "Full run requested"
+
+	# Buckets move with the date, so a time-phased plan is never carried over
+	if cint(frappe.db.get_single_value("Production planning settings", "mrp_time_phased")):
+		return "Time-phased planning re-plans every item"
+
+	last_full_run = frappe.db.get_value(
+		"MRP Run",
+		{"run_type": RUN_TYPE_FULL, "status": "Completed"},
+		"started_on",
+		order_by="started_on desc",
+	)
+	if not last_full_run:
+		return "No completed full run to start from"
+
+	days = get_full_regeneration_days()
+	if days and date_diff(now_datetime(), last_full_run) >= days:
+		return f"Last full run is {days} or more day(s) old"
+
+	return None
+
+
+def get_last_run(**filters):
+	return frappe.db.get_value(
+		"MRP Run", {"status": "Completed", **filters}, "name", order_by="started_on desc"
+	)
+
+
+def save_mrp_run(run_type, status, started_on, **values):
+	"""Record a finished (or failed) run and return its name"""
+	mrp_run = frappe.get_doc(
+		{
+			"doctype": "MRP Run",
+			"run_type": run_type,
+			"status": status,
+			"user": frappe.session.user,
+			"started_on": started_on,
+			"completed_on": now_datetime(),
+			**values,
+		}
+	)
+	mrp_run.insert(ignore_permissions=True)
+	return mrp_run.name
+
+
+def get_previous_plan():
+	"""Every stored MRP Plan Item as item_code -> row"""
+	fields = ", ".join(("item_code", *PLAN_KEY_FIELDS, *PLAN_INPUT_FIELDS, *PLAN_OUTPUT_FIELDS))
+	rows = frappe.db.sql(f"SELECT {fields} FROM `tabMRP Plan Item`", as_dict=True)
+	return {row.item_code: row for row in rows}
+
+
+def get_changed_items(plan_rows, previous_plan):
+	"""
+	Items that must be planned again because of their own inputs or BOM.
+
+	An item is changed when it is new, or any of its PLAN_INPUT_FIELDS or
+	PLAN_KEY_FIELDS differ from the stored row. When a BOM changed or an item dropped
+	out of the plan, the children on both the old and the new BOM are changed too, since
+	the demand they receive from it moved.
+	"""
+	changed = set()
+	for item_code, row in plan_rows.items():
+		previous = previous_plan.get(item_code)
+		if previous is None or _inputs_differ(row, previous):
+			changed.add(item_code)
+
+		if previous is not None and row["bom_lines"] != previous.bom_lines:
+			changed.update(_get_bom_line_children(row["bom_lines"]))
+			changed.update(_get_bom_line_children(previous.bom_lines))
+
+	for item_code in set(previous_plan) - set(plan_rows):
+		changed.update(_get_bom_line_children(previous_plan[item_code].bom_lines))
+
+	return {item_code for item_code in changed if item_code in plan_rows}
+
+
+def propagate_net_demand(
+	bom_graph, item_order, dirty_items, get_net_order_rec, item_buffer_map, previous_plan=None
+):
+	"""
+	Plan the dirty items in low-level-code order and pass changes down the BOMs.
+
+	item_order is the low-level-code order of every planned item (see
+	BOMGraph.get_low_level_order), so all parents of an item are settled before it. Each
+	dirty non-buffer item pulls its parent demand from all of its parents: the fresh net
+	recommendation of parents planned in this pass, the stored one of the others. When an
+	item's net recommendation moves, its children become dirty as well. A full run is the
+	same pass with every item dirty, so both modes add up parent demand in the same order.
+
+	get_net_order_rec(item_code, parent_demand) returns the net order recommendation.
+
+	Returns:
+		(parent_demand_map, net_order_recs) for the items planned in this pass
+	"""
+	previous_plan = previous_plan or {}
+	position = {item_code: idx for idx, item_code in enumerate(item_order)}
+	dirty = set(dirty_items)
+	parent_demand_map = {}
+	net_order_recs = {}
+
+	for item_code in item_order:
+		if item_code not in dirty:
+			continue
+
+		parent_demand = 0
+		if item_buffer_map.get(item_code, "Non-Buffer") != "Buffer":
+			parents = [parent for parent in bom_graph.get_parents(item_code) if parent[0] in position]
+			parents.sort(key=lambda parent: position[parent[0]])
+			for parent_item_code, _bom_item_qty, normalized_bom_qty in parents:
+				if parent_item_code in net_order_recs:
+					parent_net_order_rec = net_order_recs[parent_item_code]
+				else:
+					parent_net_order_rec = _get_previous_value(
+						previous_plan, parent_item_code, "net_order_rec"
+					)
+
+				if parent_net_order_rec > 0:
+					parent_demand += parent_net_order_rec * normalized_bom_qty
+
+		net_order_rec = get_net_order_rec(item_code, parent_demand)
+		parent_demand_map[item_code] = parent_demand
+		net_order_recs[item_code] = net_order_rec
+
+		previous = previous_plan.get(item_code)
+		if previous is None or flt(net_order_rec, PLAN_PRECISION) != flt(
+			previous.net_order_rec, PLAN_PRECISION
+		):
+			dirty.update(child for child, _qty, _ratio in bom_graph.get_children(item_code))
+
+	return parent_demand_map, net_order_recs
+
+
+def save_plan(mrp_run, plan_rows, item_codes=None, removed_item_codes=None):
+	"""
+	Write the plan rows of item_codes (all of them when None) as MRP Plan Items.
+
+	Rows are replaced with a delete and one bulk insert instead of a save per document;
+	the plan is a derived cache of the run, so no controller runs on it.
+	"""
+	if item_codes is None:
+		frappe.db.delete("MRP Plan Item")
+		item_codes = list(plan_rows)
+	else:
+		item_codes = list(item_codes)
+		stale = item_codes + list(removed_item_codes or ())
+		for start in range(0, len(stale), 1000):
+			frappe.db.delete("MRP Plan Item", {"name": ("in", stale[start : start + 1000])})
+
+	if not item_codes:
+		return
+
+	timestamp = now()
+	fields = (
+		"name",
+		"item_code",
+		"mrp_run",
+		"item_type",
+		"bom_no",
+		*PLAN_KEY_FIELDS,
+		*PLAN_INPUT_FIELDS,
+		*PLAN_OUTPUT_FIELDS,
+		"time_phased_plan",
+		"creation",
+		"modified",
+		"owner",
+		"modified_by",
+	)
+	values = []
+	for item_code in item_codes:
+		row = {
+			**plan_rows[item_code],
+			"name": item_code,
+			"item_code": item_code,
+			"mrp_run": mrp_run,
+			"creation": timestamp,
+			"modified": timestamp,
+			"owner": frappe.session.user,
+			"modified_by": frappe.session.user,
+		}
+		values.append(tuple(row.get(fieldname) for fieldname in fields))
+
+	frappe.db.bulk_insert("MRP Plan Item", fields, values)
+
+
+def get_plan_items(
+	start=0, page_length=DEFAULT_PAGE_LENGTH, sort_by="net_order_rec", sort_order="desc", filters=None
+):
+	"""
+	One page of the stored plan of enabled items, with the total row count.
+
+	filters may hold item_code (substring), buffer_flag, sku_type and
+	with_recommendation (only items with a net order recommendation).
+	"""
+	filters = filters or {}
+	start = max(0, cint(start))
+	page_length = min(max(1, cint(page_length) or DEFAULT_PAGE_LENGTH), MAX_PAGE_LENGTH)
+	if sort_by not in PLAN_SORT_FIELDS:
+		sort_by = "net_order_rec"
+	sort_order = "asc" if str(sort_order).lower() == "asc" else "desc"
+
+	conditions = ["i.disabled = 0"]
+	values = {"start": start, "page_length": page_length}
+	if filters.get("item_code"):
+		conditions.append("p.item_code LIKE %(item_code)s")
+		values["item_code"] = f"%{filters['item_code']}%"
+	for fieldname in ("buffer_flag", "sku_type"):
+		if filters.get(fieldname):
+			conditions.append(f"p.{fieldname} = %({fieldname})s")
+			values[fieldname] = filters[fieldname]
+	if cint(filters.get("with_recommendation")):
+		conditions.append("p.net_order_rec > 0")
+
+	where = " AND ".join(conditions)
+	total_count = frappe.db.sql(
+		f"""
+		SELECT COUNT(*)
+		FROM `tabMRP Plan Item` p
+		INNER JOIN `tabItem` i ON i.name = p.item_code
+		WHERE {where}
+		""",
+		values,
+	)[0][0]
+
+	fields = ", ".join(f"p.{fieldname}" for fieldname in PLAN_VIEW_FIELDS)
+	rows = frappe.db.sql(
+		f"""
+		SELECT {fields}, i.item_name
+		FROM `tabMRP Plan Item` p
+		INNER JOIN `tabItem` i ON i.name = p.item_code
+		WHERE {where}
+		ORDER BY p.{sort_by} {sort_order}, p.item_code
+		LIMIT %(start)s, %(page_length)s
+		""",
+		values,
+		as_dict=True,
+	)
+
+	return {
+		"rows": rows,
+		"total_count": total_count,
+		"start": start,
+		"page_length": page_length,
+		"sort_by": sort_by,
+		"sort_order": sort_order,
+	}
+
+
+def get_plan_net_order_recommendations():
+	"""item_code -> net order recommendation of the enabled items the stored plan orders"""
+	rows = frappe.db.sql(
+		"""
+		SELECT p.item_code, p.net_order_rec
+		FROM `tabMRP Plan Item` p
+		INNER JOIN `tabItem` i ON i.name = p.item_code
+		WHERE i.disabled = 0 AND p.net_order_rec > 0
+		ORDER BY p.item_code
+		"""
+	)
+	return {item_code: flt(net_order_rec) for item_code, net_order_rec in rows}
+
+
+def get_plan_outputs():
+	"""Every PLAN_OUTPUT_FIELDS column of the stored plan as item_code -> value"""
+	fields = ", ".join(("item_code", *PLAN_OUTPUT_FIELDS))
+	rows = frappe.db.sql(f"SELECT {fields} FROM `tabMRP Plan Item`", as_dict=True)
+	return frappe._dict(
+		{fieldname: {row.item_code: flt(row[fieldname]) for row in rows} for fieldname in PLAN_OUTPUT_FIELDS}
+	)
+
+
+def get_plan_item(item_code):
+	return frappe.db.get_value("MRP Plan Item", item_code, "*", as_dict=True)
+
+
+def get_plan_parents(item_code):
+	"""
+	Stored plan rows whose BOM explodes into item_code, each with the ratio (child qty
+	per unit of the parent) it is used at, ordered by parent item code.
+	"""
+	# bom_lines is JSON text, so LIKE narrows the scan and the JSON decides
+	pattern = json.dumps(item_code).replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+	rows = frappe.db.sql(
+		"""
+		SELECT item_code, bom_no, bom_lines, net_order_rec
+		FROM `tabMRP Plan Item`
+		WHERE bom_lines LIKE %s
+		ORDER BY item_code
+		""",
+		(f"%[{pattern},%",),
+		as_dict=True,
+	)
+
+	parents = []
+	for row in rows:
+		for child, ratio in json.loads(row.bom_lines or "[]"):
+			if child == item_code:
+				parents.append(frappe._dict(row, ratio=flt(ratio)))
+	return parents
+
+
+def is_debug_enabled(debug=None):
+	return bool(cint(debug) or cint(frappe.conf.get(MRP_DEBUG_SITE_CONFIG_KEY)))
+
+
+def get_data_fingerprint():
+	"""
+	Cheap fingerprint of the data an MRP run reads: the row count and latest change of
+	every source table, the latest change of Production planning settings, and today's
+	date (qualified demand depends on it).
+	"""
+	return report_cache.get_data_fingerprint(latest_change_doctypes=FINGERPRINT_LATEST_CHANGE_DOCTYPES)
+
+
+def get_shared_run(data_fingerprint):
+	"""The latest completed run if it was planned over data_fingerprint, else None"""
+	last_run = frappe.db.get_value(
+		"MRP Run",
+		{"status": "Completed"},
+		["name", "run_type", "data_fingerprint", "item_count", "recommendation_count", "completed_on"],
+		as_dict=True,
+		order_by="started_on desc",
+	)
+	if last_run and last_run.data_fingerprint == data_fingerprint:
+		return last_run
+
+
+def enqueue_shared_job(method, shared_job_id, **kwargs):
+	"""
+	Enqueue method under a fixed job id, or join the job already queued or running under
+	it, so concurrent requests for the same work run it once.
+
+	Returns (RQ job id, True when an existing job was joined).
+	"""
+	job_id = create_job_id(shared_job_id)
+	with filelock("prakash_steel_shared_jobs", timeout=10):
+		if is_job_enqueued(shared_job_id):
+			return job_id, True
+
+		# A finished job under the same id may have left its result behind
+		for cache_key in (f"mrp_result_{job_id}", f"mr_creation_result_{job_id}"):
+			frappe.cache().delete_value(cache_key)
+
+		job = frappe.enqueue(method, job_id=shared_job_id, **kwargs)
+
+	return job.id, False
+
+
+def enqueue_mrp_run(run_type, data_fingerprint, job_name, debug=0, **kwargs):
+	"""
+	Queue an MRP run, or join the one already queued or running over the same data with
+	the same run type and debug flag, so a request never gets a different kind of run
+	"""
+	debug = cint(debug)
+	return enqueue_shared_job(
+		MRP_WORKER,
+		f"mrp_generation::{frappe.scrub(run_type)}::{debug}::{data_fingerprint}",
+		queue="long",
+		timeout=3600,
+		job_name=job_name,
+		run_type=run_type,
+		debug=debug,
+		**kwargs,
+	)
+
+
+def run_periodic_full_regeneration():
+	"""
+	Scheduled safety net: queue a full MRP run once the last one is older than
+	"MRP Full Regeneration (Days)" in Production planning settings (0 turns it off).
+	"""
+	days = get_full_regeneration_days()
+	if not days or get_full_regeneration_reason(RUN_TYPE_NET_CHANGE) is None:
+		return
+
+	enqueue_mrp_run(
+		RUN_TYPE_FULL, get_data_fingerprint(), job_name="MRP Generation - Periodic Full Regeneration"
+	)
+
+
+def _inputs_differ(row, previous):
+	for fieldname in PLAN_INPUT_FIELDS:
+		if flt(row[fieldname], PLAN_PRECISION) != flt(previous.get(fieldname), PLAN_PRECISION):
+			return True
+
+	return any((row[fieldname] or "") != (previous.get(fieldname) or "") for fieldname in PLAN_KEY_FIELDS)
+
+
+def _get_bom_line_children(bom_lines):
+	return [child for child, _ratio in json.loads(bom_lines or "[]")]
+
+
+def _get_previous_value(previous_plan, item_code, fieldname):
+	previous = previous_plan.get(item_code)
+	return flt(previous.get(fieldname)) if previous else 0
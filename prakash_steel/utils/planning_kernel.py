@@ -0,0 +1,607 @@
+# Copyright (c) 2025, beetashoke chakraborty and contributors
+# For license information, please see license.txt
+
+"""
+Planning kernel shared by MRP Generation and the PO Recomendation for PSP report.
+
+Both entry points load the same PlanningInputs snapshot and plan through a
+PlanningKernel: one low-level-code pass over the BOM graph settles every item's parent
+demand and net order recommendation, then the final recommendations are evaluated
+column-wise. MRP Generation persists the result as MRP Plan Items, and the report can
+render from those rows instead of planning again.
+"""
+
+import math
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import cached_property
+
+import frappe
+from frappe.utils import flt, today
+
+from prakash_steel.utils import mrp_plan, order_recommendation
+from prakash_steel.utils.bom_graph import load_bom_graph
+from prakash_steel.utils.profiling import PhaseProfiler
+from prakash_steel.utils.wip import get_wip_map
+
+# Below this many items forking planning processes costs more than it saves
+PARALLEL_PLAN_MIN_ITEMS = 2000
+
+# (kernel, dirty items, previous plan) of the run planned in processes; forked workers
+# inherit it, so the snapshot is shared copy-on-write instead of pickled per task
+_parallel_plan_state = None
+
+
+def calculate_sku_type(buffer_flag, item_type):
+	"""Calculate SKU type based on buffer flag and item type
+	Same mapping logic as calculate_sku_type in item.js
+	buffer_flag: 'Buffer' or 'Non-Buffer'
+	item_type: 'FG', 'INT', 'RM'
+	"""
+	if not item_type:
+		return None
+
+	is_buffer = buffer_flag == "Buffer"
+
+	if item_type == "FG":
+		return "FGMTA" if is_buffer else "FGMTO"
+	elif item_type == "INT":
+		return "SFGMTA" if is_buffer else "SFGMTO"
+	elif item_type == "RAW":
+		return "PTA" if is_buffer else "PTO"
+
+	return None
+
+
+def calculate_net_order_recommendation(base_order_rec, moq, batch_size):
+	"""
+	Calculate net order recommendation by applying MOQ/Batch Size logic.
+
+	Logic:
+	- If base_order_rec <= 0: return 0 (no order needed, ignore MOQ/Batch Size)
+	- If MOQ > 0:
+	  - If MOQ < base_order_rec: use base_order_rec
+	  - If MOQ >= base_order_rec: use MOQ
+	- Else if batch_size > 0:
+	  - ceil(base_order_rec / batch_size) * batch_size
+	- Else:
+	  - Use base_order_rec as is
+	"""
+	base_order_rec = flt(base_order_rec)
+	moq = flt(moq)
+	batch_size = flt(batch_size)
+
+	# Don't apply MOQ/Batch Size for negative or zero demand
+	if base_order_rec <= 0:
+		return 0
+
+	if moq > 0:
+		if moq < base_order_rec:
+			net_order_rec = base_order_rec
+		else:
+			net_order_rec = moq
+	elif batch_size > 0:
+		net_order_rec = math.ceil(base_order_rec / batch_size) * batch_size
+	else:
+		net_order_rec = base_order_rec
+
+	return max(0, flt(net_order_rec))
+
+
+def calculate_initial_order_recommendation(
+	item_code,
+	item_buffer_map,
+	item_tog_map,
+	item_sku_type_map,
+	stock_map,
+	wip_map,
+	open_so_map,
+	qualified_demand_map,
+	open_po_map,
+	buffer_open_po_sku_types=order_recommendation.BUFFER_OPEN_PO_SKU_TYPES,
+):
+	"""
+	Calculate initial order recommendation for a single item (before BOM traversal).
+	- Buffer: TOG + Qualified Demand - Stock - WIP, less Open PO for buffer_open_po_sku_types
+	- Non-buffer: Open SO - Stock - WIP, less Open PO for PTO/BOTO
+	"""
+	buffer_flag = item_buffer_map.get(item_code, "Non-Buffer")
+	is_buffer = buffer_flag == "Buffer"
+
+	stock = flt(stock_map.get(item_code, 0))
+	wip = flt(wip_map.get(item_code, 0))
+	sku_type = item_sku_type_map.get(item_code)
+	open_po = flt(open_po_map.get(item_code, 0))
+
+	if is_buffer:
+		tog = flt(item_tog_map.get(item_code, 0))
+		qualified_demand = flt(qualified_demand_map.get(item_code, 0))
+
+		if sku_type in buffer_open_po_sku_types:
+			order_rec = max(0, tog + qualified_demand - stock - wip - open_po)
+		else:
+			order_rec = max(0, tog + qualified_demand - stock - wip)
+	else:
+		open_so = flt(open_so_map.get(item_code, 0))
+
+		if sku_type in order_recommendation.NON_BUFFER_OPEN_PO_SKU_TYPES:
+			order_rec = max(0, open_so - stock - wip - open_po)
+		else:
+			order_rec = max(0, open_so - stock - wip)
+
+	return order_rec
+
+
+def calculate_final_order_recommendation(
+	item_code,
+	item_buffer_map,
+	item_tog_map,
+	item_sku_type_map,
+	stock_map,
+	wip_map,
+	open_so_map,
+	qualified_demand_map,
+	open_po_map,
+	mrq_map,
+	parent_demand_map,
+):
+	"""
+	Calculate final order recommendation for a single item (after BOM traversal).
+	- Buffer: TOG + Qualified Demand - Stock - WIP - MRQ (parent demand ignored)
+	  - For BOTA/PTA: also subtract Open PO
+	- Non-buffer: max(0, (Open SO + Parent Demand) - Stock - WIP - MRQ)
+	  - For PTO/BOTO: also subtract Open PO
+	"""
+	buffer_flag = item_buffer_map.get(item_code, "Non-Buffer")
+	is_buffer = buffer_flag == "Buffer"
+
+	stock = flt(stock_map.get(item_code, 0))
+	wip = flt(wip_map.get(item_code, 0))
+	mrq = flt(mrq_map.get(item_code, 0))
+	sku_type = item_sku_type_map.get(item_code)
+	open_po = flt(open_po_map.get(item_code, 0))
+
+	if is_buffer:
+		tog = flt(item_tog_map.get(item_code, 0))
+		qualified_demand = flt(qualified_demand_map.get(item_code, 0))
+
+		if sku_type in order_recommendation.BUFFER_OPEN_PO_SKU_TYPES:
+			base_order_rec = tog + qualified_demand - stock - wip - open_po
+		else:
+			base_order_rec = tog + qualified_demand - stock - wip
+	else:
+		# Requirement = Open SO + sum of all parent BOM demands
+		open_so = flt(open_so_map.get(item_code, 0))
+		parent_demand = flt(parent_demand_map.get(item_code, 0))
+		requirement = open_so + parent_demand
+
+		if sku_type in order_recommendation.NON_BUFFER_OPEN_PO_SKU_TYPES:
+			base_order_rec = requirement - stock - wip - open_po
+		else:
+			base_order_rec = requirement - stock - wip
+
+	return max(0, base_order_rec - mrq)
+
+
+class PlanningKernel:
+	"""
+	One planning computation over item_codes and every BOM component they explode into.
+	Components outside item_codes are planned with quantities only, as non-buffer items.
+
+	plan() works out each item's parent demand in low-level-code order (see
+	mrp_plan.propagate_net_demand), so every BOM is exploded once with its complete
+	demand, then evaluates the final and net order recommendations of all items as
+	whole columns of a PlanningTable.
+
+	``demand_map`` is the demand non-buffer items net against; both entry points pass
+	qualified demand (Open SO due by today).
+	"""
+
+	def __init__(
+		self,
+		bom_graph,
+		item_codes,
+		item_buffer_map,
+		item_tog_map,
+		item_sku_type_map,
+		stock_map,
+		wip_map,
+		demand_map,
+		qualified_demand_map,
+		open_po_map,
+		mrq_map,
+		moq_map,
+		batch_size_map,
+	):
+		self.bom_graph = bom_graph
+		self.item_order = bom_graph.get_low_level_order(sorted(item_codes))
+		self.item_buffer_map = item_buffer_map
+		self.item_tog_map = item_tog_map
+		self.item_sku_type_map = item_sku_type_map
+		self.stock_map = stock_map
+		self.wip_map = wip_map
+		self.demand_map = demand_map
+		self.qualified_demand_map = qualified_demand_map
+		self.open_po_map = open_po_map
+		self.mrq_map = mrq_map
+		self.moq_map = moq_map
+		self.batch_size_map = batch_size_map
+		self.table = order_recommendation.PlanningTable(
+			sorted(self.item_order),
+			item_buffer_map,
+			item_tog_map,
+			item_sku_type_map,
+			stock_map,
+			wip_map,
+			demand_map,
+			qualified_demand_map,
+			open_po_map,
+			mrq_map,
+			moq_map,
+			batch_size_map,
+		)
+
+	@classmethod
+	def from_planning_inputs(cls, planning_inputs, item_codes):
+		"""Kernel over item_codes with their item master fields taken from planning_inputs"""
+		item_buffer_map = {}
+		item_tog_map = {}
+		item_sku_type_map = {}
+		moq_map = {}
+		batch_size_map = {}
+		for item_code in item_codes:
+			item = planning_inputs.items[item_code]
+			buffer_flag = item.buffer_flag or "Non-Buffer"
+			item_buffer_map[item_code] = buffer_flag
+			item_tog_map[item_code] = flt(item.tog or 0)
+			item_sku_type_map[item_code] = calculate_sku_type(buffer_flag, item.item_type)
+			moq_map[item_code] = flt(item.moq or 0)
+			batch_size_map[item_code] = flt(item.batch_size or 0)
+
+		return cls(
+			planning_inputs.bom_graph,
+			item_codes,
+			item_buffer_map,
+			item_tog_map,
+			item_sku_type_map,
+			planning_inputs.stock_map,
+			planning_inputs.wip_map,
+			planning_inputs.qualified_demand_map,
+			planning_inputs.qualified_demand_map,
+			planning_inputs.open_po_map,
+			planning_inputs.mrq_map,
+			moq_map,
+			batch_size_map,
+		)
+
+	def get_net_order_rec(self, item_code, parent_demand):
+		"""Net order recommendation of one item for the given parent demand"""
+		order_rec = calculate_final_order_recommendation(
+			item_code,
+			self.item_buffer_map,
+			self.item_tog_map,
+			self.item_sku_type_map,
+			self.stock_map,
+			self.wip_map,
+			self.demand_map,
+			self.qualified_demand_map,
+			self.open_po_map,
+			self.mrq_map,
+			{item_code: parent_demand},
+		)
+		return calculate_net_order_recommendation(
+			order_rec, self.moq_map.get(item_code, 0), self.batch_size_map.get(item_code, 0)
+		)
+
+	def initial_order_recommendations(self):
+		"""item_code -> order recommendation before any parent demand"""
+		return self.table.to_dict(order_recommendation.initial_order_recommendations(self.table))
+
+	def plan(self, dirty_items=None, previous_plan=None, processes=1):
+		"""
+		Plan dirty_items (default: every item) and whatever their changes flow into.
+
+		Items that are not planned again keep the parent demand stored in previous_plan
+		(item_code -> MRP Plan Item row). Returns a dict of parent_demand,
+		final_order_rec and net_order_rec maps over every item, and planned_items.
+
+		With processes > 1 the BOM families that share no item (see
+		BOMGraph.get_components) are propagated in that many forked processes; the
+		result is the same as planning them in one pass.
+		"""
+		previous_plan = previous_plan or {}
+		if dirty_items is None:
+			dirty_items = self.item_order
+
+		item_groups = []
+		if processes > 1 and len(self.item_order) >= PARALLEL_PLAN_MIN_ITEMS:
+			item_groups = self.get_item_groups(dirty_items, processes)
+
+		if len(item_groups) > 1:
+			planned_parent_demand = self._propagate_in_processes(item_groups, dirty_items, previous_plan)
+		else:
+			planned_parent_demand, _net_order_recs = mrp_plan.propagate_net_demand(
+				self.bom_graph,
+				self.item_order,
+				dirty_items,
+				self.get_net_order_rec,
+				self.item_buffer_map,
+				previous_plan,
+			)
+
+		parent_demand_map = {
+			item_code: flt(previous_plan[item_code].parent_demand)
+			for item_code in self.item_order
+			if item_code not in planned_parent_demand and item_code in previous_plan
+		}
+		parent_demand_map.update(planned_parent_demand)
+
+		final_order_recs = order_recommendation.final_order_recommendations(
+			self.table, self.table.column(parent_demand_map)
+		)
+		net_order_recs = order_recommendation.net_order_recommendations(
+			final_order_recs, self.table.moq, self.table.batch_size
+		)
+
+		return frappe._dict(
+			parent_demand=parent_demand_map,
+			final_order_rec=self.table.to_dict(final_order_recs),
+			net_order_rec=self.table.to_dict(net_order_recs),
+			planned_items=set(planned_parent_demand),
+		)
+
+	def get_item_groups(self, dirty_items, group_count):
+		"""
+		Spread the BOM families holding a dirty item over at most group_count groups of
+		similar size. Every group lists its items in low-level-code order.
+		"""
+		dirty_items = set(dirty_items)
+		components = [
+			component
+			for component in self.bom_graph.get_components(self.item_order)
+			if not dirty_items.isdisjoint(component)
+		]
+
+		# Largest family first, each into the group with the fewest items so far
+		groups = [[] for _idx in range(min(group_count, len(components)))]
+		for component in sorted(components, key=len, reverse=True):
+			min(groups, key=len).extend(component)
+
+		position = {item_code: idx for idx, item_code in enumerate(self.item_order)}
+		return [sorted(group, key=position.__getitem__) for group in groups]
+
+	def _propagate_in_processes(self, item_groups, dirty_items, previous_plan):
+		global _parallel_plan_state
+
+		_parallel_plan_state = (self, set(dirty_items), previous_plan)
+		try:
+			with ProcessPoolExecutor(
+				max_workers=len(item_groups), mp_context=multiprocessing.get_context("fork")
+			) as executor:
+				planned_parent_demand = {}
+				for parent_demand_map in executor.map(_propagate_item_group, item_groups):
+					planned_parent_demand.update(parent_demand_map)
+		finally:
+			_parallel_plan_state = None
+
+		return planned_parent_demand
+
+
+def _propagate_item_group(item_order):
+	"""Parent demand of one group of BOM families, run in a forked planning process"""
+	kernel, dirty_items, previous_plan = _parallel_plan_state
+	parent_demand_map, _net_order_recs = mrp_plan.propagate_net_demand(
+		kernel.bom_graph,
+		item_order,
+		dirty_items.intersection(item_order),
+		kernel.get_net_order_rec,
+		kernel.item_buffer_map,
+		previous_plan,
+	)
+	return parent_demand_map
+
+
+class PlanningInputs:
+	"""
+	Global inputs of a planning run: the demand/supply maps, item master data, Bin stock
+	and the BOM graph.
+
+	Loaded once and treated as read-only, so several views of the report (purchase/sell,
+	buffer/non-buffer) and an MRP run can be computed without re-aggregating anything.
+	"""
+
+	def __init__(self, profiler=None):
+		profiler = profiler or PhaseProfiler()
+
+		profiler.start_phase("Load qualified demand")
+		self.qualified_demand_map = get_qualified_demand_map()
+		profiler.start_phase("Load WIP")
+		self.wip_map = get_wip_map()
+		profiler.start_phase("Load MRQ")
+		self.mrq_map = get_mrq_map()
+		profiler.start_phase("Load open PO")
+		self.open_po_map = get_open_po_map()
+		profiler.start_phase("Load item details")
+		self.items = get_item_details_map()
+		profiler.start_phase("Load stock")
+		self.stock_map = get_stock_map()
+		profiler.start_phase("Load BOM graph")
+		self.bom_graph = load_bom_graph()
+
+	@cached_property
+	def so_qty_map(self):
+		"""All-time Open SO; only shown by the report, so loaded on first use"""
+		return get_sales_order_qty_map()
+
+	def get_view_item_codes(self, buffer_flag):
+		"""Item codes of the buffer (buffer_flag=1) or non-buffer (buffer_flag=0) view"""
+		if buffer_flag:
+			return {item_code for item_code, item in self.items.items() if item.buffer_flag == "Buffer"}
+		return {item_code for item_code, item in self.items.items() if item.buffer_flag != "Buffer"}
+
+	def get_enabled_item_codes(self):
+		return {item_code for item_code, item in self.items.items() if not item.disabled}
+
+	@cached_property
+	def kernel(self):
+		"""PlanningKernel over every enabled item, the way MRP Generation plans"""
+		return PlanningKernel.from_planning_inputs(self, self.get_enabled_item_codes())
+
+	@cached_property
+	def full_plan(self):
+		"""Full plan of the kernel, shared by every view rendered from this snapshot"""
+		return self.kernel.plan()
+
+
+def get_stock_map(item_codes=None):
+	"""Get stock map for the given items, or for every item with a Bin when item_codes is None"""
+	if item_codes is None:
+		bin_rows = frappe.db.sql(
+			"""
+			SELECT item_code, SUM(actual_qty) as stock
+			FROM `tabBin`
+			GROUP BY item_code
+			""",
+			as_dict=True,
+		)
+		return {d.item_code: flt(d.stock) for d in bin_rows}
+
+	if not item_codes:
+		return {}
+
+	bin_rows = frappe.db.sql(
+		"""
+		SELECT item_code, SUM(actual_qty) as stock
+		FROM `tabBin`
+		WHERE item_code IN %s
+		GROUP BY item_code
+		""",
+		(tuple(item_codes),),
+		as_dict=True,
+	)
+
+	return {d.item_code: flt(d.stock) for d in bin_rows}
+
+
+def get_item_details_map():
+	"""Get the planning fields of every item, keyed by item code"""
+	items = frappe.db.sql(
+		"""
+		SELECT
+			i.name as item_code,
+			i.item_name,
+			i.disabled,
+			i.safety_stock as tog,
+			i.custom_top_of_yellow as toy,
+			i.custom_top_of_red as tor,
+			i.custom_item_type as item_type,
+			i.custom_batch_size as batch_size,
+			i.min_order_qty as moq,
+			i.lead_time_days,
+			i.custom_buffer_flag as buffer_flag
+		FROM
+			`tabItem` i
+		""",
+		as_dict=1,
+	)
+
+	return {item.item_code: item for item in items}
+
+
+def get_sales_order_qty_map():
+	"""Open SO (qty - delivered qty) of every item, whatever its delivery date"""
+	so_rows = frappe.db.sql(
+		"""
+		SELECT
+			soi.item_code,
+			SUM(soi.qty - IFNULL(soi.delivered_qty, 0)) as so_qty
+		FROM
+			`tabSales Order` so
+		INNER JOIN
+			`tabSales Order Item` soi ON soi.parent = so.name
+		WHERE
+			so.status NOT IN ('Stopped', 'On Hold', 'Closed', 'Cancelled', 'Completed')
+			AND so.docstatus = 1
+		GROUP BY
+			soi.item_code
+		""",
+		as_dict=True,
+	)
+
+	return {d.item_code: flt(d.so_qty) for d in so_rows}
+
+
+def get_qualified_demand_map():
+	"""
+	Qualified demand of every item: Open SO with delivery_date <= today.
+
+	An over-delivered Sales Order Item counts as 0, so it doesn't reduce the open
+	quantity of another order.
+	"""
+	so_rows = frappe.db.sql(
+		"""
+		SELECT
+			soi.item_code,
+			SUM(GREATEST(0, soi.qty - IFNULL(soi.delivered_qty, 0))) as so_qty
+		FROM
+			`tabSales Order` so
+		INNER JOIN
+			`tabSales Order Item` soi ON soi.parent = so.name
+		WHERE
+			so.status NOT IN ('Stopped', 'On Hold', 'Closed', 'Cancelled', 'Completed')
+			AND so.docstatus = 1
+			AND IFNULL(soi.delivery_date, '1900-01-01') <= %s
+		GROUP BY
+			soi.item_code
+		""",
+		(today(),),
+		as_dict=True,
+	)
+
+	return {d.item_code: flt(d.so_qty) for d in so_rows}
+
+
+def get_mrq_map():
+	"""Open quantity (qty - ordered qty) of Pending / Partially Ordered Material Requests"""
+	mrq_rows = frappe.db.sql(
+		"""
+		SELECT
+			mri.item_code,
+			SUM(GREATEST(0, mri.qty - IFNULL(mri.ordered_qty, 0))) as mrq_qty
+		FROM
+			`tabMaterial Request` mr
+		INNER JOIN
+			`tabMaterial Request Item` mri ON mri.parent = mr.name
+		WHERE
+			mr.docstatus = 1
+			AND mr.status IN ('Pending', 'Partially Ordered')
+		GROUP BY
+			mri.item_code
+		""",
+		as_dict=True,
+	)
+
+	return {d.item_code: flt(d.mrq_qty) for d in mrq_rows}
+
+
+def get_open_po_map():
+	"""Open PO (qty - received qty, negative lines counted as 0) of submitted Purchase Orders"""
+	po_rows = frappe.db.sql(
+		"""
+		SELECT
+			poi.item_code,
+			SUM(GREATEST(0, poi.qty - IFNULL(poi.received_qty, 0))) as open_qty
+		FROM
+			`tabPurchase Order` po
+		INNER JOIN
+			`tabPurchase Order Item` poi ON poi.parent = po.name
+		WHERE
+			po.docstatus = 1
+			AND po.status NOT IN ('Cancelled', 'Closed')
+		GROUP BY
+			poi.item_code
+		""",
+		as_dict=True,
+	)
+
+	return {d.item_code: flt(d.open_qty) for d in po_rows}
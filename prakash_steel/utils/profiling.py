@@ -0,0 +1,181 @@
+# Copyright (c) 2025, beetashoke chakraborty and contributors
+# For license information, please see license.txt
+
+import json
+import time
+from contextlib import contextmanager
+
+import frappe
+from frappe.utils import cint, escape_html, flt, now_datetime
+
+# Site config key that turns profiling on for every run (the "profile" filter does it per run)
+PROFILE_SITE_CONFIG_KEY = "prakash_steel_profile_planning"
+
+
+def is_profiling_enabled(filters=None):
+	return bool(cint((filters or {}).get("profile")) or cint(frappe.conf.get(PROFILE_SITE_CONFIG_KEY)))
+
+
+class PhaseProfiler:
+	"""
+	Opt-in wall time, SQL query count and SQL time per named phase of a planning run.
+
+	Phases are consecutive: start_phase() closes the running phase and opens the next,
+	so long functions can be instrumented without re-indenting them. While a phase is
+	open, frappe.db.sql is wrapped to count and time every query (get_value, get_all
+	etc. go through it too). A disabled profiler does nothing at all.
+	"""
+
+	def __init__(self, enabled=False):
+		self.enabled = enabled
+		self.phases = []
+		self._current = None
+		self._db = None
+		self._original_sql = None
+		self._sql_patched = False
+
+	def start_phase(self, name):
+		if not self.enabled:
+			return
+
+		self._close_phase()
+		self._patch_sql()
+		self._current = {"phase": name, "start": time.perf_counter(), "query_count": 0, "sql_time": 0.0}
+
+	def stop(self):
+		"""Close the running phase and restore frappe.db.sql"""
+		if not self.enabled:
+			return
+
+		self._close_phase()
+		self._unpatch_sql()
+
+	@contextmanager
+	def phase(self, name):
+		"""Measure a block as one phase; the following code is not attributed to it"""
+		self.start_phase(name)
+		try:
+			yield
+		finally:
+			self._close_phase()
+
+	def get_summary(self):
+		return {
+			"total_time_ms": flt(sum(phase["wall_time_ms"] for phase in self.phases), 3),
+			"query_count": sum(phase["query_count"] for phase in self.phases),
+			"sql_time_ms": flt(sum(phase["sql_time_ms"] for phase in self.phases), 3),
+			"phases": self.phases,
+		}
+
+	def get_message(self):
+		"""Phase timings as an HTML table for the report's message area"""
+		if not self.phases:
+			return None
+
+		summary = self.get_summary()
+		rows = "".join(
+			f"<tr><td>{escape_html(phase['phase'])}</td>"
+			f"<td class='text-right'>{phase['wall_time_ms']:.1f}</td>"
+			f"<td class='text-right'>{phase['query_count']}</td>"
+			f"<td class='text-right'>{phase['sql_time_ms']:.1f}</td></tr>"
+			for phase in self.phases
+		)
+		return (
+			"<table class='table table-bordered table-condensed'>"
+			"<thead><tr><th>Phase</th><th class='text-right'>Wall Time (ms)</th>"
+			"<th class='text-right'>Queries</th><th class='text-right'>SQL Time (ms)</th></tr></thead>"
+			f"<tbody>{rows}</tbody>"
+			f"<tfoot><tr><th>Total</th><th class='text-right'>{summary['total_time_ms']:.1f}</th>"
+			f"<th class='text-right'>{summary['query_count']}</th>"
+			f"<th class='text-right'>{summary['sql_time_ms']:.1f}</th></tr></tfoot>"
+			"</table>"
+		)
+
+	def save_log(self, source, filters=None, row_count=0):
+		"""
+		Append the phase timings to a Planning Timing Log.
+
+		Logging must never break the report or job being profiled, so failures are only
+		recorded in the Error Log.
+		"""
+		if not self.phases:
+			return None
+
+		summary = self.get_summary()
+		try:
+			log = frappe.get_doc(
+				{
+					"doctype": "Planning Timing Log",
+					"source": source,
+					"run_on": now_datetime(),
+					"user": frappe.session.user,
+					"filters": json.dumps(filters or {}, sort_keys=True, default=str),
+					"row_count": cint(row_count),
+					"total_time_ms": summary["total_time_ms"],
+					"query_count": summary["query_count"],
+					"sql_time_ms": summary["sql_time_ms"],
+					"phases": [
+						{
+							"phase": phase["phase"],
+							"wall_time_ms": phase["wall_time_ms"],
+							"query_count": phase["query_count"],
+							"sql_time_ms": phase["sql_time_ms"],
+						}
+						for phase in self.phases
+					],
+				}
+			)
+			log.insert(ignore_permissions=True)
+			return log.name
+		except Exception:
+			frappe.log_error(frappe.get_traceback(), "Planning Timing Log Error")
+			return None
+
+	def _close_phase(self):
+		if self._current is None:
+			return
+
+		current = self._current
+		self._current = None
+		self.phases.append(
+			{
+				"phase": current["phase"],
+				"wall_time_ms": flt((time.perf_counter() - current["start"]) * 1000, 3),
+				"query_count": current["query_count"],
+				"sql_time_ms": flt(current["sql_time"] * 1000, 3),
+			}
+		)
+
+	def _patch_sql(self):
+		if self._sql_patched:
+			return
+
+		db = frappe.db
+		original_sql = db.sql
+		profiler = self
+
+		def sql(*args, **kwargs):
+			start = time.perf_counter()
+			try:
+				return original_sql(*args, **kwargs)
+			finally:
+				if profiler._current is not None:
+					profiler._current["query_count"] += 1
+					profiler._current["sql_time"] += time.perf_counter() - start
+
+		# Only an instance attribute is set, so deleting it restores the class method
+		self._original_sql = db.__dict__.get("sql")
+		db.sql = sql
+		self._db = db
+		self._sql_patched = True
+
+	def _unpatch_sql(self):
+		if not self._sql_patched:
+			return
+
+		if self._original_sql is not None:
+			self._db.sql = self._original_sql
+		else:
+			del self._db.sql
+		self._db = None
+		self._sql_patched = False
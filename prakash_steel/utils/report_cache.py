@@ -0,0 +1,140 @@
+# Copyright (c) 2025, beetashoke chakraborty and contributors
+# For license information, please see license.txt
+
+import hashlib
+import json
+import time
+import zlib
+
+import frappe
+from frappe.utils import cint, nowdate
+
+# Doctypes whose changes invalidate planning results. Item and the Production Plan
+# WIP sources are included along with the transactional doctypes because TOG, MOQ,
+# buffer flags and finished weights feed the same calculation.
+PLANNING_FINGERPRINT_DOCTYPES = (
+	"Bin",
+	"Sales Order",
+	"Work Order",
+	"Material Request",
+	"Purchase Order",
+	"BOM",
+	"Item",
+	"Production Plan",
+	"Finish Weight",
+	"Bright Bar Production",
+)
+# Settings read by the same calculation (WIP sources, time-phased planning); a Single's
+# latest change is the "modified" row it keeps in tabSingles
+PLANNING_FINGERPRINT_SINGLES = ("Production planning settings",)
+
+
+def get_data_fingerprint(
+	doctypes=PLANNING_FINGERPRINT_DOCTYPES, latest_change_doctypes=(), singles=PLANNING_FINGERPRINT_SINGLES
+):
+	"""
+	Return a hash of the row count and latest modified timestamp of each doctype.
+
+	Computed in one query; the count catches deletions that leave max(modified) unchanged.
+	latest_change_doctypes are too large to count on every call, so only their latest
+	modified timestamp is compared, and singles contribute their modified timestamp.
+	Today's date is included because qualified demand depends on it.
+	"""
+	columns = [
+		f"(SELECT CONCAT(COUNT(*), '/', IFNULL(MAX(modified), '')) FROM `tab{doctype}`)"
+		for doctype in doctypes
+	]
+	columns += [
+		f"(SELECT IFNULL(MAX(modified), '') FROM `tab{doctype}`)" for doctype in latest_change_doctypes
+	]
+	columns += [
+		f"(SELECT IFNULL(MAX(value), '') FROM `tabSingles` WHERE doctype = {frappe.db.escape(doctype)} "
+		"AND field = 'modified')"
+		for doctype in singles
+	]
+	values = frappe.db.sql(f"SELECT {', '.join(columns)}")[0]
+	raw = "|".join([nowdate(), *(str(value) for value in values)])
+	return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def normalize_filters(filters, ignore=("force_refresh",)):
+	"""Drop empty values and order lists so equivalent filter sets share a cache entry"""
+	normalized = {}
+	for key, value in (filters or {}).items():
+		if key in ignore or value in (None, "", 0, "0", [], False):
+			continue
+		if isinstance(value, list | tuple):
+			value = sorted(str(v) for v in value)
+		normalized[key] = value
+	return json.dumps(normalized, sort_keys=True, default=str)
+
+
+class ReportResultCache:
+	"""
+	Compressed Redis cache of report results with an LRU size cap.
+
+	Entries are zlib-compressed JSON; a sorted set scores every entry key by its last
+	access time so the least recently used entries are evicted once max_entries is
+	exceeded. Hit and miss counters are kept per namespace.
+	"""
+
+	def __init__(self, namespace, max_entries=50, expires_in_sec=6 * 60 * 60):
+		self.namespace = namespace
+		self.max_entries = max_entries
+		self.expires_in_sec = expires_in_sec
+
+	@property
+	def cache(self):
+		return frappe.cache()
+
+	def _key(self, name):
+		return f"report_cache|{self.namespace}|{name}"
+
+	def _raw_key(self, name):
+		# For plain Redis commands, which (unlike get_value/set_value) don't add the site prefix
+		return self.cache.make_key(self._key(name))
+
+	def make_key(self, filters, fingerprint):
+		return hashlib.sha1(f"{normalize_filters(filters)}|{fingerprint}".encode()).hexdigest()
+
+	def get(self, key):
+		compressed = self.cache.get_value(self._key(f"entry|{key}"))
+		if compressed is None:
+			self.cache.incr(self._raw_key("misses"))
+			return None
+
+		self.cache.incr(self._raw_key("hits"))
+		self.cache.zadd(self._raw_key("lru"), {key: time.time()})
+		return json.loads(zlib.decompress(compressed))
+
+	def set(self, key, value):
+		compressed = zlib.compress(json.dumps(value, default=str).encode())
+		self.cache.set_value(self._key(f"entry|{key}"), compressed, expires_in_sec=self.expires_in_sec)
+		self.cache.zadd(self._raw_key("lru"), {key: time.time()})
+		self._evict()
+
+	def _evict(self):
+		lru_key = self._raw_key("lru")
+		overflow = self.cache.zcard(lru_key) - self.max_entries
+		if overflow <= 0:
+			return
+
+		for key in self.cache.zrange(lru_key, 0, overflow - 1):
+			key = frappe.safe_decode(key)
+			self.cache.delete_value(self._key(f"entry|{key}"))
+			self.cache.zrem(lru_key, key)
+
+	def get_stats(self):
+		return {
+			"namespace": self.namespace,
+			"hits": cint(self.cache.get(self._raw_key("hits"))),
+			"misses": cint(self.cache.get(self._raw_key("misses"))),
+			"entries": cint(self.cache.zcard(self._raw_key("lru"))),
+			"max_entries": self.max_entries,
+		}
+
+	def clear(self):
+		lru_key = self._raw_key("lru")
+		for key in self.cache.zrange(lru_key, 0, -1):
+			self.cache.delete_value(self._key(f"entry|{frappe.safe_decode(key)}"))
+		self.cache.delete(lru_key, self._raw_key("hits"), self._raw_key("misses"))
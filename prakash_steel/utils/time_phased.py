@@ -0,0 +1,330 @@
+# Copyright (c) 2025, beetashoke chakraborty and contributors
+# For license information, please see license.txt
+
+"""
+Time-phased (bucketed) netting for the MRP kernel.
+
+Demand, open POs, MRQ and WIP are spread over day or week buckets up to a horizon:
+bucket 0 holds everything due by today, bucket k the k-th day or week after it, and
+quantities due after the horizon are left out. Every quantity is an items x buckets
+array, and a BOM level is netted with a handful of array operations, so a longer
+horizon only widens the arrays. A planned order is released lead_time_days (rounded up
+to whole buckets) before it is due, and its children need their components in the
+bucket it is released in.
+
+With every quantity due in bucket 0 the plan is the single-bucket plan of
+PlanningKernel.plan().
+"""
+
+import math
+
+import frappe
+import numpy as np
+from frappe.utils import add_days, cint, date_diff, flt, getdate, today
+
+from prakash_steel.utils import order_recommendation
+from prakash_steel.utils.wip import get_wip_by_due_date
+
+BUCKET_SIZE_DAYS = {"Day": 1, "Week": 7}
+DEFAULT_BUCKET_SIZE = "Week"
+DEFAULT_HORIZON_BUCKETS = 12
+
+# Quantities kept per item in MRP Plan Item.time_phased_plan
+TIME_PHASED_FIELDS = ("gross_requirements", "planned_receipts", "planned_releases")
+TIME_PHASED_PRECISION = 3
+
+
+class Buckets:
+	"""Bucket 0 (due by start_date) plus horizon day or week buckets after it"""
+
+	def __init__(self, bucket_size=DEFAULT_BUCKET_SIZE, horizon=DEFAULT_HORIZON_BUCKETS, start_date=None):
+		if bucket_size not in BUCKET_SIZE_DAYS:
+			frappe.throw(f"Unknown MRP bucket size: {bucket_size}")
+
+		self.bucket_size = bucket_size
+		self.size_days = BUCKET_SIZE_DAYS[bucket_size]
+		self.horizon = max(1, cint(horizon))
+		self.start_date = getdate(start_date or today())
+		self.count = self.horizon + 1
+
+	@property
+	def end_date(self):
+		return add_days(self.start_date, self.horizon * self.size_days)
+
+	def get_end_dates(self):
+		"""Last day of every bucket"""
+		return [str(add_days(self.start_date, bucket * self.size_days)) for bucket in range(self.count)]
+
+	def get_bucket(self, due_date):
+		"""Bucket of a due date: 0 up to start_date (or without a date), None after the horizon"""
+		if not due_date:
+			return 0
+
+		days = date_diff(due_date, self.start_date)
+		if days <= 0:
+			return 0
+
+		bucket = math.ceil(days / self.size_days)
+		return bucket if bucket <= self.horizon else None
+
+	def get_offset(self, lead_time_days):
+		"""Whole buckets an order has to be released before it is due"""
+		lead_time_days = flt(lead_time_days)
+		return math.ceil(lead_time_days / self.size_days) if lead_time_days > 0 else 0
+
+	def to_matrix(self, rows, index):
+		"""items x buckets array of (item_code, due_date, qty) rows; index is item_code -> row"""
+		values = np.zeros((len(index), self.count))
+		for item_code, due_date, qty in rows:
+			row = index.get(item_code)
+			bucket = self.get_bucket(due_date)
+			if row is not None and bucket is not None:
+				values[row, bucket] += flt(qty)
+		return values
+
+
+def get_settings_buckets():
+	"""Buckets configured in Production planning settings, or None when time-phased planning is off"""
+	settings = frappe.get_cached_doc("Production planning settings")
+	if not cint(settings.get("mrp_time_phased")):
+		return None
+
+	return Buckets(
+		settings.get("mrp_bucket_size") or DEFAULT_BUCKET_SIZE,
+		settings.get("mrp_horizon_buckets") or DEFAULT_HORIZON_BUCKETS,
+	)
+
+
+class TimePhasedPlanner:
+	"""
+	Time-phased plan over the items of a PlanningKernel.
+
+	demand, open_po, mrq and wip are items x buckets arrays in the row order of
+	kernel.table; lead_time_map is item_code -> lead_time_days.
+	"""
+
+	def __init__(self, kernel, buckets, lead_time_map, demand, open_po, mrq, wip):
+		self.kernel = kernel
+		self.buckets = buckets
+		self.demand = demand
+		self.open_po = open_po
+		self.mrq = mrq
+		self.wip = wip
+		self.offsets = np.array(
+			[buckets.get_offset(lead_time_map.get(item_code)) for item_code in kernel.table.item_codes],
+			dtype=np.int64,
+		)
+		self.levels = self._get_levels()
+
+	@classmethod
+	def load(cls, kernel, buckets, planning_inputs):
+		"""Planner over the kernel's items with the bucketed quantities read from the database"""
+		index = kernel.table.index
+		end_date = buckets.end_date
+		lead_time_map = {
+			item_code: item.lead_time_days
+			for item_code, item in planning_inputs.items.items()
+			if item_code in index
+		}
+		return cls(
+			kernel,
+			buckets,
+			lead_time_map,
+			buckets.to_matrix(get_demand_by_due_date(end_date), index),
+			buckets.to_matrix(get_open_po_by_due_date(end_date), index),
+			buckets.to_matrix(get_mrq_by_due_date(end_date), index),
+			buckets.to_matrix(get_wip_by_due_date(), index),
+		)
+
+	def plan(self):
+		"""
+		Net every BOM level in low-level-code order.
+
+		Returns items x buckets arrays: gross_requirements (own demand plus the releases of
+		non-buffer parents), planned_receipts (net order recommendation due per bucket) and
+		planned_releases (the same orders moved back by the item's lead time).
+		"""
+		table = self.kernel.table
+		shape = (len(table.item_codes), self.buckets.count)
+		bucket_ids = np.arange(self.buckets.count)
+
+		# Buffer items hold TOG; purchase SKU types also count their open POs as receipts
+		target = np.where(table.is_buffer, table.tog, 0.0)
+		open_po_mask = np.where(
+			table.is_buffer,
+			table.sku_type_mask(order_recommendation.BUFFER_OPEN_PO_SKU_TYPES),
+			table.sku_type_mask(order_recommendation.NON_BUFFER_OPEN_PO_SKU_TYPES),
+		)
+		receipts = self.wip + self.mrq + np.where(open_po_mask[:, None], self.open_po, 0.0)
+
+		parent_demand = np.zeros(shape)
+		gross_requirements = np.zeros(shape)
+		planned_receipts = np.zeros(shape)
+		planned_releases = np.zeros(shape)
+
+		for rows, parents, children, ratios in self.levels:
+			gross = self.demand[rows] + parent_demand[rows]
+			gross_requirements[rows] = gross
+
+			# Cumulative shortfall against target; orders due by a bucket must cover its worst point
+			shortfall = (
+				target[rows, None]
+				+ np.cumsum(gross, axis=1)
+				- table.stock[rows, None]
+				- np.cumsum(receipts[rows], axis=1)
+			)
+			covered = np.maximum.accumulate(np.maximum(shortfall, 0.0), axis=1)
+			net_requirements = np.diff(covered, axis=1, prepend=0.0)
+
+			orders = lot_size(net_requirements, table.moq[rows], table.batch_size[rows])
+			planned_receipts[rows] = orders
+
+			releases = np.zeros_like(orders)
+			release_buckets = np.maximum(bucket_ids - self.offsets[rows, None], 0)
+			np.add.at(releases, (np.arange(len(rows))[:, None], release_buckets), orders)
+			planned_releases[rows] = releases
+
+			if len(parents):
+				np.add.at(parent_demand, children, planned_releases[parents] * ratios[:, None])
+
+		return frappe._dict(
+			gross_requirements=gross_requirements,
+			planned_receipts=planned_receipts,
+			planned_releases=planned_releases,
+		)
+
+	def get_item_plan(self, result, item_code):
+		"""Stored form of one item's time-phased plan, or None when it has nothing in any bucket"""
+		row = self.kernel.table.index[item_code]
+		values = {
+			fieldname: [flt(value, TIME_PHASED_PRECISION) for value in result[fieldname][row].tolist()]
+			for fieldname in TIME_PHASED_FIELDS
+		}
+		if not any(any(series) for series in values.values()):
+			return None
+
+		return {
+			"bucket_size": self.buckets.bucket_size,
+			"bucket_end_dates": self.buckets.get_end_dates(),
+			**values,
+		}
+
+	def _get_levels(self):
+		"""
+		Rows of every low-level code, with the BOM lines the level passes demand down:
+		(rows, parent rows, child rows, qty per unit), non-buffer children only.
+		"""
+		kernel = self.kernel
+		index = kernel.table.index
+		is_buffer = kernel.table.is_buffer
+
+		levels = {}
+		lines = {}
+		for item_code in kernel.item_order:
+			level = levels.setdefault(item_code, 0)
+			if not kernel.bom_graph.explodes(item_code):
+				continue
+			for child_item_code, _qty, ratio in kernel.bom_graph.get_children(item_code):
+				levels[child_item_code] = max(levels.get(child_item_code, 0), level + 1)
+				if not is_buffer[index[child_item_code]]:
+					lines.setdefault(level, []).append((index[item_code], index[child_item_code], ratio))
+
+		rows_by_level = {}
+		for item_code, level in levels.items():
+			rows_by_level.setdefault(level, []).append(index[item_code])
+
+		result = []
+		for level in sorted(rows_by_level):
+			level_lines = lines.get(level, [])
+			result.append(
+				(
+					np.array(rows_by_level[level], dtype=np.int64),
+					np.array([line[0] for line in level_lines], dtype=np.int64),
+					np.array([line[1] for line in level_lines], dtype=np.int64),
+					np.array([line[2] for line in level_lines], dtype=np.float64),
+				)
+			)
+		return result
+
+
+def lot_size(net_requirements, moq, batch_size):
+	"""
+	Apply MOQ / batch size bucket by bucket (vectorized over items). What an order buys
+	beyond its bucket's requirement covers the following buckets first.
+	"""
+	orders = np.zeros_like(net_requirements)
+	surplus = np.zeros(len(net_requirements))
+	for bucket in range(net_requirements.shape[1]):
+		need = np.maximum(net_requirements[:, bucket] - surplus, 0.0)
+		orders[:, bucket] = order_recommendation.net_order_recommendations(need, moq, batch_size)
+		surplus += orders[:, bucket] - net_requirements[:, bucket]
+	return orders
+
+
+def get_demand_by_due_date(end_date):
+	"""Open SO per item and delivery date up to end_date, as (item_code, due_date, qty) rows"""
+	return frappe.db.sql(
+		"""
+		SELECT
+			soi.item_code,
+			soi.delivery_date,
+			SUM(GREATEST(0, soi.qty - IFNULL(soi.delivered_qty, 0))) as so_qty
+		FROM
+			`tabSales Order` so
+		INNER JOIN
+			`tabSales Order Item` soi ON soi.parent = so.name
+		WHERE
+			so.status NOT IN ('Stopped', 'On Hold', 'Closed', 'Cancelled', 'Completed')
+			AND so.docstatus = 1
+			AND IFNULL(soi.delivery_date, '1900-01-01') <= %s
+		GROUP BY
+			soi.item_code, soi.delivery_date
+		""",
+		(end_date,),
+	)
+
+
+def get_open_po_by_due_date(end_date):
+	"""Open PO per item and schedule date up to end_date, as (item_code, due_date, qty) rows"""
+	return frappe.db.sql(
+		"""
+		SELECT
+			poi.item_code,
+			poi.schedule_date,
+			SUM(GREATEST(0, poi.qty - IFNULL(poi.received_qty, 0))) as open_qty
+		FROM
+			`tabPurchase Order` po
+		INNER JOIN
+			`tabPurchase Order Item` poi ON poi.parent = po.name
+		WHERE
+			po.docstatus = 1
+			AND po.status NOT IN ('Cancelled', 'Closed')
+			AND IFNULL(poi.schedule_date, '1900-01-01') <= %s
+		GROUP BY
+			poi.item_code, poi.schedule_date
+		""",
+		(end_date,),
+	)
+
+
+def get_mrq_by_due_date(end_date):
+	"""Open Material Request qty per item and required-by date up to end_date"""
+	return frappe.db.sql(
+		"""
+		SELECT
+			mri.item_code,
+			mri.schedule_date,
+			SUM(GREATEST(0, mri.qty - IFNULL(mri.ordered_qty, 0))) as mrq_qty
+		FROM
+			`tabMaterial Request` mr
+		INNER JOIN
+			`tabMaterial Request Item` mri ON mri.parent = mr.name
+		WHERE
+			mr.docstatus = 1
+			AND mr.status IN ('Pending', 'Partially Ordered')
+			AND IFNULL(mri.schedule_date, '1900-01-01') <= %s
+		GROUP BY
+			mri.item_code, mri.schedule_date
+		""",
+		(end_date,),
+	)
@@ -0,0 +1,135 @@
+# Copyright (c) 2025, beetashoke chakraborty and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.utils import flt
+
+
+def get_wip_map():
+	"""
+	Get WIP (work in progress) per item, based on Production planning settings.
+
+	- "from_work_order": sum of max(0, qty - produced_qty) over open submitted Work Orders
+	- "from_production_plan": for every po_items row of a submitted Production Plan,
+	  max(0, planned_qty - finished), where finished is the submitted Finish Weight and
+	  Bright Bar Production weight booked against that plan and item
+
+	Both are answered by a single grouped query, so the cost does not grow with the
+	number of plans or plan lines.
+	"""
+	try:
+		settings = frappe.get_single("Production planning settings")
+	except Exception:
+		# If settings don't exist, default to work order method
+		settings = frappe._dict({"from_work_order": 1, "from_production_plan": 0})
+
+	if settings.get("from_work_order"):
+		return get_work_order_wip_map()
+	elif settings.get("from_production_plan"):
+		return get_production_plan_wip_map()
+
+	return {}
+
+
+def get_work_order_wip_map():
+	"""Remaining qty of Work Orders that are not Completed or Cancelled"""
+	wip_rows = frappe.db.sql(
+		"""
+		SELECT
+			wo.production_item as item_code,
+			SUM(GREATEST(0, IFNULL(wo.qty, 0) - IFNULL(wo.produced_qty, 0))) as wip_qty
+		FROM
+			`tabWork Order` wo
+		WHERE
+			wo.status NOT IN ('Completed', 'Cancelled')
+			AND wo.docstatus = 1
+		GROUP BY
+			wo.production_item
+		""",
+		as_dict=True,
+	)
+
+	return {row.item_code: flt(row.wip_qty) for row in wip_rows}
+
+
+def get_production_plan_wip_map():
+	"""
+	Planned minus finished qty of submitted Production Plans.
+
+	Finish Weight and Bright Bar Production are summed per (plan, item) in derived
+	tables and joined to every Production Plan Item row; the clamp at zero is applied
+	per row before summing per item, as the row-by-row calculation did.
+	"""
+	wip_rows = frappe.db.sql(
+		"""
+		SELECT
+			ppi.item_code,
+			SUM(
+				GREATEST(
+					0,
+					IFNULL(ppi.planned_qty, 0) - IFNULL(fw.finished_qty, 0) - IFNULL(bbp.finished_qty, 0)
+				)
+			) as wip_qty
+		FROM
+			`tabProduction Plan Item` ppi
+		INNER JOIN
+			`tabProduction Plan` pp ON pp.name = ppi.parent
+		LEFT JOIN (
+			SELECT production_plan, item_code, SUM(finish_weight) as finished_qty
+			FROM `tabFinish Weight`
+			WHERE docstatus = 1
+			GROUP BY production_plan, item_code
+		) fw ON fw.production_plan = ppi.parent AND fw.item_code = ppi.item_code
+		LEFT JOIN (
+			SELECT production_plan, finished_good, SUM(fg_weight) as finished_qty
+			FROM `tabBright Bar Production`
+			WHERE docstatus = 1
+			GROUP BY production_plan, finished_good
+		) bbp ON bbp.production_plan = ppi.parent AND bbp.finished_good = ppi.item_code
+		WHERE
+			pp.docstatus = 1
+			AND ppi.parenttype = 'Production Plan'
+			AND ppi.parentfield = 'po_items'
+			AND IFNULL(ppi.item_code, '') != ''
+		GROUP BY
+			ppi.item_code
+		""",
+		as_dict=True,
+	)
+
+	return {row.item_code: flt(row.wip_qty) for row in wip_rows}
+
+
+def get_wip_by_due_date():
+	"""
+	WIP per item and due date as (item_code, due_date, qty) rows, for time-phased planning.
+
+	Work Orders are due on their expected delivery date (planned end date when it is not
+	set). Production Plan WIP has no due date of its own and is returned with none, so it
+	counts as due now.
+	"""
+	try:
+		settings = frappe.get_single("Production planning settings")
+	except Exception:
+		settings = frappe._dict({"from_work_order": 1, "from_production_plan": 0})
+
+	if settings.get("from_work_order"):
+		return frappe.db.sql(
+			"""
+			SELECT
+				wo.production_item as item_code,
+				IFNULL(wo.expected_delivery_date, DATE(wo.planned_end_date)) as due_date,
+				SUM(GREATEST(0, IFNULL(wo.qty, 0) - IFNULL(wo.produced_qty, 0))) as wip_qty
+			FROM
+				`tabWork Order` wo
+			WHERE
+				wo.status NOT IN ('Completed', 'Cancelled')
+				AND wo.docstatus = 1
+			GROUP BY
+				wo.production_item, due_date
+			"""
+		)
+	elif settings.get("from_production_plan"):
+		return [(item_code, None, qty) for item_code, qty in get_production_plan_wip_map().items()]
+
+	return []